@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 class CameraPosition(BaseModel):
     x: float
@@ -13,10 +13,64 @@ class CameraRotation(BaseModel):
 
 class FrameData(BaseModel):
     frameId: int
+    timestamp: Optional[float] = None  # capture time in seconds, same clock as audioTrack.startTimestamp
     frameData: str  # base64-encoded JPEG
-    audioData: str  # base64-encoded PCM audio (can be an empty string but must be present)
+    audioData: str = ""  # base64-encoded PCM audio (empty when audioTrack is sent instead)
     cameraPosition: CameraPosition
     cameraRotation: CameraRotation
 
+class Point2D(BaseModel):
+    x: float  # normalised to [0, 1] of the frame width
+    y: float  # normalised to [0, 1] of the frame height
+
+class BoundingBox(BaseModel):
+    x: float  # top-left corner and size, normalised to [0, 1]
+    y: float
+    w: float
+    h: float
+
+class RoiHints(BaseModel):
+    # Regions the user framed in the app; detectors fall back to the full frame without them
+    stumpPoint: Optional[Point2D] = None  # tap point on the striker's stumps
+    pitchCorners: Optional[List[Point2D]] = None  # corners of the pitch corridor polygon
+    batsmanBox: Optional[BoundingBox] = None
+
+class AudioTrack(BaseModel):
+    data: str  # base64-encoded PCM for the whole delivery
+    sampleRate: int = 16000
+    channels: int = 1
+    sampleWidth: int = 2  # bytes per sample
+    startTimestamp: float = 0.0  # capture time of the first sample, in seconds
+
 class VideoAnalysisInput(BaseModel):
     results: List[FrameData]
+    audioTrack: Optional[AudioTrack] = None  # one continuous track instead of per-frame audioData
+    roiHints: Optional[RoiHints] = None
+
+class FrameMetadata(BaseModel):
+    frameId: int
+    timestamp: Optional[float] = None  # capture time in seconds
+    cameraPosition: CameraPosition
+    cameraRotation: CameraRotation
+
+class UploadMetadata(BaseModel):
+    # Per-frame metadata for binary uploads, in the same order as the JPEG parts
+    frames: List[FrameMetadata]
+    roiHints: Optional[RoiHints] = None
+
+class UploadCreate(BaseModel):
+    length: int  # total payload size in bytes
+    chunkSize: int = 4 * 1024 * 1024
+    format: str = "json"  # "json" (VideoAnalysisInput) or a video extension such as "mp4"
+
+class BatchItem(BaseModel):
+    # A delivery already on the server, relative to REVIEW_IMPORT_DIR
+    path: str  # input.json, frames.json or a video clip
+    label: Optional[str] = None  # e.g. "over 12, ball 3"
+
+class BatchCreate(BaseModel):
+    deliveries: List[VideoAnalysisInput] = []  # inline deliveries
+    manifest: List[BatchItem] = []  # and/or files already on disk
+    labels: Optional[List[str]] = None  # labels of the inline deliveries, in order
+    priority: Literal["live", "batch"] = "batch"
+    budget: Optional[float] = Field(default=None, gt=0)  # latency budget per delivery, in seconds
@@ -0,0 +1,55 @@
+"""
+Batch submissions.
+
+A batch groups many deliveries (a whole over or innings) submitted in one
+call. Each delivery becomes an ordinary review with its own review id, queued
+together through ReviewQueue.submit_many and processed by the shared warm
+workers; the batch record only remembers which reviews belong to it, so
+progress is always derived from the reviews themselves.
+"""
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from core.frame_store import FRAME_INDEX_NAME
+from core.video_source import is_video
+
+BATCHES_DIR = "batches"
+
+
+class BatchStore:
+    def __init__(self, review_dir: str):
+        self.path = os.path.join(review_dir, BATCHES_DIR)
+
+    def _file(self, batch_id: str) -> str:
+        return os.path.join(self.path, f"{batch_id}.json")
+
+    def create(self, batch_id: str, items: List[Dict[str, Any]]):
+        """items: one {"review_id", "label", "source"} dict per delivery, in submission order."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file(batch_id), "w") as f:
+            json.dump({"batch_id": batch_id, "created": time.time(), "items": items}, f)
+
+    def load(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(batch_id), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+def resolve_import_path(import_dir: str, path: str) -> str:
+    """
+    Absolute path of a manifest entry. Raises ValueError if it escapes
+    import_dir, does not exist or is not a review input.
+    """
+    root = os.path.realpath(import_dir)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path}: outside the import directory")
+    if not os.path.isfile(resolved):
+        raise ValueError(f"{path}: no such file")
+    if not (is_video(resolved) or resolved.endswith(".json")):
+        raise ValueError(f"{path}: expected input.json, {FRAME_INDEX_NAME} or a video clip")
+    return resolved
@@ -0,0 +1,71 @@
+"""
+Review cancellation and stage deadlines.
+
+Cancelling a review drops a marker file into its directory, so a worker in
+any process sees it. Long per-frame loops call CancelToken.check() once per
+frame; it raises ReviewCancelled once the marker exists and StageTimeout
+once the calling stage has run past its timeout. Stages that never call
+check() are abandoned by the stage graph when they overrun (see
+core/stage_graph.py).
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+CANCEL_MARKER = "cancelled"
+
+
+class ReviewCancelled(Exception):
+    pass
+
+
+class StageTimeout(Exception):
+    """A stage ran past its timeout. abandoned is True if its thread could not be stopped."""
+
+    def __init__(self, stage: str, timeout: float, abandoned: bool = False):
+        super().__init__(f"stage '{stage}' timed out after {timeout:.0f}s")
+        self.stage = stage
+        self.timeout = timeout
+        self.abandoned = abandoned
+
+    def __reduce__(self):
+        # Keep all fields when the error crosses a process boundary
+        return StageTimeout, (self.stage, self.timeout, self.abandoned)
+
+
+def request_cancel(review_path: str):
+    os.makedirs(review_path, exist_ok=True)
+    with open(os.path.join(review_path, CANCEL_MARKER), "w") as f:
+        f.write(str(time.time()))
+
+
+def clear_cancel(review_path: str):
+    try:
+        os.remove(os.path.join(review_path, CANCEL_MARKER))
+    except FileNotFoundError:
+        pass
+
+
+class CancelToken:
+    def __init__(self, review_path: str):
+        self.marker = os.path.join(review_path, CANCEL_MARKER)
+        # Stages run on their own threads, each with its own deadline
+        self._local = threading.local()
+
+    def enter_stage(self, stage: str, timeout: Optional[float]):
+        """Start the deadline of `stage` on the calling thread (no deadline if timeout is falsy)."""
+        self._local.stage = stage
+        self._local.timeout = timeout
+        self._local.deadline = time.monotonic() + timeout if timeout else None
+
+    def cancelled(self) -> bool:
+        return os.path.exists(self.marker)
+
+    def check(self):
+        """Raise ReviewCancelled or StageTimeout if the calling stage should stop."""
+        if self.cancelled():
+            raise ReviewCancelled("review cancelled")
+        deadline = getattr(self._local, "deadline", None)
+        if deadline is not None and time.monotonic() > deadline:
+            raise StageTimeout(self._local.stage, self._local.timeout)
@@ -0,0 +1,54 @@
+"""
+Per-stage checkpoints for review processing.
+
+Every completed pipeline stage stores its output in the review directory
+(stages/<stage>.json unless the stage names its own artifact) followed by a
+completion marker (stages/<stage>.done). An artifact without its marker is
+treated as incomplete, so a crash in the middle of a write is never reused.
+When a review is resumed, stages with a marker are loaded instead of re-run.
+"""
+import json
+import os
+import time
+from typing import Any, List, Optional
+
+STAGES_DIR = "stages"
+
+
+class CheckpointStore:
+    def __init__(self, review_path: str):
+        self.review_path = review_path
+        self.stages_path = os.path.join(review_path, STAGES_DIR)
+
+    def artifact_path(self, stage: str, artifact: Optional[str] = None) -> str:
+        """Path of a stage's output; artifact is relative to the review directory."""
+        if artifact:
+            return os.path.join(self.review_path, artifact)
+        return os.path.join(self.stages_path, f"{stage}.json")
+
+    def _marker_path(self, stage: str) -> str:
+        return os.path.join(self.stages_path, f"{stage}.done")
+
+    def is_complete(self, stage: str) -> bool:
+        return os.path.exists(self._marker_path(stage))
+
+    def completed(self) -> List[str]:
+        if not os.path.isdir(self.stages_path):
+            return []
+        return sorted(name[:-len(".done")] for name in os.listdir(self.stages_path) if name.endswith(".done"))
+
+    def load(self, stage: str, artifact: Optional[str] = None) -> Any:
+        with open(self.artifact_path(stage, artifact), "r") as f:
+            return json.load(f)
+
+    def save(self, stage: str, value: Any, artifact: Optional[str] = None):
+        """Write the stage output atomically, then its completion marker."""
+        os.makedirs(self.stages_path, exist_ok=True)
+        path = self.artifact_path(stage, artifact)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+        with open(self._marker_path(stage), "w") as f:
+            json.dump({"stage": stage, "completed": time.time()}, f)
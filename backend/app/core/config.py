@@ -1 +1,68 @@
-#something
\ No newline at end of file
+"""
+Server settings. Every value can be overridden with an environment variable
+of the same name.
+"""
+import json
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def _env_json(name: str, default):
+    value = os.environ.get(name)
+    return json.loads(value) if value else default
+
+
+REVIEW_DIR = os.environ.get("REVIEW_DIR", "reviews/")
+
+# Review job queue (see core/review_queue.py)
+REVIEW_WORKERS = _env_int("REVIEW_WORKERS", os.cpu_count() or 2)  # reviews processed concurrently; 0 for an API-only frontend
+REVIEW_EXECUTOR = os.environ.get("REVIEW_EXECUTOR", "process")  # "process" (warm worker pool) or "thread"
+REVIEW_START_METHOD = os.environ.get("REVIEW_START_METHOD", "spawn")  # multiprocessing start method
+REVIEW_QUEUE_LIMIT = _env_int("REVIEW_QUEUE_LIMIT", 32)  # pending reviews before submissions get 429
+REVIEW_QUEUE_DB = os.environ.get("REVIEW_QUEUE_DB", os.path.join(REVIEW_DIR, "queue.db"))
+REVIEW_SECONDS_ESTIMATE = _env_float("REVIEW_SECONDS_ESTIMATE", 60.0)  # ETA basis until reviews have completed
+REVIEW_MAX_ATTEMPTS = _env_int("REVIEW_MAX_ATTEMPTS", 3)  # automatic retries resume from stage checkpoints
+
+# Separate API and worker processes sharing the queue database (see worker.py)
+REVIEW_NODE_NAME = os.environ.get("REVIEW_NODE_NAME")  # unique per process; defaults to host:pid
+REVIEW_LEASE_SECONDS = _env_float("REVIEW_LEASE_SECONDS", 60.0)  # silence before a node's running reviews are reclaimed
+REVIEW_POLL_INTERVAL = _env_float("REVIEW_POLL_INTERVAL", 2.0)  # seconds between checks for jobs from other processes
+REVIEW_QUEUE_JOURNAL = os.environ.get("REVIEW_QUEUE_JOURNAL", "wal")  # "delete" when the database is shared across hosts
+
+# CPU thread budgets of concurrent reviews (see core/thread_budget.py)
+REVIEW_CPU_CORES = _env_int("REVIEW_CPU_CORES", 0)  # cores shared by this node's reviews; 0 for all available
+REVIEW_MAX_THREADS_PER_REVIEW = _env_int("REVIEW_MAX_THREADS_PER_REVIEW", 4)  # while other workers are idle; 0 for no cap
+
+# Deadline-aware quality presets (see core/quality.py)
+REVIEW_LATENCY_BUDGET = _env_float("REVIEW_LATENCY_BUDGET", 30.0)  # seconds of processing per review by default
+REVIEW_COSTS_FILE = os.environ.get("REVIEW_COSTS_FILE", os.path.join(REVIEW_DIR, "stage_costs.json"))
+
+# Per-stage timeouts in seconds (see core/cancellation.py); 0 disables a timeout
+REVIEW_STAGE_TIMEOUT = _env_float("REVIEW_STAGE_TIMEOUT", 300.0)  # any stage not listed below
+REVIEW_STAGE_TIMEOUTS = _env_json("REVIEW_STAGE_TIMEOUTS", {"window": 60.0, "audio": 120.0})  # e.g. '{"tracking": 600}'
+REVIEW_STAGE_GRACE = _env_float("REVIEW_STAGE_GRACE", 10.0)  # overrun before a stage that ignores its timeout is abandoned
+
+# Provisional decision while tracking runs (see core/speculation.py)
+REVIEW_SPECULATION_MARGIN = _env_int("REVIEW_SPECULATION_MARGIN", 10)  # tracked frames past the impact point; 0 disables
+
+# Content-addressed result cache (see core/result_cache.py)
+REVIEW_CACHE_DIR = os.environ.get("REVIEW_CACHE_DIR", os.path.join(REVIEW_DIR, "cache"))
+REVIEW_CACHE_MAX_BYTES = _env_int("REVIEW_CACHE_MAX_BYTES", 2 * 1024 ** 3)  # cached results, least recently used dropped first; 0 disables
+REVIEW_CACHE_MAX_AGE = _env_float("REVIEW_CACHE_MAX_AGE", 7 * 24 * 3600.0)  # seconds a result is reused for
+
+# Resumable uploads (see core/resumable_upload.py)
+REVIEW_UPLOAD_MAX_BYTES = _env_int("REVIEW_UPLOAD_MAX_BYTES", 4 * 1024 ** 3)  # largest upload length accepted; larger ones get 413
+
+# Priority classes (see core/review_queue.py)
+REVIEW_LIVE_WORKERS = _env_int("REVIEW_LIVE_WORKERS", 1)  # workers reserved for live reviews
+REVIEW_BATCH_QUEUE_LIMIT = _env_int("REVIEW_BATCH_QUEUE_LIMIT", 1000)  # pending batch re-analyses before 429
+
+# Batch submissions (see core/batches.py): manifest paths are resolved inside this directory
+REVIEW_IMPORT_DIR = os.environ.get("REVIEW_IMPORT_DIR", "imports/")
@@ -0,0 +1,309 @@
+"""
+On-disk frame store for binary review uploads.
+
+Instead of one base64 JSON document, a review can be stored as raw JPEG and
+PCM files inside the review directory plus a small frame index (frames.json)
+that lists them in order, or as the recorded video clip itself. Every module
+that reads review input goes through `iter_frame_entries` /
+`iter_audio_chunks`, which understand all three layouts.
+"""
+import base64
+import binascii
+import json
+import os
+import shutil
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from core.json_stream import JsonStreamReader
+from core.video_source import (
+    is_video, iter_video_frames, extract_audio_track, video_time_span, video_frame_count,
+    AUDIO_SAMPLE_RATE, AUDIO_CHANNELS, AUDIO_SAMPLE_WIDTH,
+)
+
+FRAME_INDEX_NAME = "frames.json"
+ROI_HINTS_NAME = "roi_hints.json"  # sidecar for inputs without a JSON body (video)
+FRAMES_DIR = "frames"
+AUDIO_DIR = "audio"
+
+COPY_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+def is_frame_index(input_path: str) -> bool:
+    return os.path.basename(input_path) == FRAME_INDEX_NAME
+
+
+def save_part(src: BinaryIO, dst_path: str) -> int:
+    """Stream an uploaded part to disk in fixed-size chunks. Returns bytes written."""
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    with open(dst_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        return dst.tell()
+
+
+def frame_file_name(frame_id: int) -> str:
+    return os.path.join(FRAMES_DIR, f"{frame_id:06d}.jpg")
+
+
+def audio_file_name(frame_id: int) -> str:
+    return os.path.join(AUDIO_DIR, f"{frame_id:06d}.pcm")
+
+
+def audio_track_file_name() -> str:
+    return os.path.join(AUDIO_DIR, "track.pcm")
+
+
+def write_frame_index(review_path: str, entries: List[Dict[str, Any]],
+                      audio_track: Optional[Dict[str, Any]] = None,
+                      roi_hints: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write the frame index for a review stored as raw files.
+
+    Each entry holds frameId, timestamp (capture seconds or None), frameFile,
+    audioFile (or None), cameraPosition and cameraRotation; file names are relative to the review directory.
+    audio_track optionally describes one continuous PCM file: file,
+    sampleRate, channels, sampleWidth and startTimestamp. roi_hints are the
+    client-supplied detector hints (see core.InputModel.RoiHints).
+    """
+    index = {"results": entries}
+    if audio_track:
+        index["audioTrack"] = audio_track
+    if roi_hints:
+        index["roiHints"] = roi_hints
+
+    index_path = os.path.join(review_path, FRAME_INDEX_NAME)
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+    return index_path
+
+
+def store_review_input(review_path: str, data: Dict[str, Any]) -> str:
+    """
+    Store a parsed review JSON (see core.InputModel.VideoAnalysisInput) as
+    raw frame and audio files plus a frame index, so the base64 payload is
+    decoded once here instead of by every module. Returns the index path.
+    """
+    entries = []
+    for item in data.get("results", []):
+        frame_id = item["frameId"]
+        frame_bytes = _decode_b64(item.get("frameData"), frame_id, "frameData")
+        frame_file = None
+        if frame_bytes:
+            frame_file = frame_file_name(frame_id)
+            _write_file(review_path, frame_file, frame_bytes)
+
+        audio_bytes = _decode_b64(item.get("audioData"), frame_id, "audioData")
+        audio_file = None
+        if audio_bytes:
+            audio_file = audio_file_name(frame_id)
+            _write_file(review_path, audio_file, audio_bytes)
+
+        entries.append({
+            "frameId": frame_id,
+            "timestamp": item.get("timestamp"),
+            "frameFile": frame_file,
+            "audioFile": audio_file,
+            "cameraPosition": item.get("cameraPosition"),
+            "cameraRotation": item.get("cameraRotation"),
+        })
+
+    track = None
+    audio_track = data.get("audioTrack")
+    pcm = _decode_b64(audio_track.get("data"), None, "audioTrack") if audio_track else None
+    if pcm:
+        track = {key: value for key, value in audio_track.items() if key != "data"}
+        track["file"] = audio_track_file_name()
+        _write_file(review_path, track["file"], pcm)
+
+    return write_frame_index(review_path, entries, audio_track=track, roi_hints=data.get("roiHints"))
+
+
+def _write_file(review_path: str, rel_path: str, data: bytes):
+    path = os.path.join(review_path, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _read_optional(review_path: str, rel_path: Optional[str]) -> Optional[bytes]:
+    if not rel_path:
+        return None
+    with open(os.path.join(review_path, rel_path), "rb") as f:
+        return f.read()
+
+
+def _decode_b64(value: Optional[str], frame_id: Any, what: str) -> Optional[bytes]:
+    if not value:
+        return None
+    try:
+        return base64.b64decode(value)
+    except (binascii.Error, ValueError) as e:
+        print(f"[WARN] Invalid base64 {what} for frame ID {frame_id}: {e}")
+        return None
+
+
+def _in_range(frame_id: Any, frame_range: Optional[Tuple[int, int]]) -> bool:
+    # Frames without an ID cannot be placed in a window
+    return frame_range is None or (frame_id is not None and frame_range[0] <= frame_id <= frame_range[1])
+
+
+def _read_top_level(input_path: str, key: str) -> Any:
+    """Read one top-level field of a review JSON without loading its frames."""
+    if is_frame_index(input_path):
+        # The index holds file names only, loading it whole is cheap
+        with open(input_path, "r") as f:
+            return json.load(f).get(key)
+    return JsonStreamReader(input_path).read_fields([key]).get(key)
+
+
+def iter_frame_entries(input_path: str, load_frames: bool = True,
+                       load_audio: bool = True,
+                       frame_range: Optional[Tuple[int, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one normalised entry per frame, in capture order.
+
+    Entry keys: frameId, timestamp, frameBytes (raw JPEG or None),
+    audioBytes (raw PCM or None), cameraPosition, cameraRotation.
+    Video entries carry the already decoded frame under "image" instead.
+    Pass load_frames/load_audio=False to skip reading data that is not needed,
+    and frame_range=(first, last) (inclusive frame IDs) to skip frames outside
+    the delivery window without decoding them.
+    """
+    if is_video(input_path):
+        # Video audio is one continuous track, see iter_audio_chunks
+        if load_frames:
+            yield from iter_video_frames(input_path, frame_range)
+        return
+
+    if is_frame_index(input_path):
+        review_path = os.path.dirname(input_path)
+        with open(input_path, "r") as f:
+            index = json.load(f)
+        for item in index.get("results", []):
+            if not _in_range(item.get("frameId"), frame_range):
+                continue
+            yield {
+                "frameId": item.get("frameId"),
+                "timestamp": item.get("timestamp"),
+                "frameBytes": _read_optional(review_path, item.get("frameFile")) if load_frames else None,
+                "audioBytes": _read_optional(review_path, item.get("audioFile")) if load_audio else None,
+                "cameraPosition": item.get("cameraPosition"),
+                "cameraRotation": item.get("cameraRotation"),
+            }
+        return
+
+    # Legacy base64 JSON: stream the results array so only one frame is resident
+    for item in JsonStreamReader(input_path).iter_array("results"):
+        frame_id = item.get("frameId")
+        if not _in_range(frame_id, frame_range):
+            continue
+        yield {
+            "frameId": frame_id,
+            "timestamp": item.get("timestamp"),
+            "frameBytes": _decode_b64(item.get("frameData"), frame_id, "frameData") if load_frames else None,
+            "audioBytes": _decode_b64(item.get("audioData"), frame_id, "audioData") if load_audio else None,
+            "cameraPosition": item.get("cameraPosition"),
+            "cameraRotation": item.get("cameraRotation"),
+        }
+
+
+def iter_audio_chunks(input_path: str, skip_empty: bool = True,
+                      frame_range: Optional[Tuple[int, int]] = None) -> Iterator[bytes]:
+    """Yield the raw PCM chunk attached to each frame (see load_audio_track for continuous audio)."""
+    for entry in iter_frame_entries(input_path, load_frames=False, frame_range=frame_range):
+        audio = entry["audioBytes"] or b""
+        if skip_empty and not audio:
+            continue
+        yield audio
+
+
+def count_frames(input_path: str, frame_range: Optional[Tuple[int, int]] = None) -> int:
+    """Number of frames (within frame_range), without decoding any frame."""
+    if is_video(input_path):
+        total = video_frame_count(input_path)
+        if frame_range is None:
+            return total
+        return max(0, min(frame_range[1] + 1, total) - frame_range[0])
+
+    return sum(1 for _ in iter_frame_entries(input_path, load_frames=False, load_audio=False,
+                                             frame_range=frame_range))
+
+
+def frame_time_span(input_path: str,
+                    frame_range: Optional[Tuple[int, int]] = None) -> Optional[Tuple[float, float]]:
+    """
+    Capture times (seconds) of the first and last frame, restricted to
+    frame_range, without decoding any frame. None when frames are untimed.
+    """
+    if is_video(input_path):
+        return video_time_span(input_path, frame_range) if frame_range else None
+
+    timestamps = [
+        entry["timestamp"]
+        for entry in iter_frame_entries(input_path, load_frames=False, load_audio=False, frame_range=frame_range)
+        if entry["timestamp"] is not None
+    ]
+    if not timestamps:
+        return None
+    return min(timestamps), max(timestamps)
+
+
+def load_audio_track(input_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the continuous audio track of a review, if it has one.
+
+    Returns a dict with pcm (raw bytes), sampleRate, channels, sampleWidth and
+    startTimestamp (seconds), or None for reviews with per-frame audio only.
+    """
+    if is_video(input_path):
+        pcm = extract_audio_track(input_path)
+        if not pcm:
+            return None
+        return {
+            "pcm": pcm,
+            "sampleRate": AUDIO_SAMPLE_RATE,
+            "channels": AUDIO_CHANNELS,
+            "sampleWidth": AUDIO_SAMPLE_WIDTH,
+            "startTimestamp": 0.0,
+        }
+
+    track = _read_top_level(input_path, "audioTrack")
+    if not track:
+        return None
+
+    if is_frame_index(input_path):
+        pcm = _read_optional(os.path.dirname(input_path), track.get("file"))
+    else:
+        try:
+            pcm = base64.b64decode(track.get("data") or "")
+        except (binascii.Error, ValueError) as e:
+            print(f"[WARN] Invalid base64 audioTrack: {e}")
+            return None
+    if not pcm:
+        return None
+
+    return {
+        "pcm": pcm,
+        "sampleRate": track.get("sampleRate", AUDIO_SAMPLE_RATE),
+        "channels": track.get("channels", AUDIO_CHANNELS),
+        "sampleWidth": track.get("sampleWidth", AUDIO_SAMPLE_WIDTH),
+        "startTimestamp": track.get("startTimestamp", 0.0),
+    }
+
+
+def write_roi_hints(review_path: str, roi_hints: Dict[str, Any]) -> str:
+    hints_path = os.path.join(review_path, ROI_HINTS_NAME)
+    with open(hints_path, "w") as f:
+        json.dump(roi_hints, f)
+    return hints_path
+
+
+def load_roi_hints(input_path: str) -> Optional[Dict[str, Any]]:
+    """Return the review's ROI hints (normalised coordinates) or None."""
+    if is_video(input_path):
+        hints_path = os.path.join(os.path.dirname(input_path), ROI_HINTS_NAME)
+        if not os.path.exists(hints_path):
+            return None
+        with open(hints_path, "r") as f:
+            return json.load(f)
+
+    return _read_top_level(input_path, "roiHints")
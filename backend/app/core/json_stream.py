@@ -0,0 +1,127 @@
+"""
+Incremental reader for large review JSON documents.
+
+Legacy reviews arrive as one JSON object whose "results" array holds every
+frame as a base64 string. `json.load` keeps the whole delivery resident;
+JsonStreamReader instead reads the file in chunks and decodes one array
+element at a time, so peak memory scales with a single frame.
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStreamReader:
+    def __init__(self, path: str, chunk_size: int = 256 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+
+    def iter_array(self, key: str) -> Iterator[Any]:
+        """Yield the elements of the top-level array `key` one by one."""
+        for name, value in self._iter_top_level(stream_key=key):
+            if name == key:
+                yield value
+
+    def read_fields(self, keys: Iterable[str], skip_array: Optional[str] = "results") -> Dict[str, Any]:
+        """
+        Return the requested top-level fields. The array named skip_array is
+        walked element by element without being kept, so reading small
+        metadata next to the frames never loads all frames at once.
+        """
+        wanted = set(keys)
+        found: Dict[str, Any] = {}
+        for name, value in self._iter_top_level(stream_key=skip_array):
+            if name in wanted:
+                found[name] = value
+                if len(found) == len(wanted):
+                    break
+        return found
+
+    # --- tokenizer -------------------------------------------------------
+
+    def _iter_top_level(self, stream_key: Optional[str]) -> Iterator[Tuple[str, Any]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            self._file = f
+            self._buf = ""
+            self._pos = 0
+            self._eof = False
+
+            self._expect("{")
+            if self._peek() == "}":
+                return
+            while True:
+                key = self._decode_value()
+                if not isinstance(key, str):
+                    raise ValueError(f"{self.path}: expected an object key")
+                self._expect(":")
+
+                if key == stream_key and self._peek() == "[":
+                    self._expect("[")
+                    if self._peek() == "]":
+                        self._pos += 1
+                    else:
+                        while True:
+                            yield key, self._decode_value()
+                            if self._next_char() == "]":
+                                break
+                            self._pos -= 1
+                            self._expect(",")
+                else:
+                    yield key, self._decode_value()
+
+                if self._next_char() == "}":
+                    return
+                self._pos -= 1
+                self._expect(",")
+
+    def _fill(self, min_size: int) -> bool:
+        """Append at least min_size characters to the buffer; False at end of file."""
+        if self._eof:
+            return False
+        # Drop what has been consumed so the buffer only holds the current value
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        data = self._file.read(max(min_size, self.chunk_size))
+        if not data:
+            self._eof = True
+            return False
+        self._buf += data
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(self.chunk_size):
+                raise ValueError(f"{self.path}: unexpected end of JSON")
+
+    def _next_char(self) -> str:
+        c = self._peek()
+        self._pos += 1
+        return c
+
+    def _expect(self, char: str):
+        c = self._next_char()
+        if c != char:
+            raise ValueError(f"{self.path}: expected {char!r}, found {c!r}")
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Value continues past the buffer: grow it geometrically and retry
+                if not self._fill(len(self._buf) - self._pos):
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buf) and not self._eof and self._fill(self.chunk_size):
+                continue
+            self._pos = end
+            return value
@@ -0,0 +1,127 @@
+"""
+Live capture ingestion for WebSocket review sessions.
+
+Frames received from the phone are handed to a background thread that stores
+them in the review's frame store and pushes them through ball tracking
+immediately, so tracking overlaps with capture instead of starting after the
+whole delivery has been uploaded.
+"""
+import base64
+import os
+import queue
+import shutil
+import threading
+from typing import Any, Dict, List, Optional
+
+from core.InputModel import FrameData
+from core.frame_store import FRAMES_DIR, AUDIO_DIR, frame_file_name, audio_file_name, write_frame_index
+from modules.ball_tracking.src.main import load_config
+from modules.ball_tracking.src.tracking_session import TrackingSession
+
+_END = object()
+
+
+class LiveCapture:
+    def __init__(self, review_id: str, review_path: str):
+        self.review_id = review_id
+        self.review_path = review_path
+        self.ball_tracking_output_path = os.path.join(review_path, "ball_tracking_output.json")
+
+        self.session = TrackingSession(load_config())
+        self.index: List[Dict[str, Any]] = []
+        self.roi_hints: Optional[Dict[str, Any]] = None
+        self.tracking_error: Optional[Exception] = None
+
+        self._frames: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"live-{review_id}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def set_roi_hints(self, roi_hints: Dict[str, Any]):
+        """Restrict detection to the regions the user framed (applied from the next frame)."""
+        self._frames.put(("hints", roi_hints))
+
+    def add_frame(self, frame: FrameData):
+        """Queue a captured frame; storage and tracking happen on the worker thread."""
+        self._frames.put(frame)
+
+    def finish(self) -> str:
+        """Close the delivery, wait for tracking to drain and return the frame index path."""
+        self._frames.put(_END)
+        self._thread.join()
+        self.session.save(self.ball_tracking_output_path)
+        return write_frame_index(self.review_path, self.index, roi_hints=self.roi_hints)
+
+    def abort(self):
+        """Stop without a review: wait for the worker thread, then drop everything stored so far."""
+        self._frames.put(_END)
+        self._thread.join()
+        shutil.rmtree(self.review_path, ignore_errors=True)
+
+    @property
+    def ball_data(self) -> List[Dict[str, Any]]:
+        return self.session.outputs
+
+    def _store(self, frame: FrameData) -> Dict[str, Any]:
+        frame_bytes = base64.b64decode(frame.frameData)
+        audio_bytes = base64.b64decode(frame.audioData) if frame.audioData else None
+
+        frame_file = frame_file_name(frame.frameId)
+        with open(os.path.join(self.review_path, frame_file), "wb") as f:
+            f.write(frame_bytes)
+
+        audio_file = None
+        if audio_bytes:
+            audio_file = audio_file_name(frame.frameId)
+            with open(os.path.join(self.review_path, audio_file), "wb") as f:
+                f.write(audio_bytes)
+
+        self.index.append({
+            "frameId": frame.frameId,
+            "timestamp": frame.timestamp,
+            "frameFile": frame_file,
+            "audioFile": audio_file,
+            "cameraPosition": frame.cameraPosition.model_dump(),
+            "cameraRotation": frame.cameraRotation.model_dump(),
+        })
+
+        return {
+            "frameId": frame.frameId,
+            "timestamp": frame.timestamp,
+            "frameBytes": frame_bytes,
+            "audioBytes": audio_bytes,
+            "cameraPosition": frame.cameraPosition.model_dump(),
+            "cameraRotation": frame.cameraRotation.model_dump(),
+        }
+
+    def _run(self):
+        os.makedirs(os.path.join(self.review_path, FRAMES_DIR), exist_ok=True)
+        os.makedirs(os.path.join(self.review_path, AUDIO_DIR), exist_ok=True)
+
+        while True:
+            frame = self._frames.get()
+            if frame is _END:
+                break
+
+            # Hints go through the queue so they apply in order with the frames
+            if isinstance(frame, tuple):
+                _, self.roi_hints = frame
+                self.session.detector.set_roi_hints(self.roi_hints)
+                continue
+
+            try:
+                entry = self._store(frame)
+            except Exception as e:
+                print(f"[ERROR] Live review {self.review_id}: failed to store frame {frame.frameId}: {e}")
+                continue
+
+            # Same semantics as ball_tracking(): the first tracking error stops
+            # tracking, but frames keep being stored so the review stays complete.
+            if self.tracking_error is not None:
+                continue
+            try:
+                self.session.process(entry)
+            except Exception as e:
+                self.tracking_error = e
+                print(f"Error processing frame {self.session.frame_id}: {e} at {self.session.call_check}")
@@ -0,0 +1,285 @@
+"""
+Deadline-aware quality presets for review processing.
+
+A review carries a latency budget in seconds of processing time. The
+expensive, tunable parts of the pipeline each have a ladder of presets, best
+first:
+
+    preprocessing  full (bilateral filter + CLAHE) -> clahe -> none
+    pose           BlazePose at 30 -> 15 -> 5 runs per second of capture
+    render         overlay video at 1280x720 -> 960x540 -> 640x360
+
+Before a stage starts, QualityScheduler picks the best presets whose
+predicted cost fits the remaining budget, using per-frame costs measured on
+earlier reviews (StageCosts). While tracking runs, a StagePacer projects its
+finish time and steps a preset down as soon as the stage falls behind. The
+presets used and every step-down are reported in the decision output.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Ladders per knob, best first: (preset name, settings)
+PRESETS: Dict[str, List[tuple]] = {
+    "preprocessing": [
+        ("full", {"reduce_noise": True, "enhance_contrast": True}),
+        ("clahe", {"reduce_noise": False, "enhance_contrast": True}),
+        ("none", {"reduce_noise": False, "enhance_contrast": False}),
+    ],
+    "pose": [
+        ("30fps", {"pose_fps": 30}),
+        ("15fps", {"pose_fps": 15}),
+        ("5fps", {"pose_fps": 5}),
+    ],
+    "render": [
+        ("720p", {"size": (1280, 720)}),
+        ("540p", {"size": (960, 540)}),
+        ("360p", {"size": (640, 360)}),
+    ],
+}
+
+# Seconds per frame assumed until a cost has been measured. "tracking" is the
+# part of tracking no preset changes (decode, ball detection, trackers).
+DEFAULT_COSTS = {
+    "tracking": 0.015,
+    "preprocessing.full": 0.012,
+    "preprocessing.clahe": 0.004,
+    "preprocessing.none": 0.0,
+    "pose.30fps": 0.025,
+    "pose.15fps": 0.013,
+    "pose.5fps": 0.005,
+    "render.720p": 0.030,
+    "render.540p": 0.018,
+    "render.360p": 0.009,
+}
+
+
+class StageCosts:
+    """
+    Per-frame stage costs learned from earlier reviews, kept as an
+    exponentially weighted average in a JSON file shared by all workers.
+    Concurrent updates may overwrite each other; costs are only estimates.
+    """
+
+    def __init__(self, path: str, alpha: float = 0.3):
+        self.path = path
+        self.alpha = alpha
+        self._costs = self._load()
+
+    def _load(self) -> Dict[str, float]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> float:
+        return self._costs.get(key, DEFAULT_COSTS.get(key, 0.0))
+
+    def update(self, samples: Dict[str, float]):
+        """Blend measured per-frame costs into the stored averages."""
+        if not samples:
+            return
+        costs = self._load()
+        for key, value in samples.items():
+            previous = costs.get(key)
+            costs[key] = value if previous is None else (1 - self.alpha) * previous + self.alpha * value
+        self._costs = costs
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(costs, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class QualityScheduler:
+    def __init__(self, budget: float, costs: StageCosts):
+        """
+        Args:
+            budget: Seconds the review may take, counted from construction
+            costs: Measured per-frame costs
+        """
+        self.budget = budget
+        self.costs = costs
+        self.started = time.monotonic()
+        self.levels = {knob: 0 for knob in PRESETS}
+        self.used: Dict[str, Optional[str]] = {knob: None for knob in PRESETS}
+        self.step_downs: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return self.budget - self.elapsed()
+
+    def preset(self, knob: str) -> Dict[str, Any]:
+        """Settings of the current preset of knob."""
+        return PRESETS[knob][self.levels[knob]][1]
+
+    def preset_name(self, knob: str) -> str:
+        return PRESETS[knob][self.levels[knob]][0]
+
+    def frame_cost(self, knob: str, level: Optional[int] = None) -> float:
+        level = self.levels[knob] if level is None else level
+        return self.costs.get(f"{knob}.{PRESETS[knob][level][0]}")
+
+    def _saving(self, knob: str) -> float:
+        """Per-frame saving of stepping knob down once; 0 at the bottom of its ladder."""
+        level = self.levels[knob]
+        if level + 1 >= len(PRESETS[knob]):
+            return 0.0
+        return self.frame_cost(knob, level) - self.frame_cost(knob, level + 1)
+
+    def _next_step(self, knobs: Sequence[str]) -> Optional[str]:
+        # Ladders are ordered by quality, so a step that saves nothing is still
+        # taken if it is the only one left
+        candidates = [knob for knob in knobs if self.levels[knob] + 1 < len(PRESETS[knob])]
+        if not candidates:
+            return None
+        return max(candidates, key=self._saving)
+
+    def plan(self, knobs: Sequence[str], frames: int, later: Sequence[str] = (), fixed: float = 0.0) -> float:
+        """
+        Choose presets for a stage about to process `frames` frames.
+
+        knobs are the presets the stage uses; later are knobs of stages that
+        still follow and must fit in the same budget (they are planned again
+        when their stage starts). fixed is the per-frame cost no preset
+        changes. Knobs are stepped down, largest saving first, until the
+        prediction fits the remaining budget or every ladder is exhausted.
+        Returns the predicted cost in seconds.
+        """
+        considered = list(knobs) + list(later)
+        with self._lock:
+            for knob in considered:
+                self.levels[knob] = 0
+            remaining = self.remaining()
+            while True:
+                predicted = frames * (fixed + sum(self.frame_cost(knob) for knob in considered))
+                if predicted <= remaining:
+                    break
+                knob = self._next_step(considered)
+                if knob is None:
+                    print(f"[WARN] Review predicted at {predicted:.1f}s with the lowest presets, "
+                          f"{remaining:.1f}s of budget left")
+                    break
+                self.levels[knob] += 1
+            for knob in knobs:
+                self.used[knob] = self.preset_name(knob)
+            return predicted
+
+    def step_down(self, knobs: Sequence[str], frame: Any = None) -> Optional[str]:
+        """Lower the preset with the largest saving among knobs; None if all are at their lowest."""
+        with self._lock:
+            knob = self._next_step(knobs)
+            if knob is None:
+                return None
+            previous = self.preset_name(knob)
+            self.levels[knob] += 1
+            self.used[knob] = self.preset_name(knob)
+            self.step_downs.append({
+                "stage": knob,
+                "from": previous,
+                "to": self.used[knob],
+                "frame": frame,
+                "elapsed": round(self.elapsed(), 2),
+            })
+        print(f"[WARN] Review behind its {self.budget:.0f}s budget: {knob} {previous} -> {self.used[knob]}")
+        return knob
+
+    def pacer(self, stage: str, knobs: Sequence[str], frames: int, reserve: float = 0.0,
+              on_step: Optional[Callable[[], None]] = None,
+              counters: Optional[Callable[[], Dict[str, float]]] = None) -> "StagePacer":
+        """Pacer for a running stage that must finish `reserve` seconds before the deadline."""
+        deadline = self.started + self.budget - reserve
+        return StagePacer(self, stage, knobs, frames, deadline, on_step, counters)
+
+    def report(self) -> Dict[str, Any]:
+        """Presets used (None for stages not run in this attempt) and step-downs, for the decision output."""
+        return {
+            "budget": self.budget,
+            "elapsed": round(self.elapsed(), 2),
+            "presets": dict(self.used),
+            "step_downs": list(self.step_downs),
+        }
+
+
+class StagePacer:
+    """
+    Watches a per-frame stage against its deadline.
+
+    update(done) projects the finish time from the frame rate since the last
+    preset change and steps a preset down when the projection is late. The
+    time spent under each preset is measured and fed back into StageCosts by
+    finish(). counters returns cumulative seconds spent per knob, so the
+    stage's own fixed cost (stored under its name) can be separated from the
+    preset costs.
+    """
+
+    def __init__(self, scheduler: QualityScheduler, stage: str, knobs: Sequence[str], frames: int, deadline: float,
+                 on_step: Optional[Callable[[], None]] = None,
+                 counters: Optional[Callable[[], Dict[str, float]]] = None,
+                 min_frames: int = 10):
+        self.scheduler = scheduler
+        self.stage = stage
+        self.knobs = list(knobs)
+        self.frames = frames
+        self.deadline = deadline
+        self.on_step = on_step
+        self.counters = counters or (lambda: {})
+        self.min_frames = min_frames
+
+        self._sums: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._start_segment(0)
+
+    def _start_segment(self, done: int):
+        self._segment_done = done
+        self._segment_start = time.monotonic()
+        self._segment_counters = self.counters()
+
+    def _close_segment(self, done: int):
+        """Attribute the time since the last preset change to the presets in effect."""
+        frames = done - self._segment_done
+        if frames <= 0:
+            return
+        wall = time.monotonic() - self._segment_start
+        counters = self.counters()
+        fixed = wall
+        for knob in self.knobs:
+            spent = counters.get(knob, 0.0) - self._segment_counters.get(knob, 0.0)
+            fixed -= spent
+            self._add(f"{knob}.{self.scheduler.preset_name(knob)}", spent, frames)
+        self._add(self.stage, max(fixed, 0.0), frames)
+
+    def _add(self, key: str, seconds: float, frames: int):
+        self._sums[key] = self._sums.get(key, 0.0) + seconds
+        self._counts[key] = self._counts.get(key, 0) + frames
+
+    def update(self, done: int, frame: Any = None):
+        """Report that `done` frames of the stage have been processed."""
+        segment_frames = done - self._segment_done
+        if segment_frames < self.min_frames or done >= self.frames:
+            return
+        now = time.monotonic()
+        per_frame = (now - self._segment_start) / segment_frames
+        if now + per_frame * (self.frames - done) <= self.deadline:
+            return
+
+        self._close_segment(done)
+        if self.scheduler.step_down(self.knobs, frame) is None:
+            # Nothing left to lower; stop checking
+            self.min_frames = self.frames
+        elif self.on_step is not None:
+            self.on_step()
+        self._start_segment(done)
+
+    def finish(self, done: int):
+        """Record the measured costs of the stage."""
+        self._close_segment(done)
+        self.scheduler.costs.update({key: self._sums[key] / self._counts[key] for key in self._sums})
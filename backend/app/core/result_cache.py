@@ -0,0 +1,182 @@
+"""
+Content-addressed cache of review results.
+
+The same delivery is often submitted more than once (a network retry, a
+second umpire request, a broadcast replay). review_key() hashes what a
+review's result depends on: the frames and audio with their timestamps and
+camera poses, the ROI hints, the ball tracking config, the latency budget
+and PIPELINE_VERSION, which covers the code of the analysis modules and must
+be bumped by any change that alters results. The same delivery submitted as
+base64 JSON or as a binary upload has the same key; a video clip is hashed
+as its file.
+
+A new submission whose key has a cached result is completed straight away
+with a copy of it. Otherwise the key is written into the review directory
+and the worker stores the result under it once the review completes. Entries
+older than max_age are dropped, and the least recently used ones once the
+cache exceeds max_bytes. API and worker processes share the directory:
+entries are published with an atomic rename and a lookup racing an eviction
+is a miss.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Optional
+
+from core.config import REVIEW_LATENCY_BUDGET, REVIEW_SPECULATION_MARGIN
+from core.frame_store import iter_frame_entries, load_audio_track, load_roi_hints
+from core.video_source import is_video
+from modules.ball_tracking.src.main import load_config
+
+# Bump whenever a change to the pipeline or its modules alters review results
+PIPELINE_VERSION = "1"
+
+# Cache key of a submission, kept in its review directory until the result is stored
+KEY_FILE = "cache_key"
+
+# Result files copied into and out of the cache; decision.json last, since it marks a review complete
+RESULT_FILES = ("video.txt", "decision.json")
+ENTRY_FILE = "entry.json"
+
+
+def _update(digest, data: bytes):
+    # Length prefix, so adjacent fields cannot run into each other
+    digest.update(len(data).to_bytes(8, "big"))
+    digest.update(data)
+
+
+def review_key(input_path: str, budget: Optional[float] = None) -> str:
+    """Hex digest of everything the result of a stored review depends on."""
+    digest = hashlib.sha256()
+    settings = {
+        "pipeline": PIPELINE_VERSION,
+        "tracking": load_config(),
+        "budget": budget or REVIEW_LATENCY_BUDGET,
+        "speculation_margin": REVIEW_SPECULATION_MARGIN,
+        "roi_hints": load_roi_hints(input_path),
+    }
+    _update(digest, json.dumps(settings, sort_keys=True).encode())
+
+    if is_video(input_path):
+        with open(input_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    track = load_audio_track(input_path)
+    if track is not None:
+        _update(digest, json.dumps({k: v for k, v in track.items() if k != "pcm"}, sort_keys=True).encode())
+        _update(digest, track["pcm"])
+    for entry in iter_frame_entries(input_path):
+        meta = {key: entry.get(key) for key in ("frameId", "timestamp", "cameraPosition", "cameraRotation")}
+        _update(digest, json.dumps(meta, sort_keys=True).encode())
+        _update(digest, entry["frameBytes"] or b"")
+        _update(digest, entry["audioBytes"] or b"")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir: str, max_bytes: int, max_age: float):
+        """
+        Args:
+            cache_dir: Directory holding one subdirectory per cached result
+            max_bytes: Total size of cached results; 0 disables the cache
+            max_age: Seconds a result is reused for after it was stored
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def restore(self, key: str, review_path: str) -> Optional[str]:
+        """
+        Copy the cached result for key into review_path and return the id of
+        the review that produced it, or None on a miss.
+        """
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, ENTRY_FILE), "r") as f:
+                info = json.load(f)
+            if time.time() - info["stored"] > self.max_age:
+                return None
+            for name in RESULT_FILES:
+                shutil.copyfile(os.path.join(entry, name), os.path.join(review_path, name))
+            # Mark as recently used for eviction
+            os.utime(os.path.join(entry, ENTRY_FILE))
+        except (FileNotFoundError, ValueError, KeyError):
+            for name in RESULT_FILES:
+                try:
+                    os.remove(os.path.join(review_path, name))
+                except FileNotFoundError:
+                    pass
+            return None
+        return info["review_id"]
+
+    def remember(self, review_path: str, key: str):
+        """Keep the key of a review that missed, for store() once it completes."""
+        with open(os.path.join(review_path, KEY_FILE), "w") as f:
+            f.write(key)
+
+    def store(self, review_id: str, review_path: str):
+        """Cache the result of a completed review that was submitted with a key."""
+        if not self.enabled:
+            return
+        try:
+            with open(os.path.join(review_path, KEY_FILE), "r") as f:
+                key = f.read().strip()
+        except FileNotFoundError:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = os.path.join(self.cache_dir, f".{key}.{os.getpid()}.tmp")
+        try:
+            os.makedirs(tmp_path, exist_ok=True)
+            for name in RESULT_FILES:
+                shutil.copyfile(os.path.join(review_path, name), os.path.join(tmp_path, name))
+            with open(os.path.join(tmp_path, ENTRY_FILE), "w") as f:
+                json.dump({"review_id": review_id, "stored": time.time()}, f)
+            # Replaces an earlier (expired) entry; if another process publishes
+            # the key in between, the rename fails and its entry is kept
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            os.replace(tmp_path, self._entry(key))
+        except OSError as e:
+            print(f"[WARN] Could not cache the result of {review_id}: {e}")
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used until the cache fits max_bytes."""
+        now = time.time()
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry = self._entry(key)
+            if key.startswith(".") or not os.path.isdir(entry):
+                continue
+            try:
+                with open(os.path.join(entry, ENTRY_FILE), "r") as f:
+                    stored = json.load(f)["stored"]
+                last_used = os.path.getmtime(os.path.join(entry, ENTRY_FILE))
+                size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            except (OSError, ValueError, KeyError):
+                # Being written or removed by another process
+                continue
+            if now - stored > self.max_age:
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            entries.append((last_used, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
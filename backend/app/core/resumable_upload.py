@@ -0,0 +1,185 @@
+"""
+Resumable chunked uploads.
+
+A large review payload is uploaded as numbered fixed-size chunks written
+straight into the review directory. The set of committed chunks is persisted
+next to the partial file, so after a dropped connection the client asks for
+the upload status and resends only the missing chunks. Finalizing renames the
+partial file into place; the payload is never copied. Uploads longer than
+REVIEW_UPLOAD_MAX_BYTES are refused before any space is reserved for them.
+
+Chunks of one upload may arrive concurrently (on several threads or API
+processes). Their bytes go to disjoint ranges of the partial file, but
+updates of the upload state are serialized by an exclusive lock on a file
+next to it, so no committed chunk is lost.
+
+Protocol:
+  POST /uploads                      {"length", "chunkSize", "format"} -> upload_id
+  PUT  /uploads/{id}/chunks/{index}  raw bytes of chunk `index`
+  GET  /uploads/{id}                 committed offset and missing chunks
+  POST /uploads/{id}/finalize        start processing the review
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from core.config import REVIEW_UPLOAD_MAX_BYTES
+from core.video_source import VIDEO_EXTENSIONS
+
+UPLOAD_STATE_NAME = "upload.json"
+PART_NAME = "input.part"
+LOCK_NAME = "upload.lock"
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MB
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class UploadError(Exception):
+    """Invalid request against an upload (bad chunk, incomplete payload...)."""
+
+
+class UploadTooLarge(UploadError):
+    """Upload length above REVIEW_UPLOAD_MAX_BYTES."""
+
+
+class ResumableUpload:
+    def __init__(self, review_path: str):
+        self.review_path = review_path
+        self.state_path = os.path.join(review_path, UPLOAD_STATE_NAME)
+        self.part_path = os.path.join(review_path, PART_NAME)
+        self.lock_path = os.path.join(review_path, LOCK_NAME)
+        self.state: Dict[str, Any] = {}
+
+    @staticmethod
+    def target_name(fmt: str) -> str:
+        """Final input file name for a payload format ("json" or a video extension)."""
+        fmt = fmt.lower().lstrip(".")
+        if fmt == "json":
+            return "input.json"
+        if "." + fmt in VIDEO_EXTENSIONS:
+            return "input." + fmt
+        raise UploadError(f"Unsupported upload format: {fmt}")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.state_path)
+
+    def create(self, length: int, chunk_size: int = DEFAULT_CHUNK_SIZE, fmt: str = "json"):
+        if length <= 0:
+            raise UploadError("length must be positive")
+        if length > REVIEW_UPLOAD_MAX_BYTES:
+            raise UploadTooLarge(f"length must be at most {REVIEW_UPLOAD_MAX_BYTES} bytes")
+        if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(f"chunkSize must be between 1 and {MAX_CHUNK_SIZE}")
+
+        os.makedirs(self.review_path, exist_ok=True)
+        self.state = {
+            "length": length,
+            "chunkSize": chunk_size,
+            "chunkCount": (length + chunk_size - 1) // chunk_size,
+            "target": self.target_name(fmt),
+            "chunks": [],
+            "created": time.time(),
+            "finalized": False,
+        }
+        # Pre-size the partial file so chunks can land in any order
+        with open(self.part_path, "wb") as f:
+            f.truncate(length)
+        self._save()
+
+    def load(self) -> "ResumableUpload":
+        with open(self.state_path, "r") as f:
+            self.state = json.load(f)
+        return self
+
+    @contextmanager
+    def _locked(self):
+        """Hold the upload's state lock; the state is reloaded inside it."""
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.load()
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self):
+        tmp_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def chunk_range(self, index: int):
+        """Byte range [start, end) covered by chunk `index`."""
+        if self.state["finalized"]:
+            raise UploadError("Upload already finalized")
+        if not 0 <= index < self.state["chunkCount"]:
+            raise UploadError(f"Chunk index {index} out of range 0..{self.state['chunkCount'] - 1}")
+        start = index * self.state["chunkSize"]
+        return start, min(start + self.state["chunkSize"], self.state["length"])
+
+    def write_at(self, offset: int, data: bytes):
+        fd = os.open(self.part_path, os.O_WRONLY)
+        try:
+            while data:
+                written = os.pwrite(fd, data, offset)
+                offset += written
+                data = data[written:]
+        finally:
+            os.close(fd)
+
+    def commit_chunk(self, index: int):
+        """Mark a fully written chunk as committed. Re-sent chunks are idempotent."""
+        with self._locked():
+            if index not in self.state["chunks"]:
+                self.state["chunks"].append(index)
+                self.state["chunks"].sort()
+                self._save()
+
+    def missing_chunks(self) -> List[int]:
+        received = set(self.state["chunks"])
+        return [i for i in range(self.state["chunkCount"]) if i not in received]
+
+    def committed_offset(self) -> int:
+        """Length of the contiguous prefix that has been committed."""
+        missing = self.missing_chunks()
+        if not missing:
+            return self.state["length"]
+        return missing[0] * self.state["chunkSize"]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "length": self.state["length"],
+            "chunkSize": self.state["chunkSize"],
+            "chunkCount": self.state["chunkCount"],
+            "offset": self.committed_offset(),
+            "missing": self.missing_chunks(),
+            "finalized": self.state["finalized"],
+        }
+
+    def finalize(self) -> str:
+        """Move the completed payload into place and return the review input path."""
+        with self._locked():
+            if self.state["finalized"]:
+                raise UploadError("Upload already finalized")
+            missing = self.missing_chunks()
+            if missing:
+                raise UploadError(f"{len(missing)} chunks missing, first missing chunk {missing[0]}")
+
+            input_path = os.path.join(self.review_path, self.state["target"])
+            os.replace(self.part_path, input_path)
+            self.state["finalized"] = True
+            self._save()
+        return input_path
+
+    def reopen(self):
+        """Undo finalize() for a review that was not accepted, so it can be finalized again."""
+        with self._locked():
+            if not self.state["finalized"]:
+                return
+            os.replace(os.path.join(self.review_path, self.state["target"]), self.part_path)
+            self.state["finalized"] = False
+            self._save()
@@ -0,0 +1,269 @@
+"""
+Review processing pipeline.
+
+Runs every analysis module for one stored review as a graph of stages (see
+core/stage_graph.py) and writes the result files (decision.json, video.txt,
+timings.json) into the review directory. Each stage is checkpointed (see
+core/checkpoints.py), so running a failed review again resumes from its
+first incomplete stage. Jobs are executed by the review queue workers (see
+core/review_queue.py).
+
+Every review runs against a latency budget: tracking and rendering use the
+best quality presets predicted to fit it (see core/quality.py), and the
+presets used are recorded in decision.json. A review can be cancelled while
+it runs, and each stage is bounded by a timeout (see core/cancellation.py).
+
+While tracking is still running, a provisional decision is made as soon as
+the ball has been tracked past the impact point (see core/speculation.py);
+decision.json records whether the final decision confirmed or revised it.
+
+Results of reviews submitted with a cache key are kept for identical
+submissions (see core/result_cache.py).
+"""
+import json
+import os
+import time
+
+from core.config import (
+    REVIEW_DIR, REVIEW_LATENCY_BUDGET, REVIEW_COSTS_FILE,
+    REVIEW_STAGE_TIMEOUT, REVIEW_STAGE_TIMEOUTS, REVIEW_STAGE_GRACE, REVIEW_SPECULATION_MARGIN,
+    REVIEW_CACHE_DIR, REVIEW_CACHE_MAX_BYTES, REVIEW_CACHE_MAX_AGE,
+)
+from core.stage_graph import StageGraph, StageError
+from core.checkpoints import CheckpointStore
+from core.cancellation import CancelToken, ReviewCancelled, StageTimeout
+from core.frame_store import count_frames
+from core.quality import QualityScheduler, StageCosts
+from core.speculation import SpeculativeDecision, PROVISIONAL_TRACKING_OUTPUT, compare, save_provisional
+from core.result_cache import ResultCache
+from modules.ball_tracking.src.main import ball_tracking, find_delivery_window, load_config
+from modules.ball_tracking.src.tracking_session import TrackingSession
+from modules.edge_detection.router import edge_detection, audio_edge_detection
+from modules.trajectory_analysis.tests.work import run_analysis
+from modules.decision_making.FinalDecision import final_decision
+from modules.stream_analysis.stream_analysis import augmented_stream
+
+
+BALL_TRACKING_OUTPUT = "ball_tracking_output.json"
+VIDEO_FILE = "video.txt"
+
+result_cache = ResultCache(REVIEW_CACHE_DIR, REVIEW_CACHE_MAX_BYTES, REVIEW_CACHE_MAX_AGE)
+
+
+def _frame_range(delivery_window):
+    if not delivery_window:
+        return None
+    return (delivery_window["start_frame_id"], delivery_window["end_frame_id"])
+
+
+def _frame_count(input_path, delivery_window):
+    if delivery_window:
+        return delivery_window["kept_frames"]
+    return count_frames(input_path)
+
+
+def build_review_graph(review_id: str, input_path, review_path,
+                       tracked=False, session=None, scheduler=None, threads=None) -> StageGraph:
+    """
+    Pipeline stages and their dependencies:
+
+        window -> tracking -> trajectory --\
+           |          \                    +-> decision
+           +-> audio ---+-> edge ---------/       :
+           |            :      tracking, window ----> stream (waits for decision lazily)
+           +-----> provisional (tracked prefix from the running tracking stage; waits for audio lazily)
+
+    scheduler (a QualityScheduler) picks the tracking and render presets;
+    without one everything runs at full quality. The per-frame loops check
+    the review's CancelToken. threads is the review's thread budget, over
+    which long recordings are tracked in parallel shards.
+    """
+    token = CancelToken(review_path)
+    timeouts = dict(REVIEW_STAGE_TIMEOUTS)
+    # The provisional stage waits on tracking for most of its life
+    timeouts.setdefault("provisional", timeouts.get("tracking", REVIEW_STAGE_TIMEOUT))
+    graph = StageGraph(token=token, timeouts=timeouts,
+                       default_timeout=REVIEW_STAGE_TIMEOUT, grace=REVIEW_STAGE_GRACE)
+    ball_tracking_output_path = os.path.join(review_path, BALL_TRACKING_OUTPUT)
+    speculation = SpeculativeDecision(REVIEW_SPECULATION_MARGIN) if REVIEW_SPECULATION_MARGIN > 0 else None
+
+    # Module 2a: Delivery window (cheap pre-pass over the whole recording)
+    def window():
+        if tracked:
+            return None
+        delivery_window = find_delivery_window(input_path, check=token.check)
+        if delivery_window:
+            print(f"Review {review_id}: tracking frames {delivery_window['start_frame_id']}-"
+                  f"{delivery_window['end_frame_id']} "
+                  f"({delivery_window['kept_frames']}/{delivery_window['total_frames']})")
+        return delivery_window
+
+    # Module 2: Ball Tracking, restricted to the delivery window
+    def tracking(delivery_window):
+        try:
+            return run_tracking(delivery_window)
+        finally:
+            if speculation is not None:
+                speculation.close()
+
+    def run_tracking(delivery_window):
+        if tracked:
+            with open(ball_tracking_output_path, "r") as f:
+                return json.load(f)
+        on_frame = speculation.observe if speculation is not None else None
+        if scheduler is None:
+            return ball_tracking(
+                input_path, ball_tracking_output_path,
+                frame_range=_frame_range(delivery_window), session=session, check=token.check,
+                on_frame=on_frame, threads=threads,
+            )
+
+        # Leave room for rendering, then step presets down if tracking falls behind
+        frames = _frame_count(input_path, delivery_window)
+        tracking_session = session or TrackingSession(load_config())
+        knobs = ["preprocessing", "pose"]
+        scheduler.plan(knobs, frames, later=["render"], fixed=scheduler.costs.get("tracking"))
+
+        def apply_presets():
+            tracking_session.apply_quality(scheduler.preset("preprocessing"), scheduler.preset("pose"))
+
+        pacer = scheduler.pacer(
+            "tracking", knobs, frames, reserve=frames * scheduler.frame_cost("render"),
+            on_step=apply_presets, counters=tracking_session.cost_counters,
+        )
+        return ball_tracking(
+            input_path, ball_tracking_output_path,
+            frame_range=_frame_range(delivery_window), session=tracking_session,
+            quality={knob: scheduler.preset(knob) for knob in knobs}, pacer=pacer, check=token.check,
+            on_frame=on_frame, threads=threads,
+        )
+
+    # Module 3a: Audio edge detection, independent of vision
+    def audio(delivery_window):
+        return audio_edge_detection(input_path, frame_range=_frame_range(delivery_window))
+
+    # Module 3: Edge Detection (vision check merged with the audio result)
+    def edge(ball_data, delivery_window, audio_result):
+        return edge_detection(ball_data, input_path, frame_range=_frame_range(delivery_window), audio=audio_result)
+
+    # Module 4: Trajectory Analysis
+    def trajectory(ball_data):
+        trajectory_data, hit = run_analysis(ball_tracking_output_path)
+        return hit
+
+    # Module 5: Decision Making
+    def decision(ball_data, edge_result, hit):
+        return final_decision(ball_data, edge_result, hit)
+
+    # Modules 3-5 on the frames tracked so far, once the ball is past the impact point.
+    # Only a preview: any failure, or running late, leaves the review to the final decision.
+    def provisional(delivery_window, get_audio):
+        if speculation is None or tracked or CheckpointStore(review_path).is_complete("tracking"):
+            return None
+        try:
+            prefix = speculation.wait(check=token.check)
+            if prefix is None:
+                return None
+            prefix_path = os.path.join(review_path, PROVISIONAL_TRACKING_OUTPUT)
+            with open(prefix_path, "w") as f:
+                json.dump(prefix, f)
+            _, hit = run_analysis(prefix_path)
+            edge_result = edge_detection(prefix, input_path, frame_range=_frame_range(delivery_window),
+                                         audio=get_audio())
+            result = {
+                "decision": final_decision(prefix, edge_result, hit),
+                "frame_id": prefix[-1]["frame_id"],
+                "frames": len(prefix),
+                "elapsed": round(scheduler.elapsed(), 2) if scheduler is not None else None,
+            }
+        except ReviewCancelled:
+            raise
+        except Exception as e:
+            print(f"[WARN] Review {review_id}: no provisional decision: {e}")
+            return None
+        save_provisional(review_path, result)
+        print(f"Review {review_id}: provisional decision {result['decision']} after frame {result['frame_id']}")
+        return result
+
+    # Module 6: Stream Analysis; frames are decoded and drawn while the
+    # decision is still being made, it is only needed for the result banner
+    def stream(ball_data, delivery_window, get_decision):
+        if scheduler is None:
+            render_size = (1280, 720)
+        else:
+            # Resolution is fixed once the writer opens, so it is only chosen here
+            scheduler.plan(["render"], len(ball_data))
+            render_size = scheduler.preset("render")["size"]
+        start = time.monotonic()
+        result_video = augmented_stream(input_path, ball_data, get_decision,
+                                        frame_range=_frame_range(delivery_window), render_size=render_size,
+                                        check=token.check)
+        if scheduler is not None and ball_data:
+            scheduler.costs.update({
+                f"render.{scheduler.preset_name('render')}": (time.monotonic() - start) / len(ball_data)
+            })
+        # Save result video; the checkpoint only records its file name
+        with open(os.path.join(review_path, VIDEO_FILE), "w") as vf:
+            vf.write(result_video)
+        return VIDEO_FILE
+
+    graph.add("window", window)
+    graph.add("tracking", tracking, inputs=["window"], artifact=BALL_TRACKING_OUTPUT)
+    graph.add("audio", audio, inputs=["window"])
+    graph.add("edge", edge, inputs=["tracking", "window", "audio"])
+    graph.add("trajectory", trajectory, inputs=["tracking"])
+    graph.add("decision", decision, inputs=["tracking", "edge", "trajectory"])
+    graph.add("provisional", provisional, inputs=["window"], lazy=["audio"])
+    graph.add("stream", stream, inputs=["tracking", "window"], lazy=["decision"])
+    return graph
+
+
+# tracked=True when ball tracking already ran during live capture; its output
+# is then read from ball_tracking_output.json instead of being recomputed.
+# session is a warm TrackingSession to reuse instead of building detectors.
+# budget is the latency budget in seconds (REVIEW_LATENCY_BUDGET if None).
+# threads is the review's CPU thread budget (see core/thread_budget.py), if any.
+# Raises StageError on failure so the queue can retry; completed stages are
+# reused by the next attempt. Raises ReviewCancelled / StageTimeout when the
+# review is cancelled or a stage times out; those are not retried.
+def process_review(review_id: str, input_path, tracked=False, session=None, budget=None, threads=None):
+    review_path = os.path.join(REVIEW_DIR, review_id + "/")
+    scheduler = QualityScheduler(budget or REVIEW_LATENCY_BUDGET, StageCosts(REVIEW_COSTS_FILE))
+    graph = build_review_graph(review_id, input_path, review_path,
+                               tracked=tracked, session=session, scheduler=scheduler, threads=threads)
+    try:
+        outputs = graph.run(CheckpointStore(review_path))
+        if graph.reused:
+            print(f"Review {review_id}: resumed, reused stages {', '.join(graph.reused)}")
+
+        # Save decision last; its presence marks the review complete
+        with open(os.path.join(review_path, "decision.json"), "w") as df:
+            json.dump({
+                "decision": outputs["decision"],
+                "delivery_window": outputs["window"],
+                "quality": scheduler.report(),
+                "provisional": compare(outputs["provisional"], outputs["decision"]),
+            }, df)
+
+        print(f"Review {review_id} completed successfully "
+              f"(critical path: {' -> '.join(graph.critical_path)})")
+
+        # Identical submissions reuse this result from now on
+        result_cache.store(review_id, review_path)
+
+    except StageError as e:
+        print(f"[ERROR] Processing failed for {review_id}: {e.error} (stage={e.stage})")
+        raise
+
+    except ReviewCancelled:
+        print(f"Review {review_id} cancelled")
+        raise
+
+    except StageTimeout as e:
+        print(f"[ERROR] Review {review_id} timed out: {e}")
+        raise
+
+    finally:
+        # Per-stage timings and critical path, also for failed reviews
+        with open(os.path.join(review_path, "timings.json"), "w") as tf:
+            json.dump(graph.report(), tf, indent=2)
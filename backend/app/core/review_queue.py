@@ -0,0 +1,535 @@
+"""
+Bounded review job queue.
+
+Submitted reviews are appended to a job table in SQLite and processed by a
+fixed number of worker threads, instead of one thread per request. Jobs have
+a priority class: live on-field reviews are always taken before batch
+re-analysis, and some workers are reserved for live reviews, so a batch
+backlog never leaves a live review waiting for a worker. Within a class jobs
+are processed in FIFO order. When too many reviews are pending,
+submit() raises QueueFull with a suggested Retry-After. A failed job is
+requeued automatically up to max_attempts times, and can be requeued again
+by hand with requeue(); the pipeline's checkpoints make each retry resume
+from the stage that failed. Cancelled and timed out reviews are never
+retried automatically.
+
+The job table is shared by every process that opens the same database, so
+API frontends and workers can run as separate processes (python worker.py,
+see worker.py) or hosts; a frontend runs with workers=0 and only submits. A
+worker claims a job by taking a lease on it in a write transaction, and a
+heartbeat thread renews the leases of its running jobs and advertises its
+worker count (used for wait estimates). When a node dies its leases expire
+and the job is claimed again by any worker, resuming from its checkpoints,
+until max_attempts runs have been spent on it. Workers poll for new jobs
+every poll_interval seconds, since a submission in another process cannot
+wake them. Across hosts the review directory and the database must be on
+shared storage; use journal_mode="delete" there, as WAL needs shared memory
+and only works between processes of one host.
+
+Every state change is also reported to an optional on_state hook inside the
+transaction that commits it; core/review_state.py uses it to keep each
+review's status.json in step.
+"""
+import json
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from core.cancellation import ReviewCancelled, StageTimeout
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+# Priority classes, most urgent first
+LIVE = "live"
+BATCH = "batch"
+PRIORITIES = {LIVE: 0, BATCH: 1}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    review_id TEXT UNIQUE NOT NULL,
+    input_path TEXT NOT NULL,
+    options TEXT NOT NULL,
+    state TEXT NOT NULL,
+    enqueued REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    batch_id TEXT,
+    worker TEXT,
+    lease_until REAL
+)
+"""
+
+# Nodes running workers, with their last heartbeat
+_WORKERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    threads INTEGER NOT NULL,
+    live_threads INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+)
+"""
+
+# Columns added after the first release, for job tables created before them
+_MIGRATIONS = {
+    "attempts": "ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+    "error": "ALTER TABLE jobs ADD COLUMN error TEXT",
+    "priority": "ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0",
+    "batch_id": "ALTER TABLE jobs ADD COLUMN batch_id TEXT",
+    "worker": "ALTER TABLE jobs ADD COLUMN worker TEXT",
+    "lease_until": "ALTER TABLE jobs ADD COLUMN lease_until REAL",
+}
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Review queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ReviewQueue:
+    def __init__(self, db_path: str, handler: Callable[..., Any], workers: int = 2,
+                 max_pending: int = 32, default_duration: float = 60.0, max_attempts: int = 3,
+                 live_workers: int = 1, max_batch_pending: int = 1000, lease_seconds: float = 60.0,
+                 poll_interval: float = 2.0, name: Optional[str] = None, journal_mode: str = "wal",
+                 on_state: Optional[Callable[[str, str, Dict[str, Any]], None]] = None):
+        """
+        Args:
+            db_path: SQLite file holding the job table
+            handler: Called as handler(review_id, input_path, **options) for each job
+            workers: Number of reviews processed concurrently by this process (0: submit only)
+            max_pending: Queued (not yet running) live jobs accepted before QueueFull
+            default_duration: Seconds per review assumed until one has completed
+            max_attempts: Runs of a failing job before it stays failed
+            live_workers: Workers that only take live jobs (at least one worker is left for batch)
+            max_batch_pending: Queued batch jobs accepted before QueueFull
+            lease_seconds: Time without a heartbeat after which a running job is claimed again
+            poll_interval: Seconds between checks for jobs submitted by other processes
+            name: Node name recorded on claimed jobs; unique per process. A fixed
+                name lets a restarted node requeue its own jobs at once instead
+                of waiting for their leases to expire
+            journal_mode: SQLite journal mode of the database
+            on_state: Called as on_state(review_id, state, info) on every state change
+        """
+        self.db_path = db_path
+        self.handler = handler
+        self.workers = max(0, workers)
+        self.max_pending = {LIVE: max_pending, BATCH: max_batch_pending}
+        self.default_duration = default_duration
+        self.max_attempts = max(1, max_attempts)
+        self.live_workers = max(0, min(live_workers, self.workers - 1))
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.on_state = on_state
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Other processes hold the write lock briefly; wait for it rather than fail
+        self._db = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._db.execute(f"PRAGMA journal_mode={journal_mode}")
+        with self._transaction():
+            self._db.execute(_SCHEMA)
+            self._db.execute(_WORKERS_SCHEMA)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    self._db.execute(statement)
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch_id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, priority, seq)")
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction, exclusive across processes from its first statement; caller holds the lock."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def start(self):
+        """Start the workers and their heartbeat; a queue with workers=0 only submits."""
+        if self.workers == 0:
+            return
+        with self._lock, self._transaction():
+            # Jobs held under our name are left over from before a restart
+            held = self._db.execute(
+                "SELECT review_id FROM jobs WHERE state = ? AND worker = ?", (RUNNING, self.name)
+            ).fetchall()
+            self._db.execute(
+                "UPDATE jobs SET state = ?, started = NULL, worker = NULL, lease_until = NULL "
+                "WHERE state = ? AND worker = ?", (QUEUED, RUNNING, self.name)
+            )
+            for (review_id,) in held:
+                self._report(review_id, QUEUED)
+            self._beat()
+        self._stopping = False
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="review-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+        for i in range(self.workers):
+            # The first live_workers threads only take live jobs
+            max_priority = PRIORITIES[LIVE] if i < self.live_workers else PRIORITIES[BATCH]
+            thread = threading.Thread(target=self._run, args=(max_priority,), name=f"review-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop taking new jobs. Running reviews are left to finish; once the
+        heartbeat stops, any still running are claimed again when their
+        leases expire.
+        """
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._heartbeat_thread is not None:
+            self._heartbeat_stop.set()
+            self._heartbeat_thread.join(timeout)
+            self._heartbeat_thread = None
+            with self._lock:
+                self._db.execute("DELETE FROM workers WHERE name = ?", (self.name,))
+
+    def _heartbeat(self):
+        """Renew the leases of this node's running jobs until stopped."""
+        while not self._heartbeat_stop.wait(self.lease_seconds / 3):
+            try:
+                with self._lock, self._transaction():
+                    self._beat()
+            except sqlite3.Error as e:
+                # Leases are long enough to survive a few missed beats
+                print(f"[WARN] Review queue heartbeat failed: {e}")
+
+    def _beat(self):
+        """Extend our leases and advertise our workers; caller holds the lock in a transaction."""
+        now = time.time()
+        self._db.execute(
+            "UPDATE jobs SET lease_until = ? WHERE state = ? AND worker = ?",
+            (now + self.lease_seconds, RUNNING, self.name)
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO workers (name, threads, live_threads, heartbeat) VALUES (?, ?, ?, ?)",
+            (self.name, self.workers, self.live_workers, now)
+        )
+        # Forget nodes that have been silent for long
+        self._db.execute("DELETE FROM workers WHERE heartbeat < ?", (now - 10 * self.lease_seconds,))
+
+    def _pending_count(self, priority: str) -> int:
+        return self._db.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = ? AND priority = ?", (QUEUED, PRIORITIES[priority])
+        ).fetchone()[0]
+
+    def _check_capacity(self, priority: str, count: int = 1):
+        """Raise QueueFull if the class has no room for count jobs; caller holds the lock."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class '{priority}'")
+        if self._pending_count(priority) + count > self.max_pending[priority]:
+            raise QueueFull(self._retry_after(priority))
+
+    def check_capacity(self, priority: str = LIVE, count: int = 1):
+        """Raise QueueFull if `count` new submissions would be rejected right now."""
+        with self._lock, self._transaction():
+            self._check_capacity(priority, count)
+
+    def submit(self, review_id: str, input_path: str, force: bool = False, priority: str = LIVE, **options):
+        """
+        Append a review to the queue of its priority class.
+
+        force=True skips the capacity check, for work that was already accepted
+        (a finalized upload, a completed live session).
+        """
+        with self._wakeup, self._transaction():
+            if not force:
+                self._check_capacity(priority)
+            self._append(review_id, input_path, json.dumps(options), PRIORITIES[priority])
+
+    def submit_many(self, jobs: List[tuple], batch_id: str, force: bool = False, priority: str = BATCH):
+        """
+        Append (review_id, input_path, options) jobs as one batch, all or none.
+
+        They are inserted in a single transaction and spread over the workers
+        like any other job of their class.
+        """
+        with self._wakeup, self._transaction():
+            if not force:
+                self._check_capacity(priority, len(jobs))
+            for review_id, input_path, options in jobs:
+                self._append(review_id, input_path, json.dumps(options), PRIORITIES[priority], batch_id=batch_id)
+
+    def _append(self, review_id: str, input_path: str, options: str, priority: int, attempts: int = 0,
+                batch_id: Optional[str] = None):
+        """Insert a job at the back of its class; caller holds the lock in a transaction."""
+        self._db.execute(
+            "INSERT INTO jobs (review_id, input_path, options, state, enqueued, attempts, priority, batch_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (review_id, input_path, options, QUEUED, time.time(), attempts, priority, batch_id),
+        )
+        self._report(review_id, QUEUED, input_path=input_path, options=json.loads(options),
+                     priority=_priority_name(priority), batch_id=batch_id, attempts=attempts)
+        # Not every worker takes every class, so wake them all
+        self._wakeup.notify_all()
+
+    def requeue(self, review_id: str, force: bool = False):
+        """
+        Put a finished or failed review back at the end of the queue with its
+        original options. Raises KeyError for unknown reviews and ValueError
+        if the review is still queued or running.
+        """
+        with self._wakeup, self._transaction():
+            row = self._db.execute(
+                "SELECT seq, input_path, options, state, priority, batch_id FROM jobs WHERE review_id = ?", (review_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(review_id)
+            seq, input_path, options, state, priority, batch_id = row
+            if state in (QUEUED, RUNNING):
+                raise ValueError(f"Review {review_id} is already {state}")
+            if not force:
+                self._check_capacity(_priority_name(priority))
+            # A manual requeue gets a fresh retry budget
+            self._db.execute("DELETE FROM jobs WHERE seq = ?", (seq,))
+            self._append(review_id, input_path, options, priority, batch_id=batch_id)
+
+    def cancel(self, review_id: str) -> str:
+        """
+        Cancel a queued review and return its state afterwards. Running
+        reviews are stopped by the pipeline itself (see core/cancellation.py),
+        so they are left RUNNING here. Raises KeyError for unknown reviews.
+        """
+        with self._lock, self._transaction():
+            row = self._db.execute("SELECT seq, state FROM jobs WHERE review_id = ?", (review_id,)).fetchone()
+            if row is None:
+                raise KeyError(review_id)
+            seq, state = row
+            if state != QUEUED:
+                return state
+            self._db.execute("UPDATE jobs SET state = ?, finished = ? WHERE seq = ?", (CANCELLED, time.time(), seq))
+            self._report(review_id, CANCELLED)
+            return CANCELLED
+
+    def _average_duration(self) -> float:
+        row = self._db.execute(
+            "SELECT AVG(finished - started) FROM (SELECT finished, started FROM jobs "
+            "WHERE state = ? ORDER BY finished DESC LIMIT 20)", (DONE,)
+        ).fetchone()
+        return row[0] if row and row[0] else self.default_duration
+
+    def _class_workers(self, priority: str) -> int:
+        """Workers of all live nodes that may take jobs of the class; caller holds the lock."""
+        threads, live_threads = self._db.execute(
+            "SELECT SUM(threads), SUM(live_threads) FROM workers WHERE heartbeat >= ?",
+            (time.time() - self.lease_seconds,)
+        ).fetchone()
+        if not threads:
+            # No worker has reported yet; assume this node's own
+            threads, live_threads = self.workers, self.live_workers
+        return max(1, threads if priority == LIVE else threads - live_threads)
+
+    def _retry_after(self, priority: str = LIVE) -> int:
+        # Roughly when a worker frees a slot
+        return max(1, math.ceil(self._average_duration() / self._class_workers(priority)))
+
+    def status(self, review_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Queue state of a review, or None if it was never queued.
+
+        Pending jobs also report their position (0 = next to start; every
+        queued job of a more urgent class counts as ahead) and an estimated
+        wait in seconds until processing starts.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT seq, state, attempts, error, priority, worker FROM jobs WHERE review_id = ?", (review_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            seq, state, attempts, error, priority, worker = row
+            priority_name = _priority_name(priority)
+            result: Dict[str, Any] = {"state": state, "attempts": attempts, "priority": priority_name}
+            if state in (FAILED, TIMED_OUT):
+                result["error"] = error
+            if state == RUNNING:
+                result["worker"] = worker
+            if state != QUEUED:
+                return result
+
+            ahead = self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = ? AND (priority < ? OR (priority = ? AND seq < ?))",
+                (QUEUED, priority, priority, seq)
+            ).fetchone()[0]
+            # Running jobs that hold a worker this class could use
+            running = self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = ? AND priority >= ?",
+                (RUNNING, priority if priority_name == BATCH else PRIORITIES[LIVE])
+            ).fetchone()[0]
+            duration = self._average_duration()
+            workers = self._class_workers(priority_name)
+
+        # Every job ahead and every running job must free a worker first
+        busy = ahead + running
+        waves = max(0, busy - workers + 1)
+        result["position"] = ahead
+        result["estimated_wait"] = round(math.ceil(waves / workers) * duration, 1)
+        return result
+
+    def batch_states(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        """Queue state, attempts and error of every job of a batch, by review id."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT review_id, state, attempts, error FROM jobs WHERE batch_id = ?", (batch_id,)
+            ).fetchall()
+        return {
+            review_id: {"state": state, "attempts": attempts, "error": error}
+            for review_id, state, attempts, error in rows
+        }
+
+    def _claim(self, max_priority: int) -> Optional[tuple]:
+        """
+        Lease the most urgent, then oldest, queued job up to max_priority;
+        caller holds the lock. Jobs whose lease expired are requeued first.
+        """
+        with self._transaction():
+            now = time.time()
+            self._release_expired(now)
+            row = self._db.execute(
+                "SELECT seq, review_id, input_path, options, attempts, priority, batch_id FROM jobs "
+                "WHERE state = ? AND priority <= ? ORDER BY priority, seq LIMIT 1",
+                (QUEUED, max_priority)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET state = ?, started = ?, attempts = attempts + 1, worker = ?, lease_until = ? "
+                "WHERE seq = ?",
+                (RUNNING, now, self.name, now + self.lease_seconds, row[0])
+            )
+            self._report(row[1], RUNNING, attempts=row[4] + 1, worker=self.name)
+            return row
+
+    def _release_expired(self, now: float):
+        """
+        Requeue running jobs whose node stopped renewing their lease, in
+        their original place; a job that has used up its attempts fails.
+        Caller holds the lock in a transaction.
+        """
+        expired = self._db.execute(
+            "SELECT seq, review_id, attempts, worker FROM jobs "
+            "WHERE state = ? AND (lease_until IS NULL OR lease_until < ?)", (RUNNING, now)
+        ).fetchall()
+        for seq, review_id, attempts, worker in expired:
+            if attempts < self.max_attempts:
+                print(f"[WARN] Lease of review {review_id} held by {worker} expired, requeuing it")
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, started = NULL, worker = NULL, lease_until = NULL WHERE seq = ?",
+                    (QUEUED, seq)
+                )
+                self._report(review_id, QUEUED)
+            else:
+                print(f"[ERROR] Lease of review {review_id} held by {worker} expired, no attempts left")
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, finished = ?, error = ?, worker = NULL, lease_until = NULL "
+                    "WHERE seq = ?", (FAILED, now, f"worker {worker} stopped responding", seq)
+                )
+                self._report(review_id, FAILED, error=f"worker {worker} stopped responding")
+
+    def _run(self, max_priority: int):
+        while True:
+            with self._wakeup:
+                job = None
+                while not self._stopping:
+                    try:
+                        job = self._claim(max_priority)
+                    except sqlite3.Error as e:
+                        print(f"[WARN] Review queue claim failed: {e}")
+                    if job is not None:
+                        break
+                    # Submissions from other processes do not notify us
+                    self._wakeup.wait(self.poll_interval)
+                if job is None:
+                    return
+
+            seq, review_id, input_path, options, attempts, priority, batch_id = job
+            attempts += 1
+            try:
+                self.handler(review_id, input_path, **json.loads(options))
+            except ReviewCancelled:
+                self._finish(seq, review_id, CANCELLED)
+                continue
+            except StageTimeout as e:
+                print(f"[ERROR] Review job {review_id} timed out: {e}")
+                self._finish(seq, review_id, TIMED_OUT, str(e))
+                continue
+            except Exception as e:
+                print(f"[ERROR] Review job {review_id} failed (attempt {attempts}/{self.max_attempts}): {e}")
+                with self._wakeup, self._transaction():
+                    if not self._holds(seq):
+                        print(f"[WARN] Lost the lease of review {review_id}, leaving it to its new worker")
+                    elif attempts < self.max_attempts:
+                        # Retry at the back of the queue; it resumes from its checkpoints
+                        self._db.execute("DELETE FROM jobs WHERE seq = ?", (seq,))
+                        self._append(review_id, input_path, options, priority, attempts, batch_id)
+                    else:
+                        self._finish_locked(seq, review_id, FAILED, str(e))
+                continue
+
+            self._finish(seq, review_id, DONE)
+
+    def _holds(self, seq: int) -> bool:
+        """Whether this node still holds the lease of a running job; caller holds the lock."""
+        row = self._db.execute("SELECT state, worker FROM jobs WHERE seq = ?", (seq,)).fetchone()
+        return row is not None and row[0] == RUNNING and row[1] == self.name
+
+    def _finish(self, seq: int, review_id: str, state: str, error: Optional[str] = None):
+        with self._lock, self._transaction():
+            self._finish_locked(seq, review_id, state, error)
+
+    def _finish_locked(self, seq: int, review_id: str, state: str, error: Optional[str] = None):
+        """Record the outcome if the job is still ours; caller holds the lock in a transaction."""
+        updated = self._db.execute(
+            "UPDATE jobs SET state = ?, finished = ?, error = ?, lease_until = NULL "
+            "WHERE seq = ? AND state = ? AND worker = ?",
+            (state, time.time(), error, seq, RUNNING, self.name)
+        ).rowcount
+        if not updated:
+            print(f"[WARN] Lost the lease of review {review_id} before it finished, result not recorded")
+            return
+        self._report(review_id, state, **({"error": error} if error else {}))
+
+    def _report(self, review_id: str, state: str, **info):
+        """Pass a state change to on_state before it commits; caller holds the lock in a transaction."""
+        if self.on_state is None:
+            return
+        try:
+            self.on_state(review_id, state, info)
+        except Exception as e:
+            # The job table stays authoritative
+            print(f"[WARN] Could not record state {state} of review {review_id}: {e}")
+
+
+def _priority_name(priority: int) -> str:
+    return next((name for name, value in PRIORITIES.items() if value == priority), BATCH)
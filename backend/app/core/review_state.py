@@ -0,0 +1,146 @@
+"""
+Persisted review state.
+
+Every queued review has a status.json in its directory recording where it is
+in its lifecycle:
+
+    queued -> running -> complete
+                      -> failed | timed_out | cancelled
+                      -> queued         (automatic retry, worker lost)
+    queued -> cancelled | failed        (cancelled, or worker lost on its last attempt)
+    failed | timed_out | cancelled -> queued    (resumed)
+
+The job queue reports each transition as it commits it (ReviewQueue's
+on_state hook), so the file follows the queue database, which stays
+authoritative: an unexpected transition is logged and recorded anyway. The
+file also keeps the input and options the review was queued with, which lets
+recover_reviews() queue a review again on startup when its job is gone (the
+queue database was lost, or the review predates it) instead of leaving it
+"processing" forever. Checkpointed stages are reused as on any other retry.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from core.batches import BATCHES_DIR
+from core.frame_store import FRAME_INDEX_NAME
+from core.resumable_upload import UPLOAD_STATE_NAME
+from core.review_queue import QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMED_OUT, ReviewQueue
+from core.video_source import VIDEO_EXTENSIONS
+
+STATUS_NAME = "status.json"
+
+# The queue's DONE, as reported to clients
+COMPLETE = "complete"
+
+# Allowed transitions; None is a review that was never queued (or is
+# complete straight away from the result cache, see core/result_cache.py)
+TRANSITIONS = {
+    None: {QUEUED, COMPLETE},
+    QUEUED: {RUNNING, CANCELLED, FAILED},
+    RUNNING: {COMPLETE, FAILED, TIMED_OUT, CANCELLED, QUEUED},
+    FAILED: {QUEUED},
+    TIMED_OUT: {QUEUED},
+    CANCELLED: {QUEUED},
+    COMPLETE: set(),
+}
+
+
+class ReviewStates:
+    def __init__(self, review_dir: str):
+        self.review_dir = review_dir
+
+    def _file(self, review_id: str) -> str:
+        return os.path.join(self.review_dir, review_id, STATUS_NAME)
+
+    def load(self, review_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(review_id), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def record(self, review_id: str, state: str, info: Dict[str, Any]):
+        """
+        Store a queue state change (info: fields to update, e.g. input_path,
+        options, attempts, error). Used as the queue's on_state hook, so it
+        runs inside the queue transaction and writes are ordered across
+        processes.
+        """
+        state = COMPLETE if state == DONE else state
+        status = self.load(review_id) or {}
+        previous = status.get("state")
+        if state not in TRANSITIONS.get(previous, set()):
+            print(f"[WARN] Review {review_id} moved from {previous} to {state}")
+
+        status.update(info)
+        status["state"] = state
+        status["updated"] = time.time()
+        if state not in (FAILED, TIMED_OUT):
+            status.pop("error", None)
+
+        path = self._file(review_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(status, f)
+        os.replace(tmp_path, path)
+
+
+def _stored_input(review_path: str) -> Optional[str]:
+    """Input file of a review stored before status.json existed; None while an upload is incomplete."""
+    upload_state = os.path.join(review_path, UPLOAD_STATE_NAME)
+    if os.path.exists(upload_state):
+        with open(upload_state, "r") as f:
+            if not json.load(f).get("finalized"):
+                return None
+    names = [FRAME_INDEX_NAME, "input.json"] + ["input" + ext for ext in sorted(VIDEO_EXTENSIONS)]
+    for name in names:
+        path = os.path.join(review_path, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def recover_reviews(review_dir: str, queue: ReviewQueue, states: ReviewStates) -> List[str]:
+    """
+    Queue again every unfinished review whose job is no longer in the queue
+    and return their ids. Reviews the queue still holds are left to it
+    (running jobs of a dead worker are reclaimed when their lease expires);
+    failed, timed out and cancelled reviews wait for a manual resume.
+    """
+    recovered = []
+    for review_id in sorted(os.listdir(review_dir)):
+        review_path = os.path.join(review_dir, review_id)
+        if review_id == BATCHES_DIR or not os.path.isdir(review_path):
+            continue
+        if os.path.exists(os.path.join(review_path, "decision.json")):
+            continue
+        if queue.status(review_id) is not None:
+            continue
+
+        status = states.load(review_id)
+        try:
+            if status is None:
+                input_path = _stored_input(review_path)
+                if input_path is None:
+                    # Nothing stored yet (upload or live capture in progress)
+                    continue
+                queue.submit(review_id, input_path, force=True)
+            elif status["state"] in (QUEUED, RUNNING):
+                if not os.path.exists(status["input_path"]):
+                    print(f"[WARN] Input of review {review_id} is gone, cannot recover it")
+                    continue
+                job = (review_id, status["input_path"], status.get("options", {}))
+                queue.submit_many([job], status.get("batch_id"), force=True, priority=status["priority"])
+            else:
+                continue
+        except sqlite3.IntegrityError:
+            # Queued by another server starting at the same time
+            continue
+        recovered.append(review_id)
+
+    if recovered:
+        print(f"[WARN] Requeued {len(recovered)} interrupted reviews: {', '.join(recovered)}")
+    return recovered
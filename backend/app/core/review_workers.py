@@ -0,0 +1,168 @@
+"""
+Warm review worker processes.
+
+Reviews are CPU bound (OpenCV, MediaPipe, noisereduce), so they run in a
+pool of long-lived processes instead of threads of the API process. Each
+worker loads the analysis modules and builds its detectors once when it
+starts, then reuses them for every review it processes; only the per-review
+tracking state is reset between jobs. The cores are shared out between the
+running reviews by a ThreadGovernor (core/thread_budget.py), so concurrent
+reviews do not oversubscribe the CPU with library thread pools. A crashing review takes down its
+worker, never the server: the pool is rebuilt and the job is reported failed.
+A stage that ran past its timeout without stopping keeps burning CPU in its
+worker, so that pool is retired: new reviews go to a fresh pool, and the old
+workers are terminated once their other reviews have finished.
+
+build_review_queue() wires the pool to the job queue the same way for the
+API server and for standalone worker processes (worker.py).
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Set, Tuple
+
+from core.cancellation import StageTimeout
+from core.config import (
+    REVIEW_WORKERS, REVIEW_QUEUE_LIMIT, REVIEW_QUEUE_DB, REVIEW_SECONDS_ESTIMATE,
+    REVIEW_EXECUTOR, REVIEW_START_METHOD, REVIEW_MAX_ATTEMPTS,
+    REVIEW_LIVE_WORKERS, REVIEW_BATCH_QUEUE_LIMIT,
+    REVIEW_NODE_NAME, REVIEW_LEASE_SECONDS, REVIEW_POLL_INTERVAL, REVIEW_QUEUE_JOURNAL, REVIEW_DIR,
+    REVIEW_CPU_CORES, REVIEW_MAX_THREADS_PER_REVIEW,
+)
+from core.review_pipeline import process_review
+from core.review_queue import ReviewQueue
+from core.review_state import ReviewStates
+from core.thread_budget import ThreadGovernor, apply_thread_limits, export_pool_limits
+from modules.ball_tracking.src.main import load_config
+from modules.ball_tracking.src.tracking_session import TrackingSession
+
+# Per-process state, set by init_worker
+_session = None
+
+
+def init_worker():
+    """Process initializer: build the expensive detectors once per worker."""
+    global _session
+    _session = TrackingSession(load_config())
+
+
+def run_review(review_id: str, input_path: str, tracked: bool = False, budget: Optional[float] = None,
+               threads: Optional[int] = None):
+    if threads:
+        apply_thread_limits(threads)
+    process_review(review_id, input_path, tracked=tracked, session=_session, budget=budget, threads=threads)
+
+
+def _ready() -> bool:
+    return _session is not None
+
+
+class ReviewProcessPool:
+    def __init__(self, workers: int, start_method: str = "spawn", cores: int = 0, max_threads: int = 0):
+        self.workers = workers
+        self.governor = ThreadGovernor(workers, cores, max_threads)
+        self._context = multiprocessing.get_context(start_method)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._lock = threading.Lock()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Inherited by the worker processes, which load BLAS/OpenMP after this
+        export_pool_limits(self.governor.pool_limit())
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=self._context, initializer=init_worker,
+        )
+        # Workers are spawned on demand; submit one probe per worker so all of
+        # them load their models now rather than on the first reviews
+        for _ in range(self.workers):
+            executor.submit(_ready)
+        return executor
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __call__(self, review_id: str, input_path: str, **options):
+        """Run one review in a worker and wait for it (called from a queue worker thread)."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            executor = self._executor
+
+        future = None
+        threads = self.governor.acquire()
+        try:
+            with self._lock:
+                future = executor.submit(run_review, review_id, input_path, threads=threads, **options)
+                self._inflight.setdefault(executor, set()).add(future)
+            return future.result()
+        except StageTimeout as e:
+            if e.abandoned:
+                self._retire(executor, future)
+            raise
+        except BrokenProcessPool:
+            # A worker died (segfault, OOM kill...); replace the whole pool
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = self._new_executor()
+                self._inflight.pop(executor, None)
+            executor.shutdown(wait=False)
+            raise
+        finally:
+            self.governor.release(threads)
+            with self._lock:
+                self._inflight.get(executor, set()).discard(future)
+
+    def _retire(self, executor: ProcessPoolExecutor, future: Future):
+        """Replace the pool, then kill the old workers once their other reviews are done."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = self._new_executor()
+            others = [f for f in self._inflight.pop(executor, set()) if f is not future]
+
+        def reap():
+            wait(others)
+            # The abandoned stage thread keeps its process alive past shutdown
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False)
+
+        threading.Thread(target=reap, name="review-pool-reaper", daemon=True).start()
+
+
+def build_review_queue(workers: int = REVIEW_WORKERS) -> Tuple[ReviewQueue, Optional[ReviewProcessPool]]:
+    """
+    The configured job queue and, with the process executor, the warm pool
+    its worker threads drive (each queue worker thread drives one worker
+    process). workers=0 gives a submit-only queue and no pool. Every state
+    change is recorded in the review's status.json.
+    """
+    pool = None
+    if workers > 0 and REVIEW_EXECUTOR == "process":
+        pool = ReviewProcessPool(workers, REVIEW_START_METHOD, REVIEW_CPU_CORES, REVIEW_MAX_THREADS_PER_REVIEW)
+    elif workers > 0:
+        # Reviews share this process; OpenCV and BLAS limits are process-wide, so give each its fair share
+        apply_thread_limits(ThreadGovernor(workers, REVIEW_CPU_CORES).share)
+    queue = ReviewQueue(
+        REVIEW_QUEUE_DB, pool or process_review,
+        workers=workers,
+        max_pending=REVIEW_QUEUE_LIMIT,
+        default_duration=REVIEW_SECONDS_ESTIMATE,
+        max_attempts=REVIEW_MAX_ATTEMPTS,
+        live_workers=REVIEW_LIVE_WORKERS,
+        max_batch_pending=REVIEW_BATCH_QUEUE_LIMIT,
+        lease_seconds=REVIEW_LEASE_SECONDS,
+        poll_interval=REVIEW_POLL_INTERVAL,
+        name=REVIEW_NODE_NAME,
+        journal_mode=REVIEW_QUEUE_JOURNAL,
+        on_state=ReviewStates(REVIEW_DIR).record,
+    )
+    return queue, pool
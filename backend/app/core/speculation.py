@@ -0,0 +1,91 @@
+"""
+Speculative provisional decisions.
+
+Trajectory analysis extrapolates from the first z-drop of the tracked ball
+(the impact point), which usually falls in the middle of the clip, and the
+tracker never revises the output of a frame it has passed. SpeculativeDecision
+watches tracking progress and, once the ball has been followed `margin`
+frames past that point, hands the tracked prefix to the review's
+"provisional" stage. That stage runs trajectory, edge and decision on the
+prefix while tracking goes on, and writes the call to provisional.json so
+clients can show it straight away. The final decision, made on the whole
+clip, confirms or revises it in decision.json.
+"""
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+PROVISIONAL_FILE = "provisional.json"
+PROVISIONAL_TRACKING_OUTPUT = "ball_tracking_provisional.json"
+
+
+class SpeculativeDecision:
+    def __init__(self, margin: int = 10):
+        """
+        Args:
+            margin: Frames with a tracked ball needed past the z-drop before speculating
+        """
+        self.margin = margin
+        self.drop_frame = None
+        self._prefix: Optional[List[Dict[str, Any]]] = None
+        self._ready = threading.Event()
+        self._scanned = 0
+        self._previous_z = None
+        self._tracked_after = 0
+
+    def observe(self, outputs: List[Dict[str, Any]]):
+        """Tracking progress: all outputs so far. Only the new ones are scanned."""
+        if self._ready.is_set():
+            return
+        for output in outputs[self._scanned:]:
+            position = (output.get("ball_trajectory") or {}).get("current_position")
+            if not position:
+                continue
+            if self.drop_frame is not None:
+                self._tracked_after += 1
+                continue
+            # Same test as the trajectory module's find_first_z_drop
+            if self._previous_z is not None and position["z"] < self._previous_z:
+                self.drop_frame = output["frame_id"]
+            self._previous_z = position["z"]
+        self._scanned = len(outputs)
+
+        if self.drop_frame is not None and self._tracked_after >= self.margin:
+            self._prefix = list(outputs)
+            self._ready.set()
+
+    def close(self):
+        """Tracking ended; without a prefix by now there is nothing to speculate on."""
+        self._ready.set()
+
+    def wait(self, check: Optional[Callable[[], None]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Block until a prefix is ready or tracking ended; check is called while waiting."""
+        while not self._ready.wait(1.0):
+            if check is not None:
+                check()
+        return self._prefix
+
+
+def compare(provisional: Optional[Dict[str, Any]], decision: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The provisional call marked "confirmed" or "revised" by the final decision, for decision.json."""
+    if not provisional:
+        return None
+    status = "confirmed" if provisional["decision"] == decision else "revised"
+    return {**provisional, "status": status}
+
+
+def save_provisional(review_path: str, result: Dict[str, Any]):
+    path = os.path.join(review_path, PROVISIONAL_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+
+
+def load_provisional(review_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(review_path, PROVISIONAL_FILE), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,235 @@
+"""
+Dependency graph scheduler for the review pipeline.
+
+Each stage declares the stages whose outputs it consumes. Stages run on a
+thread pool as soon as their inputs are ready, so independent work (audio
+edge detection next to vision tracking, trajectory analysis next to the
+edge check) overlaps. Per-stage timings and the critical path are recorded
+after each run.
+
+A stage may also take "lazy" inputs: it receives a zero-argument callable
+instead of the value, and only blocks on that stage when it calls it. This
+lets a consumer start early and wait for a late dependency only at the
+point where it is needed.
+
+With a CheckpointStore (core/checkpoints.py) every stage output is persisted
+when the stage completes, and stages completed by an earlier run are loaded
+instead of executed, so a failed review resumes from its first incomplete
+stage.
+
+With a CancelToken (core/cancellation.py) no stage starts once the review is
+cancelled, and each stage gets a timeout. Stages that check the token stop
+themselves; a stage still running `grace` seconds past its timeout is
+abandoned: the run fails with StageTimeout without waiting for its thread.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.checkpoints import CheckpointStore
+from core.cancellation import CancelToken, ReviewCancelled, StageTimeout
+
+
+class StageError(Exception):
+    """A stage raised; `stage` names the stage where the failure started."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+    def __reduce__(self):
+        # Keep both fields when the error crosses a process boundary
+        return StageError, (self.stage, self.error)
+
+
+class StageGraph:
+    def __init__(self, token: Optional[CancelToken] = None, timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: Optional[float] = None, grace: float = 10.0):
+        """
+        Args:
+            token: Cancellation token checked before each stage
+            timeouts: Seconds per stage name; default_timeout for the others
+            grace: Seconds a stage may overrun its timeout before it is abandoned
+        """
+        self.stages: Dict[str, Tuple[Callable[..., Any], List[str], List[str]]] = {}
+        self.artifacts: Dict[str, Optional[str]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.critical_path: List[str] = []
+        self.reused: List[str] = []
+        self.abandoned: List[str] = []
+
+        self.token = token
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.grace = grace
+        self._started: Dict[str, float] = {}
+        self._settle_lock = threading.Lock()
+
+    def add(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (), lazy: Sequence[str] = (),
+            artifact: Optional[str] = None):
+        """
+        Register a stage. func is called with the outputs of `inputs` followed
+        by one callable per `lazy` input, in declaration order. artifact names
+        the checkpoint file (relative to the review directory) if the default
+        stages/<name>.json should not be used.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        self.stages[name] = (func, list(inputs), list(lazy))
+        self.artifacts[name] = artifact
+
+    def _order(self) -> List[str]:
+        """Topological order over all (eager and lazy) dependencies."""
+        remaining = {}
+        for name, (_, inputs, lazy) in self.stages.items():
+            for dep in inputs + lazy:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+            remaining[name] = set(inputs + lazy)
+
+        order = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def run(self, checkpoints: Optional[CheckpointStore] = None) -> Dict[str, Any]:
+        """
+        Run every stage and return their outputs by name. Raises StageError,
+        or ReviewCancelled / StageTimeout when the review is stopped.
+
+        With checkpoints, completed stages are loaded and new outputs saved.
+        """
+        order = self._order()
+        self.timings = {}
+        self.critical_path = []
+        self.reused = []
+        self.abandoned = []
+        self._started = {}
+        origin = time.perf_counter()
+        # Stage outputs are settled by the stage thread, or by run() when the stage is abandoned
+        futures: Dict[str, Future] = {name: Future() for name in order}
+
+        # One thread per stage: a stage blocked on its inputs never starves another
+        pool = ThreadPoolExecutor(max_workers=max(1, len(order)), thread_name_prefix="stage")
+        for name in order:
+            pool.submit(self._stage_thread, name, futures, origin, checkpoints)
+        while True:
+            pending = [future for future in futures.values() if not future.done()]
+            if not pending:
+                break
+            wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            self._abandon_overdue(futures)
+        # Never wait for an abandoned stage's thread
+        pool.shutdown(wait=not self.abandoned)
+
+        self.critical_path = self._critical_path()
+        # Dependents re-raise their input's StageError, so the first one in order is the root cause
+        for name in order:
+            error = futures[name].exception()
+            if error is not None:
+                raise error
+        return {name: futures[name].result() for name in order}
+
+    def _timeout(self, name: str) -> Optional[float]:
+        return self.timeouts.get(name, self.default_timeout)
+
+    def _settle(self, future: Future, value: Any = None, error: Optional[BaseException] = None):
+        with self._settle_lock:
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+    def _stage_thread(self, name: str, futures: Dict[str, Future], origin: float,
+                      checkpoints: Optional[CheckpointStore]):
+        try:
+            value = self._run_stage(name, futures, origin, checkpoints)
+        except BaseException as e:
+            self._settle(futures[name], error=e)
+        else:
+            self._settle(futures[name], value)
+
+    def _abandon_overdue(self, futures: Dict[str, Future]):
+        """Fail stages that kept running past timeout + grace without checking the token."""
+        now = time.monotonic()
+        for name, started in list(self._started.items()):
+            timeout = self._timeout(name)
+            if not timeout or futures[name].done() or now - started <= timeout + self.grace:
+                continue
+            print(f"[ERROR] Stage '{name}' still running {now - started:.0f}s after start, abandoning it")
+            self.abandoned.append(name)
+            self._settle(futures[name], error=StageTimeout(name, timeout, abandoned=True))
+
+    def _run_stage(self, name: str, futures: Dict[str, Future], origin: float,
+                   checkpoints: Optional[CheckpointStore]) -> Any:
+        func, inputs, lazy = self.stages[name]
+        artifact = self.artifacts[name]
+        if checkpoints is not None and checkpoints.is_complete(name):
+            try:
+                value = checkpoints.load(name, artifact)
+                self.reused.append(name)
+                return value
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Checkpoint of stage '{name}' unreadable, re-running it: {e}")
+
+        args = [futures[dep].result() for dep in inputs]
+        args += [futures[dep].result for dep in lazy]
+
+        if self.token is not None:
+            self.token.enter_stage(name, None)
+            self.token.check()
+            self.token.enter_stage(name, self._timeout(name))
+        self._started[name] = time.monotonic()
+
+        start = time.perf_counter()
+        try:
+            value = func(*args)
+            if checkpoints is not None:
+                checkpoints.save(name, value, artifact)
+            return value
+        except (StageError, ReviewCancelled, StageTimeout):
+            raise
+        except Exception as e:
+            raise StageError(name, e) from e
+        finally:
+            end = time.perf_counter()
+            self.timings[name] = {"start": start - origin, "end": end - origin, "duration": end - start}
+
+    def _critical_path(self) -> List[str]:
+        """Walk back from the last stage to finish through the input that finished last."""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n]["end"])
+        path = [name]
+        while True:
+            _, inputs, lazy = self.stages[name]
+            deps = [dep for dep in inputs + lazy if dep in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda d: self.timings[d]["end"])
+            path.append(name)
+        return path[::-1]
+
+    def report(self) -> Dict[str, Any]:
+        """Timings of the last run, suitable for json.dump."""
+        return {
+            "stages": {
+                name: {key: round(value, 3) for key, value in timing.items()}
+                for name, timing in self.timings.items()
+            },
+            "critical_path": self.critical_path,
+            "reused": self.reused,
+            "abandoned": self.abandoned,
+            "total": round(max((t["end"] for t in self.timings.values()), default=0.0), 3),
+        }
@@ -0,0 +1,87 @@
+"""
+CPU thread budgets for concurrent reviews.
+
+OpenCV (bilateralFilter, cvtColor, resize), NumPy/SciPy's BLAS and OpenMP
+(noisereduce) each size their thread pool to every core of the machine, in
+every worker process. With several reviews running at once that adds up to
+many more runnable threads than cores, and throughput drops below that of
+fewer reviews. ThreadGovernor splits the cores between the reviews running
+in the pool instead: a starting review always gets its fair share
+(cores / workers) and, while other workers are idle, more, up to
+max_per_review, so a lone review still uses the machine and a full pool
+stays close to one thread per core. Budgets are fixed when a review starts,
+so reviews that began on an idle pool keep their larger budget while it
+fills up; max_per_review bounds that overlap. The worker applies its budget
+with apply_thread_limits() for the duration of the review.
+
+BLAS and OpenMP pools are sized when the library loads, so their limit is
+exported to the environment of worker processes before they start; with
+threadpoolctl installed it is also adjusted per review. MediaPipe's graph
+executor cannot be sized from its Python API; the cost of pose is bounded by
+the quality presets instead (core/quality.py).
+"""
+import os
+import threading
+
+import cv2
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # optional; BLAS pools then keep the size exported at start
+    threadpool_limits = None
+
+# Read by OpenBLAS, MKL, Accelerate, numexpr and OpenMP when they load
+POOL_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity, e.g. in containers)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def export_pool_limits(threads: int):
+    """Cap BLAS/OpenMP pools of processes started from now on; values set by the operator win."""
+    for name in POOL_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+
+
+def apply_thread_limits(threads: int):
+    """Limit OpenCV and, if threadpoolctl is available, BLAS/OpenMP in this process."""
+    cv2.setNumThreads(threads)
+    if threadpool_limits is not None:
+        threadpool_limits(limits=threads)
+
+
+class ThreadGovernor:
+    def __init__(self, workers: int, cores: int = 0, max_per_review: int = 0):
+        """
+        Args:
+            workers: Reviews that may run at once
+            cores: Cores to share; 0 for all available
+            max_per_review: Most threads one review gets; 0 for no cap beyond the cores
+        """
+        self.cores = cores or available_cores()
+        self.share = max(1, self.cores // max(1, workers))
+        self.max_per_review = max(self.share, max_per_review or self.cores)
+        self.allocated = 0
+        self._lock = threading.Lock()
+
+    def pool_limit(self) -> int:
+        """BLAS/OpenMP pool size to export to worker processes."""
+        # Without threadpoolctl the pools cannot follow the per-review budget
+        return self.max_per_review if threadpool_limits is not None else self.share
+
+    def acquire(self) -> int:
+        """Thread budget of a review starting now; return it with release()."""
+        with self._lock:
+            threads = max(self.share, min(self.max_per_review, self.cores - self.allocated))
+            self.allocated += threads
+            return threads
+
+    def release(self, threads: int):
+        with self._lock:
+            self.allocated -= threads
@@ -0,0 +1,102 @@
+"""
+Video container input for reviews.
+
+Phones already record H.264, so a review can be uploaded as the recorded
+clip itself. Frames are decoded lazily with cv2.VideoCapture and the audio
+track is extracted to raw PCM for edge detection.
+"""
+import os
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import cv2
+from pydub import AudioSegment
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".3gp", ".avi", ".mkv")
+
+# Audio format expected by the edge detection pipeline
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_SAMPLE_WIDTH = 2
+AUDIO_CHANNELS = 1
+
+
+def is_video(input_path: str) -> bool:
+    return os.path.splitext(input_path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def iter_video_frames(video_path: str,
+                      frame_range: Optional[Tuple[int, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Decode a video file one frame at a time.
+
+    Yields normalised frame entries (see core.frame_store.iter_frame_entries)
+    carrying the decoded BGR image under "image" instead of encoded bytes.
+    Frames before frame_range are grabbed without being retrieved, and
+    decoding stops after its last frame.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Failed to open video {video_path}")
+
+    first, last = frame_range if frame_range else (0, None)
+    try:
+        frame_id = 0
+        while last is None or frame_id <= last:
+            if frame_id < first:
+                if not cap.grab():
+                    break
+                frame_id += 1
+                continue
+            ok, image = cap.read()
+            if not ok:
+                break
+            yield {
+                "frameId": frame_id,
+                "timestamp": cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0,
+                "frameBytes": None,
+                "image": image,
+                "audioBytes": None,
+                "cameraPosition": None,
+                "cameraRotation": None,
+            }
+            frame_id += 1
+    finally:
+        cap.release()
+
+
+def video_time_span(video_path: str, frame_range: Tuple[int, int]) -> Optional[Tuple[float, float]]:
+    """Capture times (seconds) of the first and last frame of frame_range, from the container frame rate."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0.0
+    finally:
+        cap.release()
+    if not fps or fps <= 0:
+        return None
+    return frame_range[0] / fps, frame_range[1] / fps
+
+
+def video_frame_count(video_path: str) -> int:
+    """Number of frames according to the container (may be approximate for some codecs)."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    finally:
+        cap.release()
+
+
+def extract_audio_track(video_path: str) -> Optional[bytes]:
+    """
+    Extract the audio track as mono 16-bit PCM at 16 kHz.
+
+    Returns None when the container has no audio track.
+    """
+    try:
+        audio = AudioSegment.from_file(video_path)
+    except Exception as e:
+        print(f"[WARN] No audio track extracted from {video_path}: {e}")
+        return None
+
+    audio = (audio.set_channels(AUDIO_CHANNELS)
+                  .set_frame_rate(AUDIO_SAMPLE_RATE)
+                  .set_sample_width(AUDIO_SAMPLE_WIDTH))
+    return audio.raw_data or None
@@ -1,76 +1,125 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, WebSocket, WebSocketDisconnect, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from typing import List, Literal, Optional
 from uuid import uuid4
-import os, json, base64, threading
-from core.InputModel import VideoAnalysisInput
-
-from modules.ball_tracking.src.main import ball_tracking
-from modules.edge_detection.router import edge_detection
-from modules.trajectory_analysis.tests.work import run_analysis
-from modules.decision_making.FinalDecision import final_decision
-from modules.stream_analysis.stream_analysis import augmented_stream
+import os, json, base64, shutil
+from core.InputModel import VideoAnalysisInput, UploadMetadata, FrameData, RoiHints, UploadCreate, BatchCreate
+from core.frame_store import (
+    save_part, frame_file_name, audio_file_name, audio_track_file_name,
+    write_frame_index, write_roi_hints, store_review_input,
+)
+from core.live_capture import LiveCapture
+from core.video_source import VIDEO_EXTENSIONS
+from core.resumable_upload import ResumableUpload, UploadError, UploadTooLarge
+from core.review_queue import QueueFull, LIVE
+from core.review_workers import build_review_queue
+from core.config import REVIEW_DIR, REVIEW_IMPORT_DIR, REVIEW_CACHE_DIR, REVIEW_CACHE_MAX_BYTES, REVIEW_CACHE_MAX_AGE
+from core.checkpoints import CheckpointStore
+from core.cancellation import request_cancel, clear_cancel
+from core.batches import BatchStore, resolve_import_path
+from core.review_state import ReviewStates, recover_reviews, COMPLETE
+from core.result_cache import ResultCache, review_key
+from core.speculation import load_provisional
 
 app = FastAPI()
 
-REVIEW_DIR = "reviews/"
 os.makedirs(REVIEW_DIR, exist_ok=True)  # Ensure reviews directory exists
 
-# Background task for processing review
-def process_review(review_id: str, input_path):
-    try:
-        review_path = os.path.join(REVIEW_DIR, review_id + "/")
-        ball_tracking_output_path = os.path.join(review_path, "ball_tracking_output.json")
+# Reviews are processed by a fixed worker pool fed from a persistent queue;
+# live reviews always go first and have workers reserved for them.
+# With REVIEW_WORKERS=0 this server only accepts reviews, and standalone
+# workers (python worker.py) sharing the queue database process them.
+review_queue, review_pool = build_review_queue()
 
-        module = 1
+# Priority class of a submission: "live" on-field review or "batch" re-analysis
+Priority = Literal["live", "batch"]
 
-        # Module 2: Ball Tracking
-        ball_data = ball_tracking(
-            input_path, ball_tracking_output_path
-        )
+batch_store = BatchStore(REVIEW_DIR)
+review_states = ReviewStates(REVIEW_DIR)
+result_cache = ResultCache(REVIEW_CACHE_DIR, REVIEW_CACHE_MAX_BYTES, REVIEW_CACHE_MAX_AGE)
 
-        module = 2
 
-        # Module 3: Edge Detection
-        edge_result = edge_detection(ball_data, input_path)
+@app.on_event("startup")
+def start_review_queue():
+    if review_pool is not None:
+        review_pool.start()
+    # Reviews interrupted by a crash whose job was lost resume from their checkpoints
+    recover_reviews(REVIEW_DIR, review_queue, review_states)
+    review_queue.start()
 
-        module = 3
 
-        # Module 4: Trajectory Analysis
-        trajectory_data, hit  = run_analysis(ball_tracking_output_path)
+@app.on_event("shutdown")
+def stop_review_queue():
+    review_queue.stop(timeout=5)
+    if review_pool is not None:
+        review_pool.shutdown()
 
-        module = 4
 
-        # Module 5: Decision Making
-        decision = final_decision(
-            ball_data, edge_result, hit
-        )
+def _queue_full(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many reviews pending, try again later",
+        headers={"Retry-After": str(retry_after)},
+    )
 
-        module = 5
 
-        # Module 6: Stream Analysis
-        result_video = augmented_stream(
-            input_path, ball_data, decision
-        )
+def _reject_if_full(priority: str = LIVE, count: int = 1):
+    """Refuse a submission (of count reviews) before its payload is stored."""
+    try:
+        review_queue.check_capacity(priority, count)
+    except QueueFull as e:
+        raise _queue_full(e.retry_after)
 
-        module = 6
 
-        # Save result video
-        video_path = os.path.join(review_path, "video.txt")
-        with open(video_path, "w") as vf:
-            vf.write(result_video)
+def _budget_options(budget: Optional[float]) -> dict:
+    """Job options for a client-supplied latency budget (seconds); the server default applies otherwise."""
+    return {"budget": budget} if budget and budget > 0 else {}
 
-        # Save decision
-        with open(os.path.join(review_path, "decision.json"), "w") as df:
-            json.dump({"decision": decision}, df)
 
-        print(f"Review {review_id} completed successfully")
+def _enqueue_review(review_id: str, input_path: str, budget: Optional[float] = None, priority: str = LIVE):
+    """Queue a stored review; on backpressure its files are removed and 429 is returned."""
+    try:
+        review_queue.submit(review_id, input_path, priority=priority, **_budget_options(budget))
+    except QueueFull as e:
+        shutil.rmtree(os.path.join(REVIEW_DIR, review_id), ignore_errors=True)
+        raise _queue_full(e.retry_after)
 
-    except Exception as e:
-        print(f"[ERROR] Processing failed for {review_id}: {e} (module={module})")
 
+def _reuse_cached(review_id: str, input_path: str, budget: Optional[float] = None) -> dict:
+    """
+    Complete a stored review with the cached result of an identical earlier
+    submission (see core/result_cache.py); on a miss its key is kept so the
+    result is cached once it completes. Returns the cache fields of the
+    submit response.
+    """
+    if not result_cache.enabled:
+        return {"cache_hit": False}
+    review_path = os.path.join(REVIEW_DIR, review_id)
+    try:
+        key = review_key(input_path, budget)
+        source_id = result_cache.restore(key, review_path)
+        if source_id is None:
+            result_cache.remember(review_path, key)
+            return {"cache_hit": False}
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Result cache skipped for {review_id}: {e}")
+        return {"cache_hit": False}
+
+    review_states.record(review_id, COMPLETE, {"input_path": input_path, "cached_from": source_id})
+    return {"cache_hit": True, "cached_from": source_id}
 
+# Every submission accepts an optional latency budget in seconds; processing
+# quality is lowered as needed to meet it (see core/quality.py). Stored
+# submissions also take a priority class, "live" (default) or "batch".
+# Responses carry cache_hit: true (and cached_from, the review whose result was
+# reused) when an identical delivery was already reviewed; the review is then
+# complete straight away.
 @app.post("/submit-review")
-async def submit_review(input_data: VideoAnalysisInput):
+async def submit_review(input_data: VideoAnalysisInput, budget: Optional[float] = Query(default=None, gt=0),
+                        priority: Priority = Query(default=LIVE)):
+    # Stored before the queue is checked: a resubmission served from the cache
+    # completes even while the queue is full (_enqueue_review answers 429 otherwise)
     try:
         review_id = str(uuid4())
         review_path = os.path.join(REVIEW_DIR, review_id+ "/")
@@ -81,15 +130,361 @@ async def submit_review(input_data: VideoAnalysisInput):
         with open(input_path, "w") as f:
             f.write(input_data.json())
 
-        # Start background processing
-        threading.Thread(target=process_review, args=(review_id, input_path)).start()
+        # Queue for background processing, unless the same delivery was reviewed before
+        cache = await run_in_threadpool(_reuse_cached, review_id, input_path, budget)
+        if not cache["cache_hit"]:
+            _enqueue_review(review_id, input_path, budget, priority)
 
-        return {"review_id": review_id}
+        return {"review_id": review_id, **cache}
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Submit error: {e}")
+
+
+# Binary upload: raw JPEG parts (and optional raw PCM parts, or one continuous
+# PCM track) instead of base64 JSON.
+# Declared sync so FastAPI runs it in the threadpool while parts are copied to disk.
+@app.post("/submit-review/upload")
+def submit_review_upload(
+    frames: List[UploadFile] = File(...),
+    audio: List[UploadFile] = File(default=[]),
+    audio_track: Optional[UploadFile] = File(default=None),
+    sample_rate: int = Form(default=16000),
+    audio_start: float = Form(default=0.0),
+    metadata: Optional[str] = Form(default=None),
+    budget: Optional[float] = Form(default=None, gt=0),
+    priority: Priority = Form(default=LIVE),
+):
+    try:
+        upload_meta = UploadMetadata.model_validate_json(metadata) if metadata else None
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid metadata: {e}")
+    frame_meta = upload_meta.frames if upload_meta else None
+    roi_hints = upload_meta.roiHints.model_dump() if upload_meta and upload_meta.roiHints else None
+
+    if frame_meta is not None and len(frame_meta) != len(frames):
+        raise HTTPException(
+            status_code=422,
+            detail=f"metadata lists {len(frame_meta)} frames but {len(frames)} frame parts were sent"
+        )
+    # Frame files are named after the frame ID, so a repeated ID would overwrite a frame
+    if frame_meta is not None:
+        seen, duplicates = set(), set()
+        for meta in frame_meta:
+            (duplicates if meta.frameId in seen else seen).add(meta.frameId)
+        if duplicates:
+            raise HTTPException(status_code=422, detail=f"Duplicate frameIds in metadata: {sorted(duplicates)}")
+
+    try:
+        review_id = str(uuid4())
+        review_path = os.path.join(REVIEW_DIR, review_id + "/")
+        os.makedirs(review_path, exist_ok=True)
+
+        zero = {"x": 0.0, "y": 0.0, "z": 0.0}
+        entries = []
+        for idx, part in enumerate(frames):
+            meta = frame_meta[idx] if frame_meta else None
+            frame_id = meta.frameId if meta else idx
+
+            frame_file = frame_file_name(frame_id)
+            save_part(part.file, os.path.join(review_path, frame_file))
+
+            audio_file = None
+            if idx < len(audio):
+                audio_file = audio_file_name(frame_id)
+                save_part(audio[idx].file, os.path.join(review_path, audio_file))
+
+            entries.append({
+                "frameId": frame_id,
+                "timestamp": meta.timestamp if meta else None,
+                "frameFile": frame_file,
+                "audioFile": audio_file,
+                "cameraPosition": meta.cameraPosition.model_dump() if meta else zero,
+                "cameraRotation": meta.cameraRotation.model_dump() if meta else zero,
+            })
+
+        track = None
+        if audio_track is not None:
+            track_file = audio_track_file_name()
+            save_part(audio_track.file, os.path.join(review_path, track_file))
+            track = {
+                "file": track_file,
+                "sampleRate": sample_rate,
+                "channels": 1,
+                "sampleWidth": 2,
+                "startTimestamp": audio_start,
+            }
+
+        input_path = write_frame_index(review_path, entries, audio_track=track, roi_hints=roi_hints)
+
+        # Queue for background processing, unless the same delivery was reviewed before
+        cache = _reuse_cached(review_id, input_path, budget)
+        if not cache["cache_hit"]:
+            _enqueue_review(review_id, input_path, budget, priority)
+
+        return {"review_id": review_id, "frames": len(entries), **cache}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Submit error: {e}")
+
+
+# Video upload: the recorded H.264 clip is stored as-is and decoded lazily by the modules.
+@app.post("/submit-review/video")
+def submit_review_video(
+    video: UploadFile = File(...),
+    roi_hints: Optional[str] = Form(default=None),
+    budget: Optional[float] = Form(default=None, gt=0),
+    priority: Priority = Form(default=LIVE),
+):
+    ext = os.path.splitext(video.filename or "")[1].lower() or ".mp4"
+    if ext not in VIDEO_EXTENSIONS:
+        raise HTTPException(status_code=415, detail=f"Unsupported video container: {ext}")
+
+    try:
+        hints = RoiHints.model_validate_json(roi_hints) if roi_hints else None
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid roi_hints: {e}")
+
+    try:
+        review_id = str(uuid4())
+        review_path = os.path.join(REVIEW_DIR, review_id + "/")
+        os.makedirs(review_path, exist_ok=True)
+
+        input_path = os.path.join(review_path, "input" + ext)
+        size = save_part(video.file, input_path)
+        if hints:
+            write_roi_hints(review_path, hints.model_dump())
+
+        # Queue for background processing, unless the same clip was reviewed before
+        cache = _reuse_cached(review_id, input_path, budget)
+        if not cache["cache_hit"]:
+            _enqueue_review(review_id, input_path, budget, priority)
+
+        return {"review_id": review_id, "bytes": size, **cache}
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Submit error: {e}")
 
 
+# Resumable uploads (see core/resumable_upload.py for the protocol).
+# The upload id is the review id; chunks are written into the review directory.
+# File and state I/O runs in the threadpool so it doesn't block the event loop.
+def _get_upload(upload_id: str) -> ResumableUpload:
+    upload = ResumableUpload(os.path.join(REVIEW_DIR, upload_id))
+    if not upload.exists():
+        raise HTTPException(status_code=404, detail=f"Unknown upload {upload_id}")
+    return upload.load()
+
+
+@app.post("/uploads")
+async def create_upload(params: UploadCreate):
+    review_id = str(uuid4())
+    upload = ResumableUpload(os.path.join(REVIEW_DIR, review_id))
+    try:
+        await run_in_threadpool(upload.create, params.length, params.chunkSize, params.format)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"upload_id": review_id, **upload.status()}
+
+
+@app.put("/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(upload_id: str, index: int, request: Request):
+    upload = await run_in_threadpool(_get_upload, upload_id)
+    try:
+        start, end = upload.chunk_range(index)
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    # Write the body at its offset as it arrives; nothing is buffered beyond one read
+    offset = start
+    async for piece in request.stream():
+        if offset + len(piece) > end:
+            raise HTTPException(status_code=400, detail=f"Chunk {index} larger than {end - start} bytes")
+        await run_in_threadpool(upload.write_at, offset, piece)
+        offset += len(piece)
+
+    if offset != end:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} incomplete: got {offset - start} of {end - start} bytes")
+
+    # Serialized with concurrent chunk uploads of the same upload (see core/resumable_upload.py)
+    await run_in_threadpool(upload.commit_chunk, index)
+    return upload.status()
+
+
+@app.get("/uploads/{upload_id}")
+async def get_upload_status(upload_id: str):
+    upload = await run_in_threadpool(_get_upload, upload_id)
+    return upload.status()
+
+
+@app.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, budget: Optional[float] = Query(default=None, gt=0),
+                          priority: Priority = Query(default=LIVE)):
+    upload = await run_in_threadpool(_get_upload, upload_id)
+    try:
+        input_path = await run_in_threadpool(upload.finalize)
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    # Queue for background processing, unless the same delivery was reviewed before
+    cache = await run_in_threadpool(_reuse_cached, upload_id, input_path, budget)
+    if not cache["cache_hit"]:
+        try:
+            _reject_if_full(priority)
+        except HTTPException:
+            # Back to an unfinalized upload so a rejected client can simply retry finalize
+            await run_in_threadpool(upload.reopen)
+            raise
+        review_queue.submit(upload_id, input_path, force=True, priority=priority, **_budget_options(budget))
+
+    return {"review_id": upload_id, **cache}
+
+
+# Live capture: the app streams frames while the delivery is being recorded.
+# Protocol (JSON text messages):
+#   server -> {"event": "session", "review_id": ...} on connect
+#             (or {"event": "error", "retry_after": ...} and close 1013 when the queue is full)
+#   client -> optional {"event": "hints", "roiHints": RoiHints} before the first frame
+#   client -> one FrameData object per captured frame
+#   server -> {"event": "ack", "frameId": ...}
+#   client -> {"event": "end"} once the delivery is over
+#   server -> {"event": "complete", "review_id": ..., "frames": ...} then closes
+# The latency budget can be passed as a query parameter: /ws/review?budget=20
+@app.websocket("/ws/review")
+async def live_review(websocket: WebSocket):
+    await websocket.accept()
+
+    try:
+        budget = float(websocket.query_params.get("budget", 0))
+    except ValueError:
+        budget = None
+
+    try:
+        review_queue.check_capacity()
+    except QueueFull as e:
+        await websocket.send_json({"event": "error", "detail": "Too many reviews pending, try again later",
+                                   "retry_after": e.retry_after})
+        await websocket.close(code=1013)  # Try Again Later
+        return
+
+    review_id = str(uuid4())
+    review_path = os.path.join(REVIEW_DIR, review_id + "/")
+    os.makedirs(review_path, exist_ok=True)
+
+    # Detector construction (MediaPipe graph etc.) is slow; keep it off the event loop
+    live = await run_in_threadpool(LiveCapture, review_id, review_path)
+    live.start()
+    await websocket.send_json({"event": "session", "review_id": review_id})
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError as e:
+                await websocket.send_json({"event": "error", "detail": f"Invalid JSON: {e}"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"event": "error", "detail": "Expected a JSON object"})
+                continue
+
+            if message.get("event") == "end":
+                break
+
+            if message.get("event") == "hints":
+                try:
+                    hints = RoiHints.model_validate(message.get("roiHints") or {})
+                except ValidationError as e:
+                    await websocket.send_json({"event": "error", "detail": f"Invalid hints: {e}"})
+                    continue
+                live.set_roi_hints(hints.model_dump())
+                continue
+
+            try:
+                frame = FrameData.model_validate(message)
+            except ValidationError as e:
+                await websocket.send_json({"event": "error", "detail": f"Invalid frame: {e}"})
+                continue
+
+            live.add_frame(frame)
+            await websocket.send_json({"event": "ack", "frameId": frame.frameId})
+
+    except WebSocketDisconnect:
+        # Delivery was never closed by the client; nothing to review
+        await run_in_threadpool(live.abort)
+        print(f"[WARN] Live review {review_id} disconnected before the delivery was closed")
+        return
+    except Exception as e:
+        # Stop the capture thread and drop the partial review, then tell the client if it is still there
+        await run_in_threadpool(live.abort)
+        print(f"[ERROR] Live review {review_id} failed: {e}")
+        try:
+            await websocket.send_json({"event": "error", "detail": f"Live review failed: {e}"})
+            await websocket.close(code=1011)  # Internal Error
+        except Exception:
+            pass
+        return
+
+    input_path = await run_in_threadpool(live.finish)
+
+    # Ball tracking is already done; queue the remaining modules
+    review_queue.submit(review_id, input_path, force=True, tracked=True, **_budget_options(budget))
+
+    await websocket.send_json({"event": "complete", "review_id": review_id, "frames": len(live.index)})
+    await websocket.close()
+
+
+# Resume a failed review from its first incomplete stage (see core/checkpoints.py)
+@app.post("/review/{review_id}/resume")
+async def resume_review(review_id: str):
+    review_path = os.path.join(REVIEW_DIR, review_id)
+    if os.path.exists(os.path.join(review_path, "decision.json")):
+        raise HTTPException(status_code=409, detail="Review already complete")
+
+    try:
+        # A cancelled review can be resumed too; drop its marker first
+        clear_cancel(review_path)
+        review_queue.requeue(review_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown review {review_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QueueFull as e:
+        raise _queue_full(e.retry_after)
+
+    return {"review_id": review_id, "completed_stages": CheckpointStore(review_path).completed()}
+
+
+# Cancel a queued or running review, e.g. a superseded or duplicate appeal.
+# A running review stops at its next frame; its files are kept so it can be resumed.
+@app.delete("/review/{review_id}")
+async def cancel_review(review_id: str):
+    review_path = os.path.join(REVIEW_DIR, review_id)
+    if os.path.exists(os.path.join(review_path, "decision.json")):
+        raise HTTPException(status_code=409, detail="Review already complete")
+    if not os.path.isdir(review_path):
+        raise HTTPException(status_code=404, detail=f"Unknown review {review_id}")
+
+    # Marker first, so a job claimed right now still sees it
+    request_cancel(review_path)
+    try:
+        state = review_queue.cancel(review_id)
+    except KeyError:
+        # Not queued yet (upload or live capture still in progress)
+        state = "cancelled"
+
+    return {"review_id": review_id, "status": "cancelling" if state == "running" else state}
+
+
+# Status is one of queued, running, complete, failed, timed_out, cancelled,
+# or receiving while an upload or live capture is still in progress.
 @app.get("/get-review/{review_id}")
 async def get_review_result(review_id: str):
     try:
@@ -98,7 +493,33 @@ async def get_review_result(review_id: str):
         video_file = os.path.join(review_path, "video.txt")
 
         if not os.path.exists(result_file):
-            return {"status": "processing"}
+            queued = review_queue.status(review_id)
+            if queued and queued["state"] == "queued":
+                return {
+                    "status": "queued",
+                    "priority": queued["priority"],
+                    "position": queued["position"],
+                    "estimated_wait": queued["estimated_wait"],
+                }
+            if queued and queued["state"] == "running":
+                # The provisional call, once tracking has passed the impact point (see core/speculation.py)
+                return {"status": "running", "attempts": queued["attempts"],
+                        "provisional": load_provisional(review_path)}
+            if queued and queued["state"] == "failed":
+                # Can be resumed with POST /review/{review_id}/resume
+                return {"status": "failed", "error": queued["error"], "attempts": queued["attempts"]}
+            if queued and queued["state"] == "timed_out":
+                return {"status": "timed_out", "error": queued["error"]}
+            if queued and queued["state"] == "cancelled":
+                return {"status": "cancelled"}
+
+            # Not in the queue (yet, or any more): fall back to the review's own record
+            status = review_states.load(review_id)
+            if status is not None:
+                return {"status": status["state"], **({"error": status["error"]} if "error" in status else {})}
+            if not os.path.isdir(review_path):
+                raise HTTPException(status_code=404, detail=f"Unknown review {review_id}")
+            return {"status": "receiving"}
 
         with open(result_file, "r") as rf:
             decision_data = json.load(rf)
@@ -109,8 +530,107 @@ async def get_review_result(review_id: str):
         return {
             "status": "complete",
             "decision": decision_data["decision"],
+            "delivery_window": decision_data.get("delivery_window"),
+            "quality": decision_data.get("quality"),
+            "provisional": decision_data.get("provisional"),
+            "cached_from": (review_states.load(review_id) or {}).get("cached_from"),
             "video": encoded_video
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Result fetch error: {e}")
+
+
+# Batch submission: many deliveries (inline and/or a manifest of files under
+# REVIEW_IMPORT_DIR) queued in one call. Every delivery becomes a review of its
+# own, processed by the shared warm workers; progress is polled per batch.
+@app.post("/batches")
+def submit_batch(batch: BatchCreate):
+    labels = batch.labels or []
+    if len(labels) > len(batch.deliveries):
+        raise HTTPException(status_code=422, detail="More labels than inline deliveries")
+    if not batch.deliveries and not batch.manifest:
+        raise HTTPException(status_code=422, detail="Batch has no deliveries")
+
+    # Validate the whole manifest before anything is stored
+    try:
+        manifest = [(resolve_import_path(REVIEW_IMPORT_DIR, item.path), item) for item in batch.manifest]
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid manifest entry {e}")
+
+    _reject_if_full(batch.priority, len(batch.deliveries) + len(manifest))
+
+    batch_id = str(uuid4())
+    items, jobs = [], []
+    try:
+        for idx, delivery in enumerate(batch.deliveries):
+            review_id = str(uuid4())
+            items.append({"review_id": review_id, "label": labels[idx] if idx < len(labels) else None,
+                          "source": "inline"})
+            review_path = os.path.join(REVIEW_DIR, review_id + "/")
+            os.makedirs(review_path, exist_ok=True)
+            # Decoded once into the binary frame store instead of a per-delivery input.json
+            input_path = store_review_input(review_path, delivery.model_dump())
+            jobs.append((review_id, input_path, _budget_options(batch.budget)))
+
+        for input_path, item in manifest:
+            review_id = str(uuid4())
+            items.append({"review_id": review_id, "label": item.label, "source": item.path})
+            # Outputs go to the review directory, the input is read in place
+            os.makedirs(os.path.join(REVIEW_DIR, review_id), exist_ok=True)
+            jobs.append((review_id, input_path, _budget_options(batch.budget)))
+
+        batch_store.create(batch_id, items)
+        review_queue.submit_many(jobs, batch_id, priority=batch.priority)
+
+    except Exception as e:
+        # Nothing was queued; drop what was stored
+        for item in items:
+            shutil.rmtree(os.path.join(REVIEW_DIR, item["review_id"]), ignore_errors=True)
+        if isinstance(e, QueueFull):
+            raise _queue_full(e.retry_after)
+        raise HTTPException(status_code=500, detail=f"Batch submit error: {e}")
+
+    return {"batch_id": batch_id, "review_ids": [item["review_id"] for item in items]}
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    batch = batch_store.load(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch {batch_id}")
+
+    states = review_queue.batch_states(batch_id)
+    progress = {}
+    deliveries = []
+    for item in batch["items"]:
+        review_id = item["review_id"]
+        result = {"review_id": review_id, "label": item["label"], "source": item["source"]}
+        result_file = os.path.join(REVIEW_DIR, review_id, "decision.json")
+        if os.path.exists(result_file):
+            with open(result_file, "r") as rf:
+                decision_data = json.load(rf)
+            # The overlay video is fetched per review with /get-review
+            result.update(status="complete", decision=decision_data["decision"],
+                          delivery_window=decision_data.get("delivery_window"))
+        else:
+            state = states.get(review_id, {"state": "queued"})
+            # "done" without a decision file only lasts until it is written
+            result["status"] = "running" if state["state"] in ("running", "done") else state["state"]
+            if state.get("error"):
+                result["error"] = state["error"]
+        progress[result["status"]] = progress.get(result["status"], 0) + 1
+        deliveries.append(result)
+
+    total = len(deliveries)
+    finished = sum(count for status, count in progress.items() if status not in ("queued", "running"))
+    return {
+        "batch_id": batch_id,
+        "total": total,
+        "finished": finished,
+        "percent": round(100.0 * finished / total, 1) if total else 100.0,
+        "progress": progress,
+        "deliveries": deliveries,
+    }
@@ -46,6 +46,11 @@ class BallTracker:
         self.air_resistance_coef = config.get("air_resistance", 0.1)
         self.frame_rate = config.get("frame_rate", 30)  # fps
         
+        # Time step between frames, taken from capture timestamps when available
+        self.max_dt = config.get("max_dt", 0.25)  # s, caps dt across gaps
+        self.last_timestamp = None
+        self.dt = 1.0 / self.frame_rate
+        
         # Kalman filter parameters
         self.use_kalman = config.get("use_kalman", True)
         if self.use_kalman:
@@ -71,6 +76,9 @@ class BallTracker:
         self.last_acceleration = None
         self.tracking_lost_frames = 0
         self.max_lost_frames = config.get("max_lost_frames", 10)
+        # Same budget in capture time, so high frame rates do not drop tracking sooner
+        self.max_lost_time = config.get("max_lost_time", self.max_lost_frames / self.frame_rate)
+        self.lost_time = 0.0
 
          # Red color ranges (0-10 and 170-180 in HSV)
         self.red_lower1 = np.array([0, 150, 150], dtype=np.uint8)
@@ -101,11 +109,25 @@ class BallTracker:
             [0, 0, 1, 0, 0, 0, 0, 0, 0]
         ], np.float32)
         
+        self._set_kalman_dt(1.0 / self.frame_rate)
+        
+        # Measurement noise covariance
+        self.kalman.measurementNoiseCov = np.eye(3, dtype=np.float32) * 0.1
+        
+        # Error covariance
+        self.kalman.errorCovPost = np.eye(9, dtype=np.float32)
+    
+    def _set_kalman_dt(self, dt: float):
+        """
+        Rebuild the Kalman transition for a time step of dt seconds.
+        
+        Args:
+            dt: Time since the previous frame
+        """
         # Transition matrix
         # x' = x + vx*dt + 0.5*ax*dt²
         # vx' = vx + ax*dt
         # ax' = ax
-        dt = 1.0 / self.frame_rate
         dt2 = 0.5 * dt * dt
         self.kalman.transitionMatrix = np.array([
             [1, 0, 0, dt, 0, 0, dt2, 0, 0],
@@ -119,14 +141,30 @@ class BallTracker:
             [0, 0, 0, 0, 0, 0, 0, 0, 1]
         ], np.float32)
         
-        # Process noise covariance
-        self.kalman.processNoiseCov = np.eye(9, dtype=np.float32) * 0.01
+        # Process noise covariance, scaled to the step so noise per second is constant
+        self.kalman.processNoiseCov = np.eye(9, dtype=np.float32) * 0.01 * (dt * self.frame_rate)
+    
+    def _advance_time(self, timestamp: Optional[float]) -> float:
+        """
+        Set the time step for the current frame from its capture timestamp.
         
-        # Measurement noise covariance
-        self.kalman.measurementNoiseCov = np.eye(3, dtype=np.float32) * 0.1
+        Args:
+            timestamp: Capture time of the frame in seconds, or None
+            
+        Returns:
+            Time step dt in seconds
+        """
+        if timestamp is None or self.last_timestamp is None or timestamp <= self.last_timestamp:
+            dt = 1.0 / self.frame_rate
+        else:
+            dt = min(timestamp - self.last_timestamp, self.max_dt)
+        if timestamp is not None:
+            self.last_timestamp = timestamp
         
-        # Error covariance
-        self.kalman.errorCovPost = np.eye(9, dtype=np.float32)
+        self.dt = dt
+        if self.use_kalman:
+            self._set_kalman_dt(dt)
+        return dt
     
     def detect_ball_color(self,frame:np.ndarray) -> Optional[Tuple[Tuple[int,int],int]]:
         """ Detect ball using color filtering
@@ -255,7 +293,8 @@ class BallTracker:
         self.dist_coeffs = dist_coeffs
     
     def track(self, frame: np.ndarray, detections: Dict[str, List[Dict[str, Any]]], 
-              historical_positions: List[Dict[str, Any]]) -> Dict[str, Any]:
+              historical_positions: List[Dict[str, Any]],
+              timestamp: Optional[float] = None) -> Dict[str, Any]:
         """
         Track the ball in the current frame and calculate trajectory data.
         
@@ -263,16 +302,31 @@ class BallTracker:
             frame: Current video frame
             detections: Object detection results
             historical_positions: Previous ball positions
+            timestamp: Capture time of the frame in seconds; the nominal
+                       frame_rate is assumed when missing
             
         Returns:
             Dictionary containing ball trajectory data
         """
+        colour_detection = None if detections.get("ball") else self.detect_ball_color(frame)
+        return self.track_detections(detections, historical_positions, frame.shape, timestamp, colour_detection)
+
+    def track_detections(self, detections: Dict[str, List[Dict[str, Any]]],
+                         historical_positions: List[Dict[str, Any]], frame_shape: Tuple[int, ...],
+                         timestamp: Optional[float] = None,
+                         colour_detection: Optional[Tuple[Tuple[int, int], int]] = None) -> Dict[str, Any]:
+        """
+        track() without the frame, for detections made elsewhere (see
+        detection_shards.py): colour_detection is what detect_ball_color()
+        found on a frame without ball detections.
+        """
+        self._advance_time(timestamp)
+        
         # Extract ball detections
         ball_detections = detections.get("ball", [])
         
         # If no ball detected
         if not ball_detections:
-            colour_detection = self.detect_ball_color(frame)
             if colour_detection:
                 center,radius=colour_detection
                 ball_detections=[{
@@ -296,7 +350,7 @@ class BallTracker:
         radius = ball_detection.get("radius", 10)
         
         # Convert to 3D coordinates
-        position_3d = self._estimate_3d_position(center, radius, frame.shape)
+        position_3d = self._estimate_3d_position(center, radius, frame_shape)
         
         # Update tracking state
         if not self.is_tracking:
@@ -322,9 +376,10 @@ class BallTracker:
             return None
         
         self.tracking_lost_frames += 1
+        self.lost_time += self.dt
         
-        # If tracking is lost for too many frames, reset tracking
-        if self.tracking_lost_frames > self.max_lost_frames:
+        # If tracking is lost for too long, reset tracking
+        if self.lost_time > self.max_lost_time + 1e-6:
             self.is_tracking = False
             return None
         
@@ -355,6 +410,7 @@ class BallTracker:
         self.last_velocity = np.zeros(3)
         self.last_acceleration = np.array([0, -self.gravity, 0])
         self.tracking_lost_frames = 0
+        self.lost_time = 0.0
         
         if self.use_kalman:
             # Initialize Kalman filter state
@@ -369,10 +425,11 @@ class BallTracker:
         Args:
             position: 3D position of the ball
         """
-        dt = 1.0 / self.frame_rate
+        dt = self.dt
         
         if self.use_kalman:
-            # Update Kalman filter
+            # Predict over this frame's dt, then correct with the measurement
+            self.kalman.predict()
             measurement = position.reshape(3, 1).astype(np.float32)
             self.kalman.correct(measurement)
             
@@ -393,6 +450,7 @@ class BallTracker:
             self.last_position = position
         
         self.tracking_lost_frames = 0
+        self.lost_time = 0.0
     
     def _predict_position_physics(self) -> np.ndarray:
         """
@@ -401,7 +459,7 @@ class BallTracker:
         Returns:
             Predicted 3D position
         """
-        dt = 1.0 / self.frame_rate
+        dt = self.dt
         
         # Apply physics equations of motion
         # x = x0 + v0*t + 0.5*a*t²
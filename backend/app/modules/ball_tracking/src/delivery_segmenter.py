@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Delivery Segmenter Module
+
+Cheap pre-pass that finds the run-up / release / impact window in a long
+recording, so only that frame range goes through the full tracking pipeline.
+
+Works on a frame-difference signal computed from tiny grayscale thumbnails
+plus the energy of the per-frame audio chunks.
+"""
+import cv2
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class DeliverySegmenter:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        config keys:
+          - thumb_size: [w, h] of the motion thumbnails
+          - motion_factor: activity threshold as a multiple of the median motion
+          - audio_factor: spike threshold as a multiple of the median audio energy
+          - max_gap: inactive frames tolerated inside one delivery
+          - margin_frames: frames kept on each side of the detected window
+          - min_trim_ratio: only trim if at least this fraction of frames is dropped
+        """
+        config = config or {}
+        self.thumb_size = tuple(config.get("thumb_size", [64, 48]))
+        self.motion_factor = config.get("motion_factor", 3.0)
+        self.min_motion = config.get("min_motion", 2.0)
+        self.audio_factor = config.get("audio_factor", 4.0)
+        self.max_gap = config.get("max_gap", 5)
+        self.margin_frames = config.get("margin_frames", 15)
+        self.min_trim_ratio = config.get("min_trim_ratio", 0.1)
+
+    def _thumbnail(self, entry: Dict[str, Any]) -> Optional[np.ndarray]:
+        image = entry.get("image")
+        if image is not None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        elif entry.get("frameBytes"):
+            # Reduced decode skips most of the JPEG work
+            arr = np.frombuffer(entry["frameBytes"], np.uint8)
+            gray = cv2.imdecode(arr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+            if gray is None:
+                return None
+        else:
+            return None
+        return cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    @staticmethod
+    def _audio_energy(audio: Optional[bytes]) -> float:
+        if not audio or len(audio) < 2:
+            return 0.0
+        samples = np.frombuffer(audio[: len(audio) // 2 * 2], dtype=np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples ** 2)))
+
+    def signals(self, entries: Iterable[Dict[str, Any]]) -> Tuple[List[Any], np.ndarray, np.ndarray]:
+        """Compute per-frame motion and audio energy. Returns (frame_ids, motion, audio)."""
+        frame_ids, motion, audio = [], [], []
+        prev = None
+        for entry in entries:
+            thumb = self._thumbnail(entry)
+            if thumb is None:
+                continue
+            frame_ids.append(entry.get("frameId"))
+            motion.append(float(np.mean(np.abs(thumb - prev))) if prev is not None else 0.0)
+            audio.append(self._audio_energy(entry.get("audioBytes")))
+            prev = thumb
+        return frame_ids, np.array(motion), np.array(audio)
+
+    def _active_runs(self, active: np.ndarray) -> List[Tuple[int, int]]:
+        """Group active frames into runs, bridging gaps of up to max_gap frames."""
+        runs = []
+        start = end = None
+        for idx in np.flatnonzero(active):
+            if start is None:
+                start = end = idx
+            elif idx - end <= self.max_gap + 1:
+                end = idx
+            else:
+                runs.append((start, end))
+                start = end = idx
+        if start is not None:
+            runs.append((start, end))
+        return runs
+
+    def find_window(self, entries: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Locate the delivery window.
+
+        Returns:
+            Dict with start/end frame IDs (inclusive) and frame counts, or None
+            when the whole recording should be processed.
+        """
+        frame_ids, motion, audio = self.signals(entries)
+        total = len(frame_ids)
+        if total < 3:
+            return None
+
+        threshold = max(self.motion_factor * float(np.median(motion[1:])), self.min_motion)
+        runs = self._active_runs(motion > threshold)
+
+        # Audio spike (bat/pad impact) anchors the window if present
+        impact_idx = None
+        if audio.any():
+            baseline = float(np.median(audio))
+            peak = int(np.argmax(audio))
+            if audio[peak] > self.audio_factor * max(baseline, 1.0):
+                impact_idx = peak
+
+        if not runs and impact_idx is None:
+            return None
+
+        def run_score(run):
+            score = float(motion[run[0]:run[1] + 1].sum())
+            if impact_idx is not None and run[0] - self.max_gap <= impact_idx <= run[1] + self.max_gap:
+                score *= 2.0
+            return score
+
+        if runs:
+            start, end = max(runs, key=run_score)
+        else:
+            start = end = impact_idx
+        if impact_idx is not None:
+            start, end = min(start, impact_idx), max(end, impact_idx)
+
+        # Plain ints: the window is stored as JSON (checkpoints, decision.json)
+        start = int(max(0, start - self.margin_frames))
+        end = int(min(total - 1, end + self.margin_frames))
+        kept = end - start + 1
+        if total - kept < self.min_trim_ratio * total:
+            return None
+
+        return {
+            "start_frame_id": frame_ids[start],
+            "end_frame_id": frame_ids[end],
+            "total_frames": total,
+            "kept_frames": kept,
+            "impact_frame_id": frame_ids[impact_idx] if impact_idx is not None else None,
+        }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detection Shards Module
+
+Most of the per-frame cost is TrackingSession.detect() (decode, preprocessing,
+ball, stump and pose detection). The trackers that follow are cheap, and the
+only state detection carries from frame to frame is deduplication, the
+detectors' rate limits and BlazePose's landmark smoothing. For long
+recordings (e.g. 240 fps deliveries) plan_shards() splits the frames into
+contiguous ranges, sharded_observations() runs detect() over each range in
+its own process and yields the results in capture order, and the caller
+replays them through TrackingSession.track() on its own session.
+
+Each shard first runs `overlap` frames before its range without emitting
+them, so that state is warmed up as it would be sequentially; outputs match
+sequential tracking unless a run of duplicate frames or the pose/stump rate
+limit spans more than the overlap at a shard boundary. Presets are fixed for
+the whole stage, since the StagePacer cannot reach the shard processes. Shards
+of a video reach their range by grabbing the frames before it.
+
+A review shards into as many processes as its thread budget (see
+core/thread_budget.py), each running one detection thread, so concurrent
+reviews still share the cores as the ThreadGovernor planned. The shard
+processes are warm like the review workers: they build their detectors once
+and serve every review of the process that started them. When a review is
+cancelled or times out while shards run, the shard processes are terminated.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from core.frame_store import count_frames, iter_frame_entries, load_roi_hints
+from core.thread_budget import apply_thread_limits
+from core.video_source import is_video
+from modules.ball_tracking.src.tracking_session import TrackingSession
+
+# Entry keys track() reads; frame data stays in the shard process
+_ENTRY_KEYS = ('frameId', 'timestamp', 'cameraPosition', 'cameraRotation')
+
+# Per-process state, set by _init_shard
+_session = None
+
+
+class ShardPool:
+    """
+    The warm shard processes of this process, started on first use and
+    grown when a review with a larger thread budget comes along. One review
+    shards at a time; a review that finds the pool busy tracks sequentially.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def acquire(self, processes: int, config: Dict[str, Any],
+                check: Optional[Callable[[], None]] = None) -> ProcessPoolExecutor:
+        """Reserve the pool with at least `processes` workers; release() it when done."""
+        while not self._lock.acquire(timeout=1.0):
+            if check is not None:
+                check()
+        if self._executor is None or self._size < processes:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_shard, initargs=(config,),
+            )
+            self._size = processes
+        return self._executor
+
+    def release(self, terminate: bool = False):
+        """
+        Return the pool; with terminate the shard processes are killed
+        (their review stopped while they ran, or one of them died) and a new
+        pool is started next time.
+        """
+        try:
+            if terminate and self._executor is not None:
+                executor, self._executor, self._size = self._executor, None, 0
+                for process in list((getattr(executor, "_processes", None) or {}).values()):
+                    process.terminate()
+                executor.shutdown(wait=False, cancel_futures=True)
+        finally:
+            self._lock.release()
+
+
+_pool = ShardPool()
+
+
+def plan_shards(input_path: str, frame_range: Optional[Tuple[int, int]],
+                config: Dict[str, Any], threads: Optional[int] = None) -> Optional[List[Tuple[Tuple[int, Optional[int]], int]]]:
+    """
+    Split the frames to track into (frame_range to run, first frame ID to emit)
+    shards, or None when the recording is too short to be worth it, there is
+    no thread budget to spread it over or the shard pool is busy.
+
+    threads is the review's thread budget. config keys (the "sharding"
+    section of config.json):
+      - enabled: shard long recordings at all
+      - processes: most shards at once; 0 for the thread budget alone
+      - min_shard_frames: fewest frames a shard is started for
+      - overlap: frames run before each shard's range to warm up its state
+    """
+    limit = config.get('processes', 0)
+    processes = min(threads, limit) if threads and limit else (threads or limit)
+    if not config.get('enabled', True) or processes < 2 or _pool.busy:
+        return None
+
+    if is_video(input_path):
+        # Video frame IDs are frame indices; the count is the container's estimate
+        total = count_frames(input_path)
+        first, last = frame_range if frame_range else (0, total - 1)
+        frame_ids = list(range(first, min(last, total - 1) + 1))
+    else:
+        frame_ids = [entry['frameId'] for entry in
+                     iter_frame_entries(input_path, load_frames=False, load_audio=False, frame_range=frame_range)]
+
+    shards = min(processes, len(frame_ids) // max(1, config.get('min_shard_frames', 240)))
+    if shards < 2:
+        return None
+    # Shards are frame ID ranges, so IDs must increase in capture order
+    if not all(isinstance(frame_id, int) for frame_id in frame_ids) or \
+            any(b <= a for a, b in zip(frame_ids, frame_ids[1:])):
+        print("[WARN] Frame IDs are not increasing; tracking without shards")
+        return None
+
+    overlap = config.get('overlap', 8)
+    plan = []
+    for k in range(shards):
+        start = k * len(frame_ids) // shards
+        end = (k + 1) * len(frame_ids) // shards - 1
+        plan.append(((frame_ids[max(0, start - overlap)], frame_ids[end]), frame_ids[start]))
+    if is_video(input_path):
+        # Decode to the real end of the video rather than the estimated count
+        (run_first, _), emit_from = plan[-1]
+        plan[-1] = ((run_first, frame_range[1] if frame_range else None), emit_from)
+    return plan
+
+
+def _init_shard(config: Dict[str, Any]):
+    """Process initializer: one detection thread per shard, detectors built once."""
+    global _session
+    apply_thread_limits(1)
+    _session = TrackingSession(config)
+
+
+def detect_shard(input_path: str, run_range: Tuple[int, Optional[int]], emit_from: int,
+                 quality: Optional[dict] = None) -> Tuple[List[Tuple[Dict[str, Any], Any]], Dict[Any, Any], Optional[str]]:
+    """
+    Run detect() over run_range in a shard process.
+
+    Returns the (entry metadata, observation) pairs from emit_from on, the
+    duplicate frames found among them and, if a frame failed, its error;
+    the pairs then end at that frame, as sequential tracking would.
+    """
+    session = _session
+    session.reset()
+    session.detector.set_roi_hints(load_roi_hints(input_path))
+    if quality:
+        session.apply_quality(quality['preprocessing'], quality['pose'])
+
+    observations = []
+    error = None
+    try:
+        for entry in iter_frame_entries(input_path, load_audio=False, frame_range=run_range):
+            observation = session.detect(entry)
+            if entry['frameId'] >= emit_from:
+                observations.append(({key: entry.get(key) for key in _ENTRY_KEYS}, observation))
+    except Exception as e:
+        error = f"shard stopped at frame {session.frame_id}: {e} ({session.call_check})"
+
+    duplicates = {frame_id: source_id for frame_id, source_id in session.duplicate_frames.items()
+                  if frame_id >= emit_from}
+    return observations, duplicates, error
+
+
+def sharded_observations(session: TrackingSession, input_path: str,
+                         plan: List[Tuple[Tuple[int, Optional[int]], int]], quality: Optional[dict] = None,
+                         check: Optional[Callable[[], None]] = None) -> Iterator[Tuple[Dict[str, Any], Any]]:
+    """
+    Yield (entry, observation) for every planned frame in capture order, for
+    session.track(). Each shard's frames are yielded as soon as it and the
+    shards before it are done; its duplicates are recorded on the session.
+    check is called while waiting. A failed frame is raised after the
+    frames before it. If the caller stops early (cancellation, timeout,
+    an error) the shards still running are terminated.
+    """
+    executor = _pool.acquire(len(plan), session.config, check)
+    completed = False
+    try:
+        futures = [executor.submit(detect_shard, input_path, run_range, emit_from, quality)
+                   for run_range, emit_from in plan]
+        for future in futures:
+            while not wait([future], timeout=1.0).done:
+                if check is not None:
+                    check()
+            observations, duplicates, error = future.result()
+            if session.deduplicator is not None:
+                session.deduplicator.duplicates.update(duplicates)
+            yield from observations
+            if error is not None:
+                raise RuntimeError(error)
+        completed = True
+    finally:
+        # Shards may still be running for a review that stopped early, or the pool broke
+        _pool.release(terminate=not completed)
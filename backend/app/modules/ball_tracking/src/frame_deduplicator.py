@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frame Deduplicator Module
+
+Detects repeated or near-identical frames (e.g. when the phone camera stalls),
+so detection and tracking run only once per unique frame. A difference hash
+on a tiny grayscale thumbnail finds candidates cheaply, but cannot see a small
+ball moving over a static scene, so every match is confirmed at full
+resolution: a frame is a duplicate only if almost no pixel changed. A frame's
+fingerprint (hash and grayscale image) may be computed ahead on another
+thread and passed to check().
+"""
+import cv2
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+# (dHash, grayscale frame)
+Fingerprint = Tuple[int, np.ndarray]
+
+
+class FrameDeduplicator:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        config keys:
+          - hash_size: side of the dHash grid (hash has hash_size**2 bits)
+          - max_distance: max Hamming distance of a duplicate candidate
+          - pixel_threshold: grey level change that counts a pixel as changed
+          - max_changed_pixels: most changed pixels a duplicate may have
+            (a 20 px ball moving changes several hundred)
+        """
+        config = config or {}
+        self.hash_size = config.get("hash_size", 8)
+        self.max_distance = config.get("max_distance", 2)
+        self.pixel_threshold = config.get("pixel_threshold", 24)
+        self.max_changed_pixels = config.get("max_changed_pixels", 16)
+
+        self.last: Optional[Fingerprint] = None
+        self.last_frame_id = None
+        self.duplicates: Dict[Any, Any] = {}  # duplicate frameId -> source frameId
+
+    @staticmethod
+    def _gray(frame: np.ndarray) -> np.ndarray:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    def frame_hash(self, frame: np.ndarray) -> int:
+        """Difference hash: sign of horizontal gradients on a (size+1) x size thumbnail."""
+        gray = self._gray(frame)
+        thumb = cv2.resize(gray, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA)
+        bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+    def fingerprint(self, frame: np.ndarray) -> Fingerprint:
+        """What check() compares of a frame; depends on nothing but the frame."""
+        gray = self._gray(frame)
+        return self.frame_hash(gray), gray
+
+    def same(self, a: Fingerprint, b: Fingerprint) -> bool:
+        """Whether two frames are duplicates: the hashes match and almost no pixel changed."""
+        (hash_a, gray_a), (hash_b, gray_b) = a, b
+        if bin(hash_a ^ hash_b).count("1") > self.max_distance or gray_a.shape != gray_b.shape:
+            return False
+        diff = cv2.absdiff(gray_a, gray_b)
+        changed = int(np.count_nonzero(diff > self.pixel_threshold))
+        return changed <= self.max_changed_pixels
+
+    def check(self, frame_id: Any, frame: np.ndarray, fingerprint: Optional[Fingerprint] = None) -> Optional[Any]:
+        """
+        Register a decoded frame, with its fingerprint() if already computed.
+
+        Returns:
+            The frameId of the unique frame this one duplicates, or None if it
+            starts a new unique frame.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(frame)
+        if self.last is not None and self.same(fingerprint, self.last):
+            self.duplicates[frame_id] = self.last_frame_id
+            return self.last_frame_id
+
+        # Compare against the head of the run so slow drift is not collapsed
+        self.last = fingerprint
+        self.last_frame_id = frame_id
+        return None
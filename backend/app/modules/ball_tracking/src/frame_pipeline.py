@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frame Pipeline Module
+
+Decoding, preprocessing and ball detection depend on nothing but the frame
+and spend most of their time in OpenCV, which releases the GIL. pipelined()
+runs them (TrackingSession.prepare) on a few worker threads ahead of the
+tracking loop, overlapping them with the previous frames' pose estimation.
+Everything that carries state from frame to frame (deduplication, pose and
+stump detection, the trackers) stays on the caller's thread, which receives
+the prepared frames in input order, so the output is the same as processing
+one frame at a time. A bounded queue keeps at most `depth` frames in flight.
+
+prepare() also receives a Link, through which it can hand a small value
+(e.g. the frame's hash) to the next entry's prepare() while the rest of both
+runs in parallel. Jobs start in input order, so waiting on the previous
+entry's value cannot deadlock.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+_END = object()
+
+
+class Link:
+    """Hands one value from an entry's prepare() to the next entry's."""
+
+    def __init__(self, previous: Optional["Link"]):
+        self._previous = previous
+        self._published = threading.Event()
+        self._value = None
+
+    def publish(self, value: Any):
+        """Hand value to the next entry; only the first call counts."""
+        if not self._published.is_set():
+            self._value = value
+            self._published.set()
+
+    def previous(self) -> Any:
+        """The previous entry's value, waiting until it is published; None for the first entry."""
+        if self._previous is None:
+            return None
+        self._previous._published.wait()
+        return self._previous._value
+
+    def _close(self):
+        # Publish for the next entry even if prepare() did not, and let go of the chain
+        self.publish(None)
+        self._previous = None
+
+
+def pipelined(entries: Iterable[Dict[str, Any]], prepare: Callable[[Dict[str, Any], Link], Dict[str, Any]],
+              workers: int = 2, depth: int = 8) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Yield (entry, prepare(entry, link)) in input order, preparing up to
+    `depth` entries ahead on `workers` threads. With workers=0 nothing is
+    prepared ahead and (entry, None) is yielded. prepare must not raise.
+    """
+    if workers <= 0:
+        for entry in entries:
+            yield entry, None
+        return
+
+    pending: "queue.Queue[Tuple[Any, Any]]" = queue.Queue(maxsize=max(1, depth))
+    stopping = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frame-prepare")
+
+    def put(item) -> bool:
+        # Wait for room, unless the consumer has gone away
+        while not stopping.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(entry, link):
+        try:
+            return prepare(entry, link)
+        finally:
+            link._close()
+
+    def feed():
+        # Reads (and for videos decodes) entries, so the consumer never waits on the source
+        error = None
+        link = None
+        try:
+            for entry in entries:
+                link = Link(link)
+                if not put((entry, pool.submit(run, entry, link))):
+                    return
+        except Exception as e:
+            error = e
+        put((_END, error))
+
+    feeder = threading.Thread(target=feed, name="frame-feeder", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            entry, item = pending.get()
+            if entry is _END:
+                if item is not None:
+                    raise item
+                return
+            yield entry, item.result()
+    finally:
+        stopping.set()
+        feeder.join()
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -4,7 +4,7 @@
 Refactored Frame Processor for JSON-driven pipeline
 
 Responsibilities:
-- Decode base64-encoded frame data from input JSON
+- Decode base64-encoded frame data from input JSON (or raw bytes / decoded video frames)
 - Preprocess frames (resize, noise reduction, contrast enhancement)
 - Provide ROI extraction and (optional) re-encoding
 """
@@ -12,6 +12,7 @@ Responsibilities:
 import cv2
 import numpy as np
 import base64
+import threading
 from typing import Tuple, Optional, Dict, Any
 
 class FrameProcessor:
@@ -25,10 +26,23 @@ class FrameProcessor:
         """
         config = config or {}
         self.target_size = config.get("target_size", [640, 480])
-        self.apply_contrast = config.get("enhance_contrast", True)
-        self.apply_noise = config.get("reduce_noise", True)
-        if self.apply_contrast:
-            self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        # CLAHE objects keep working buffers, so each thread preprocessing frames gets its own
+        self._local = threading.local()
+        self.set_preprocessing(config.get("reduce_noise", True), config.get("enhance_contrast", True))
+
+    def set_preprocessing(self, reduce_noise: bool, enhance_contrast: bool):
+        """
+        Switch noise reduction / contrast enhancement on or off, e.g. when a
+        review steps down its preprocessing preset (see core/quality.py).
+        """
+        self.apply_noise = reduce_noise
+        self.apply_contrast = enhance_contrast
+
+    def _clahe(self):
+        clahe = getattr(self._local, "clahe", None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        return clahe
 
     def decode_and_preprocess(self, b64_string: str) -> np.ndarray:
         """
@@ -41,10 +55,33 @@ class FrameProcessor:
         """
         # Decode base64 to bytes
         img_data = base64.b64decode(b64_string)
+        return self.decode_bytes_and_preprocess(img_data)
+
+    def decode_bytes_and_preprocess(self, img_data: bytes) -> np.ndarray:
+        """
+        Decode raw JPEG/PNG bytes and apply preprocessing.
+
+        Args:
+            img_data: encoded image bytes
+        Returns:
+            Preprocessed BGR image as numpy array
+        """
+        return self._preprocess(self.decode_bytes(img_data))
+
+    def decode_bytes(self, img_data: bytes) -> np.ndarray:
+        """
+        Decode raw JPEG/PNG bytes without preprocessing.
+        """
         arr = np.frombuffer(img_data, np.uint8)
         frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
         if frame is None:
-            raise ValueError("Failed to decode image from base64 input")
+            raise ValueError("Failed to decode image data")
+        return frame
+
+    def preprocess(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Apply preprocessing to an already decoded BGR frame (e.g. from a video).
+        """
         return self._preprocess(frame)
 
     def _preprocess(self, frame: np.ndarray) -> np.ndarray:
@@ -60,7 +97,7 @@ class FrameProcessor:
         if self.apply_contrast:
             lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
             l, a, b = cv2.split(lab)
-            l = self.clahe.apply(l)
+            l = self._clahe().apply(l)
             lab = cv2.merge((l, a, b))
             frame = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
         return frame
@@ -3,17 +3,19 @@
 """
 Refactored main.py for JSON-driven Ball and Bat Tracking Module
 
-Replaces video capture with input.json parsing, and outputs output.json.
+Reads frames from input.json, a binary frame index or a video clip
+(decoded lazily with cv2.VideoCapture), and outputs output.json.
 No CLI argument parsing; this module exposes a `ball_tracking` function that the wrapper app can call.
 """
 import json
 import cv2
 from typing import Optional
-from modules.ball_tracking.src.frame_processor import FrameProcessor
-from modules.ball_tracking.src.object_detector import ObjectDetector
-from modules.ball_tracking.src.stump_detector import StumpDetector
-from modules.ball_tracking.src.ball_tracker import BallTracker
-from modules.ball_tracking.src.batsman_tracker import BatsmanTracker
+from core.frame_store import iter_frame_entries, load_roi_hints
+from core.cancellation import ReviewCancelled, StageTimeout
+from modules.ball_tracking.src.tracking_session import TrackingSession
+from modules.ball_tracking.src.frame_pipeline import pipelined
+from modules.ball_tracking.src.detection_shards import plan_shards, sharded_observations
+from modules.ball_tracking.src.delivery_segmenter import DeliverySegmenter
 import mediapipe as mp
 
 mp_pose = mp.solutions.pose
@@ -46,152 +48,92 @@ class pose_detector:
 
 config_path = "modules/ball_tracking/src/config.json"
 
-def ball_tracking(input_json_path: str, output_json_path: str, visualize: bool = False):
-    # Initialize call tracking variable
-    call_check = ""
-    
-    # Load configuration
+def load_config() -> dict:
     with open(config_path, 'r') as cfp:
-        config = json.load(cfp)
-    call_check = "config_loaded"
-
-    # Initialize modules with config
-    processor = FrameProcessor(config.get('frame_processor', {}))
-    call_check = "processor_initialized"
-    
-    detector = ObjectDetector(config.get('object_detector', {}))
-    call_check = "detector_initialized"
-    
-    stump_detector = StumpDetector(config.get('stump_detector', {}))
-    call_check = "stump_detector_initialized"
-    
-    ball_tracker = BallTracker(config.get('ball_tracker', {}))
-    call_check = "ball_tracker_initialized"
-    
-    batsman_tracker = BatsmanTracker(focal_length=config.get('batsman_tracker', {}).get('focal_length', 1500))
-    call_check = "batsman_tracker_initialized"
-    
-    stump_detector.update_interval = config.get('stump_detector', {}).get('update_interval', 1)
-    call_check = "modules_initialized"
-
-    # Read input JSON
-    with open(input_json_path, 'r') as f:
-        data = json.load(f)
-    call_check = "input_json_loaded"
-
+        return json.load(cfp)
+
+def _checked(entries, check):
+    """Call check() before each entry, so a cancelled or timed out review stops between frames."""
+    for entry in entries:
+        if check is not None:
+            check()
+        yield entry
+
+def find_delivery_window(input_json_path: str, check=None) -> Optional[dict]:
+    """
+    Cheap pre-pass over the whole recording. Returns the delivery window
+    (inclusive start/end frame IDs) or None to process every frame.
+    """
+    seg_config = load_config().get('segmentation', {})
+    if not seg_config.get('enabled', True):
+        return None
+    segmenter = DeliverySegmenter(seg_config)
+    return segmenter.find_window(_checked(iter_frame_entries(input_json_path), check))
+
+def ball_tracking(input_json_path: str, output_json_path: str, visualize: bool = False,
+                  frame_range: Optional[tuple] = None, session: Optional[TrackingSession] = None,
+                  quality: Optional[dict] = None, pacer=None, check=None, on_frame=None,
+                  threads: Optional[int] = None):
+    """
+    quality holds the "preprocessing" and "pose" presets to run with and
+    pacer a core.quality.StagePacer that may step them down while frames are
+    processed; both are optional. check is called before every frame and
+    stops tracking by raising (see core/cancellation.py). on_frame is called
+    with the outputs so far after every frame (see core/speculation.py).
+    Frames are decoded, preprocessed and searched for the ball on the
+    "pipeline" worker threads ahead of the sequential tracking loop (see
+    frame_pipeline.py); preset changes apply to frames not yet prepared.
+    Long recordings are instead detected in parallel processes by frame
+    range, as many as the review's thread budget `threads` allows, and
+    replayed through the trackers (see detection_shards.py); the presets
+    then stay as given and pacer is not used.
+    """
+    # Load configuration and initialize modules, or reuse a warm session
+    # (see core/review_workers.py) after clearing the previous review's state
+    if session is None:
+        session = TrackingSession(load_config())
+    else:
+        session.reset()
+    session.detector.set_roi_hints(load_roi_hints(input_json_path))
+    if quality:
+        session.apply_quality(quality['preprocessing'], quality['pose'])
+
+    done = 0
+    # Process each frame entry (legacy input.json, binary frame index or video),
+    # restricted to the delivery window when one was found
+    shards = plan_shards(input_json_path, frame_range, session.config.get('sharding', {}), threads=threads)
+    if shards:
+        print(f"Detecting in {len(shards)} shards")
+        frames = sharded_observations(session, input_json_path, shards, quality=quality, check=check)
+        step = session.track
+        pacer = None
+    else:
+        frames = pipelined(iter_frame_entries(input_json_path, frame_range=frame_range),
+                           session.prepare, **session.config.get('pipeline', {}))
+        step = session.process
     try:
+        for entry, item in _checked(frames, check):
+            step(entry, item)
+            done += 1
+            if pacer is not None:
+                pacer.update(done, session.frame_id)
+            if on_frame is not None:
+                on_frame(session.outputs)
+
+    except (ReviewCancelled, StageTimeout):
+        # Stopped on purpose: no partial output is saved
+        raise
+    except Exception as e:
+        print(f"Error processing frame {session.frame_id}: {e} at {session.call_check}")
+    finally:
+        # Stops the workers when tracking ends early
+        frames.close()
 
-        all_outputs = []
-        historical_positions = []
-
-        # Process each frame entry
-        for entry in data.get('results', []):
-            frame_id = entry.get('frameId')
-            timestamp = entry.get('timestamp', None)
-            call_check = f"processing_frame_{frame_id}"
-            
-            # Decode and preprocess frame
-            frame_b64 = entry.get('frameData')
-            
-            if not frame_b64:
-                print(f"Frame data missing for frame ID {frame_id}. Skipping.")
-                continue
-
-            frame = processor.decode_and_preprocess(frame_b64)
-            call_check = f"frame_{frame_id}_decoded"
-
-            if frame is None:
-                print(f"Failed to decode frame data for frame ID {frame_id}. Skipping.")
-                continue
-                
-            # Detect objects
-            detections = detector.detect(frame)
-            call_check = f"objects_detected_frame_{frame_id}"
-
-            if not detections:
-                print(f"No detections found for frame ID {frame_id}. Skipping.")
-                continue
-            
-            # Detect stumps and merge into detections
-            stumps_data = stump_detector.detect(frame, detections, frame_id)
-            call_check = f"stumps_detected_frame_{frame_id}"
-            
-            if stumps_data:
-                detections['stumps'] = [{
-                    'bbox': [
-                        stumps_data['bbox']['x'],
-                        stumps_data['bbox']['y'],
-                        stumps_data['bbox']['w'],
-                        stumps_data['bbox']['h'],
-                    ],
-                    'confidence': stumps_data['detection_confidence']
-                }]
-            else:
-                detections['stumps'] = []
-            call_check = f"stumps_processed_frame_{frame_id}"
-
-            # Track ball
-            trajectory_data = ball_tracker.track(frame, detections, historical_positions)
-            call_check = f"ball_tracked_frame_{frame_id}"
-            
-            if trajectory_data:
-                historical_positions.append(trajectory_data['current_position'])
-            call_check = f"trajectory_processed_frame_{frame_id}"
-
-            # Track batsman
-            batsman_tracker.update(detections.get('batsman', []), frame.shape, frame_id)
-            call_check = f"batsman_tracked_frame_{frame_id}"
-
-            # Ensure all keys exist
-            for key in ['ball', 'batsman', 'bat', 'pads']:
-                detections.setdefault(key, [])
-            call_check = f"detections_normalized_frame_{frame_id}"
-
-            # Build output record
-            output = {
-                'frame_id': frame_id,
-                'timestamp': timestamp,
-                'detections': {
-                    'ball': detections['ball'],
-                    'stumps': detections['stumps'],
-                    'batsman': detections['batsman'],
-                    'bat': detections['bat'],
-                    'pads': detections['pads'],
-                },
-                'ball_trajectory': trajectory_data or {},
-                'batsman_position': batsman_tracker.get_position() or {}
-            }
-            call_check = f"output_built_frame_{frame_id}"
-
-            # Optional: preserve camera metadata
-            if 'cameraPosition' in entry:
-                output['camera_position'] = entry['cameraPosition']
-            if 'cameraRotation' in entry:
-                output['camera_rotation'] = entry['cameraRotation']
+    if pacer is not None:
+        pacer.finish(done)
 
-            all_outputs.append(output)
-            call_check = f"frame_{frame_id}_processed"
-            
-            # if visualize:
-            #     for obj in detections['ball']:
-            #         x, y, w, h = obj['bbox']
-            #         cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 255), 2)
-            #         cv2.putText(frame, 'Ball', (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-            #     for obj in detections['stumps']:
-            #         x, y, w, h = obj['bbox']
-            #         cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-            #         cv2.putText(frame, 'Stumps', (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-            #     for obj in detections['batsman']:
-            #         x, y, w, h = obj['bbox']
-            #         cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
-            #         cv2.putText(frame, 'Batsman', (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        
-    except Exception as e:
-        print(f"Error processing frame {frame_id}: {e} at {call_check}")
+    if session.duplicate_frames:
+        print(f"Collapsed {len(session.duplicate_frames)} duplicate frames onto their source frames")
         
     # Save outputs
-    with open(output_json_path, 'w') as ofp:
-        json.dump(all_outputs, ofp, indent=2)
-    call_check = "output_json_saved"
-
-    return all_outputs
+    return session.save(output_json_path)
@@ -17,7 +17,7 @@ import tensorflow as tf
 import tensorflow_hub as hub
 import time
 import mediapipe as mp
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 
 
 class BlazePoseDetector:
@@ -40,8 +40,20 @@ class BlazePoseDetector:
             "Left Knee", "Right Knee", "Left Ankle", "Right Ankle"
         ]  # Only using 17 keypoints (similar to OpenPose for compatibility)
 
-    def detect(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+    def reset(self):
+        """Drop landmark tracking state so the next frame starts a new sequence."""
+        self.pose.reset()
+
+    def detect(self, frame: np.ndarray, roi: Optional[Tuple[int, int, int, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Run pose inference on the frame, or only on roi=(x, y, w, h) when given.
+        Keypoints are always returned in full-frame pixel coordinates.
+        """
         results = []
+        offset_x, offset_y = 0, 0
+        if roi is not None:
+            offset_x, offset_y, w, h = roi
+            frame = frame[offset_y:offset_y + h, offset_x:offset_x + w]
         frame_height, frame_width = frame.shape[:2]  # Get dimensions first
         
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -54,8 +66,8 @@ class BlazePoseDetector:
             for idx, landmark in enumerate(pose_results.pose_landmarks.landmark):
                 if idx < len(self.keypointsMapping):
                     # Use frame dimensions for proper projection
-                    x = int(landmark.x * frame_width)
-                    y = int(landmark.y * frame_height)
+                    x = int(landmark.x * frame_width) + offset_x
+                    y = int(landmark.y * frame_height) + offset_y
                     detection[self.keypointsMapping[idx]] = (x, y)
             results.append(detection)
         
@@ -125,6 +137,107 @@ class ObjectDetector:
         self._init_traditional_cv_params()
         self.pose_detector: BlazePoseDetector
         self.pose_detector =BlazePoseDetector()  # This should be a class that runs the pose detection code
+
+        # Client-supplied regions of interest (normalised), see set_roi_hints
+        self.roi_hints: Optional[Dict[str, Any]] = None
+        self._roi_cache: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+        # Pose and stump detection are expensive and change slowly, so at high
+        # capture rates they run at most this many times per second of capture
+        # time while ball detection still runs on every frame (0 = every frame)
+        self._detector_rates = {
+            "pose": config.get("pose_fps", 30),
+            "stumps": config.get("stump_fps", 30),
+        }
+        self._last_run: Dict[str, float] = {}
+        self._last_timestamp: Optional[float] = None
+        self._last_pose: List[Dict[str, Any]] = []
+        self._last_batsman: List[Dict[str, Any]] = []
+        self._last_stumps: List[Dict[str, Any]] = []
+        # Seconds spent in pose inference over the detector's lifetime, for stage cost measurement
+        self.pose_time = 0.0
+
+    def set_detector_rate(self, name: str, fps: float):
+        """Change how often the rate-limited detector `name` ("pose" or "stumps") runs."""
+        self._detector_rates[name] = fps
+
+    def reset(self):
+        """
+        Clear all per-review state (motion model, pose tracking, ROI hints,
+        reused detections) while keeping the loaded models, so one detector
+        can serve many reviews.
+        """
+        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=self.config.get("bg_history", 120),
+            varThreshold=self.config.get("bg_threshold", 16)
+        )
+        self.pose_detector.reset()
+        self.set_roi_hints(None)
+        self._last_run = {}
+        self._last_timestamp = None
+        self._last_pose = []
+        self._last_batsman = []
+        self._last_stumps = []
+        self._detector_rates = {
+            "pose": self.config.get("pose_fps", 30),
+            "stumps": self.config.get("stump_fps", 30),
+        }
+
+    def set_roi_hints(self, hints: Optional[Dict[str, Any]]):
+        """
+        Restrict detection to client-supplied regions.
+
+        Args:
+            hints: Normalised RoiHints dict (stumpPoint, pitchCorners, batsmanBox)
+                   or None to search the full frame
+        """
+        self.roi_hints = hints or None
+        self._roi_cache = {}
+
+    def _roi_regions(self, frame_shape) -> Dict[str, Any]:
+        """
+        Convert the normalised hints into pixel regions for this frame size.
+        Invalid or missing hints are left out so detection falls back to the full frame.
+        """
+        height, width = frame_shape[:2]
+        if not self.roi_hints:
+            return {}
+        if (width, height) in self._roi_cache:
+            return self._roi_cache[(width, height)]
+
+        regions = {}
+        stump = _valid_point(self.roi_hints.get("stumpPoint"))
+        if stump:
+            # Band around the tap point, tall enough for the whole wicket
+            sx, sy = stump[0] * width, stump[1] * height
+            regions["stumps"] = _clip_rect(sx - 0.1 * width, sy - 0.3 * height,
+                                           0.2 * width, 0.6 * height, width, height)
+
+        corners = self.roi_hints.get("pitchCorners") or []
+        points = [_valid_point(c) for c in corners]
+        if len(points) >= 3 and all(points):
+            polygon = np.array([[px * width, py * height] for px, py in points], dtype=np.int32)
+            if cv2.contourArea(polygon) > 0.01 * width * height:
+                x, y, w, h = cv2.boundingRect(polygon)
+                rect = _clip_rect(x, y, w, h, width, height)
+                if rect:
+                    mask = np.zeros((rect[3], rect[2]), dtype=np.uint8)
+                    cv2.fillPoly(mask, [polygon - np.array([rect[0], rect[1]])], 255)
+                    regions["ball"] = (rect, mask)
+
+        box = self.roi_hints.get("batsmanBox")
+        if box and all(isinstance(box.get(k), (int, float)) for k in ("x", "y", "w", "h")):
+            # Pad the box so limbs outside the user's framing are still visible
+            bw, bh = box["w"] * width, box["h"] * height
+            if bw > 0.02 * width and bh > 0.02 * height:
+                regions["pose"] = _clip_rect(box["x"] * width - 0.2 * bw, box["y"] * height - 0.2 * bh,
+                                             1.4 * bw, 1.4 * bh, width, height)
+
+        regions = {k: v for k, v in regions.items() if v}
+        if not regions:
+            print("[WARN] ROI hints are invalid; using full frame")
+        self._roi_cache[(width, height)] = regions
+        return regions
     
     
        
@@ -155,35 +268,75 @@ class ObjectDetector:
         self.hog = cv2.HOGDescriptor()
         self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
     
-    def detect(self, frame: np.ndarray) -> Dict[str, List[Dict[str, Any]]]:
+    def detect_ball(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Ball detections of one preprocessed frame. Depends on nothing but the
+        frame, so it may run ahead on another thread (see frame_pipeline.py).
+        """
+        return self._detect_ball_traditional(frame)
+
+    def detect(self, frame: np.ndarray, timestamp: Optional[float] = None,
+               balls: Optional[List[Dict[str, Any]]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Detect ball, stumps and batsman in a frame.
+
+        Args:
+            frame: Preprocessed frame
+            timestamp: Capture time in seconds; without it every detector runs
+            balls: detect_ball() result for this frame, if already computed
+        """
         results = {"ball": [], "stumps": [], "batsman": [], "bat": []}
 
         # Detect objects
-        self._detect_with_traditional_cv(frame, results)
+        self._detect_with_traditional_cv(frame, results, timestamp, balls)
 
-        # Detect pose (body parts) for batsman
-        pose_results = self.pose_detector.detect(frame)
-        
-        # Add pose data to batsman detections
+        # Add pose data (from the same pose pass) to batsman detections
         for detection in results["batsman"]:
-            detection["pose"] = pose_results
+            detection["pose"] = self._last_pose
         
         return results
+
+    def _due(self, name: str, timestamp: Optional[float], frame_dt: Optional[float]) -> bool:
+        """Whether the rate-limited detector `name` should run on this frame."""
+        rate = self._detector_rates[name]
+        last = self._last_run.get(name)
+        if timestamp is None or not rate or last is None or timestamp < last:
+            self._last_run[name] = timestamp
+            return True
+        # Half a capture frame of slack, so a clip recorded at the target rate is never thinned
+        if timestamp - last >= 1.0 / rate - 0.5 * (frame_dt or 0.0):
+            self._last_run[name] = timestamp
+            return True
+        return False
     
-    def _detect_with_traditional_cv(self, frame: np.ndarray, results: Dict[str, List[Dict[str, Any]]]):
-        ball_detections = self._detect_ball_traditional(frame)
+    def _detect_with_traditional_cv(self, frame: np.ndarray, results: Dict[str, List[Dict[str, Any]]],
+                                    timestamp: Optional[float] = None,
+                                    balls: Optional[List[Dict[str, Any]]] = None):
+        frame_dt = None
+        if timestamp is not None and self._last_timestamp is not None and timestamp > self._last_timestamp:
+            frame_dt = timestamp - self._last_timestamp
+        self._last_timestamp = timestamp
+
+        ball_detections = self._detect_ball_traditional(frame) if balls is None else balls
         results["ball"] = ball_detections
         
-        stump_detections = self._detect_stumps_traditional(frame)
-        results["stumps"] = stump_detections
+        # Between runs the last stump / batsman detections are reused
+        if self._due("stumps", timestamp, frame_dt):
+            self._last_stumps = self._detect_stumps_traditional(frame)
+        results["stumps"] = list(self._last_stumps)
         
-        batsman_detections = self._detect_batsman_traditional(frame)
-        results["batsman"] = batsman_detections
+        if self._due("pose", timestamp, frame_dt):
+            start = time.perf_counter()
+            self._last_batsman = self._detect_batsman_traditional(frame)
+            self.pose_time += time.perf_counter() - start
+        results["batsman"] = list(self._last_batsman)
          
     def _detect_batsman_traditional(self, frame):
         """Detects batsmen using pose estimation with improved filtering"""
+        self._last_pose = []
         try:
-            pose_detections = self.pose_detector.detect(frame)
+            pose_detections = self.pose_detector.detect(frame, self._roi_regions(frame.shape).get("pose"))
+            self._last_pose = pose_detections
             
             if not pose_detections:
                 return []
@@ -275,6 +428,14 @@ class ObjectDetector:
         Returns:
             List of ball detection results with 3D coordinates
         """
+        # Search only the hinted pitch corridor when available
+        region = self._roi_regions(frame.shape).get("ball")
+        offset_x, offset_y, corridor_mask = 0, 0, None
+        full_frame = frame
+        if region:
+            (offset_x, offset_y, w, h), corridor_mask = region
+            frame = frame[offset_y:offset_y + h, offset_x:offset_x + w]
+
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         
         # Create masks for both red ranges and white
@@ -293,6 +454,8 @@ class ObjectDetector:
         combined_mask = cv2.bitwise_or(combined_mask, mask_white)
         combined_mask = cv2.bitwise_or(combined_mask, mask_green)
         combined_mask = cv2.bitwise_or(combined_mask, mask_yellow)
+        if corridor_mask is not None:
+            combined_mask = cv2.bitwise_and(combined_mask, corridor_mask)
         # Noise removal
         combined_mask = cv2.erode(combined_mask, None, iterations=2)
         combined_mask = cv2.dilate(combined_mask, None, iterations=2)
@@ -322,8 +485,8 @@ class ObjectDetector:
                     valid_contours.append(c)
             
             if valid_contours:
-                # Select most central contour
-                frame_center = (frame.shape[1]//2, frame.shape[0]//2)
+                # Select most central contour (centre of the full frame, in search-region coordinates)
+                frame_center = (full_frame.shape[1]//2 - offset_x, full_frame.shape[0]//2 - offset_y)
                 c = min(valid_contours,
                         key=lambda cnt: np.linalg.norm(
                             np.array(cv2.minEnclosingCircle(cnt)[0]) - 
@@ -336,6 +499,7 @@ class ObjectDetector:
                     diameter_pixels = 2 * radius
                     z = (self.focal_length * self.real_ball_diameter) / diameter_pixels
                     
+                    x, y = x + offset_x, y + offset_y
                     balls.append({
                         "bbox": (int(x-radius), int(y-radius), 
                                 int(2*radius), int(2*radius)),
@@ -357,6 +521,13 @@ class ObjectDetector:
         Returns:
             List of stump detection results
         """
+        # Search only around the hinted stump position when available
+        offset_x, offset_y = 0, 0
+        region = self._roi_regions(frame.shape).get("stumps")
+        if region:
+            offset_x, offset_y, w, h = region
+            frame = frame[offset_y:offset_y + h, offset_x:offset_x + w]
+
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
 
         # stumps
@@ -382,6 +553,7 @@ class ObjectDetector:
         stumps = []
         for c in contours:
             x,y,w,h = cv2.boundingRect(c)
+            x, y = x + offset_x, y + offset_y
             aspect = h / float(w) if w>0 else 0
 
             # only keep nice tall thin pieces
@@ -428,4 +600,25 @@ class ObjectDetector:
         return detected_bats
 
     def _init_deep_learning_models(self):
-        return
\ No newline at end of file
+        return
+
+
+def _valid_point(point: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+    """Return (x, y) for a normalised point inside the frame, else None."""
+    if not point:
+        return None
+    x, y = point.get("x"), point.get("y")
+    if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+        return None
+    if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+        return None
+    return float(x), float(y)
+
+
+def _clip_rect(x, y, w, h, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+    """Clip a pixel rectangle to the frame; None if nothing usable is left."""
+    x1, y1 = max(0, int(x)), max(0, int(y))
+    x2, y2 = min(width, int(x + w)), min(height, int(y + h))
+    if x2 - x1 < 8 or y2 - y1 < 8:
+        return None
+    return (x1, y1, x2 - x1, y2 - y1)
@@ -24,6 +24,12 @@ class StumpDetector:
         self.last_frame_id = -1
         self.tracking_lost_frames = 0
 
+    def reset(self):
+        """Forget the tracked wicket before a new review."""
+        self.last_bbox = None
+        self.last_frame_id = -1
+        self.tracking_lost_frames = 0
+
     def detect(self, frame: np.ndarray, detections: Dict[str, List[Dict[str, Any]]], frame_id: int = 0) -> Dict[str, Any]:
          # Only update every N frames
          if self.last_bbox and (frame_id - self.last_frame_id) < self.update_interval:
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tracking Session Module
+
+Holds the per-review tracking state (detectors, trackers, accumulated output
+records) so frames can be pushed through the pipeline one at a time, either
+from a stored review or live as they arrive from the capture device.
+"""
+import copy
+import json
+import time
+from typing import Any, Dict, List, Optional
+from modules.ball_tracking.src.frame_processor import FrameProcessor
+from modules.ball_tracking.src.object_detector import ObjectDetector
+from modules.ball_tracking.src.stump_detector import StumpDetector
+from modules.ball_tracking.src.ball_tracker import BallTracker
+from modules.ball_tracking.src.batsman_tracker import BatsmanTracker
+from modules.ball_tracking.src.frame_deduplicator import FrameDeduplicator
+from modules.ball_tracking.src.frame_pipeline import Link
+
+
+class TrackingSession:
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize all tracking modules for one review.
+
+        Args:
+            config: Ball tracking configuration (see config.json)
+        """
+        self.config = config
+        self.call_check = ""
+        self.frame_id = None
+
+        self.processor = FrameProcessor(config.get('frame_processor', {}))
+        self.call_check = "processor_initialized"
+
+        self.detector = ObjectDetector(config.get('object_detector', {}))
+        self.call_check = "detector_initialized"
+
+        self.stump_detector = StumpDetector(config.get('stump_detector', {}))
+        self.call_check = "stump_detector_initialized"
+
+        self.ball_tracker = BallTracker(config.get('ball_tracker', {}))
+        self.call_check = "ball_tracker_initialized"
+
+        self.batsman_tracker = BatsmanTracker(focal_length=config.get('batsman_tracker', {}).get('focal_length', 1500))
+        self.call_check = "batsman_tracker_initialized"
+
+        self.stump_detector.update_interval = config.get('stump_detector', {}).get('update_interval', 1)
+        self.call_check = "modules_initialized"
+
+        dedup_config = config.get('deduplication', {})
+        self.deduplicator = FrameDeduplicator(dedup_config) if dedup_config.get('enabled', True) else None
+
+        self.outputs: List[Dict[str, Any]] = []
+        self.historical_positions: List[Dict[str, Any]] = []
+        self._last_unique_output: Optional[Dict[str, Any]] = None
+        # Seconds spent preprocessing over the session's lifetime (not reset)
+        self.preprocess_time = 0.0
+
+    def reset(self):
+        """
+        Prepare for a new review while keeping the expensive detectors loaded.
+
+        Trackers, deduplicator and collected outputs are rebuilt; the object and
+        stump detectors only drop their per-review state.
+        """
+        config = self.config
+        self.call_check = ""
+        self.frame_id = None
+
+        self.processor = FrameProcessor(config.get('frame_processor', {}))
+        self.detector.reset()
+        self.stump_detector.reset()
+        self.ball_tracker = BallTracker(config.get('ball_tracker', {}))
+        self.batsman_tracker = BatsmanTracker(focal_length=config.get('batsman_tracker', {}).get('focal_length', 1500))
+
+        dedup_config = config.get('deduplication', {})
+        self.deduplicator = FrameDeduplicator(dedup_config) if dedup_config.get('enabled', True) else None
+
+        self.outputs = []
+        self.historical_positions = []
+        self._last_unique_output = None
+        self.call_check = "session_reset"
+
+    def apply_quality(self, preprocessing: Dict[str, Any], pose: Dict[str, Any]):
+        """
+        Switch to the given preprocessing and pose presets (see core/quality.py).
+        Takes effect from the next frame; reset() restores the configured settings.
+        """
+        self.processor.set_preprocessing(preprocessing['reduce_noise'], preprocessing['enhance_contrast'])
+        self.detector.set_detector_rate('pose', pose['pose_fps'])
+
+    def cost_counters(self) -> Dict[str, float]:
+        """Cumulative seconds spent in the parts controlled by quality presets."""
+        return {'preprocessing': self.preprocess_time, 'pose': self.detector.pose_time}
+
+    def _decode(self, entry: Dict[str, Any]):
+        """Decoded frame of an entry (video entries arrive already decoded), or None without frame data."""
+        image = entry.get('image')
+        if image is not None:
+            return image
+        frame_bytes = entry.get('frameBytes')
+        if frame_bytes:
+            return self.processor.decode_bytes(frame_bytes)
+        return None
+
+    def prepare(self, entry: Dict[str, Any], link: Optional[Link] = None) -> Dict[str, Any]:
+        """
+        The part of process() that depends on nothing but the frame: decode,
+        preprocessing and ball detection. Thread safe, so it can run ahead of
+        process() on worker threads (see frame_pipeline.py). Errors are kept
+        and raised by process() at the point where they would have occurred.
+
+        With deduplication the frame's fingerprint is computed here too and
+        handed to the next frame through link. A frame that duplicates the
+        previous one is only decoded: detect() checks it against the head of
+        its run, and preprocesses and searches it after all if it is unique.
+        """
+        try:
+            raw = self._decode(entry)
+        except Exception as e:
+            return {'decode_error': e}
+        if raw is None:
+            return {'raw': None}
+        prepared = {'raw': raw}
+
+        if self.deduplicator is not None:
+            try:
+                fingerprint = self.deduplicator.fingerprint(raw)
+            except Exception:
+                fingerprint = None  # detect() computes it again and raises there
+            prepared['fingerprint'] = fingerprint
+            if link is not None:
+                link.publish(fingerprint)
+                previous = link.previous()
+                if fingerprint is not None and previous is not None and \
+                        self.deduplicator.same(fingerprint, previous):
+                    return prepared
+
+        try:
+            start = time.perf_counter()
+            frame = self.processor.preprocess(raw)
+            preprocess_time = time.perf_counter() - start
+            balls = self.detector.detect_ball(frame)
+        except Exception as e:
+            prepared['error'] = e
+            return prepared
+        prepared.update({'frame': frame, 'preprocess_time': preprocess_time, 'balls': balls})
+        return prepared
+
+    def process(self, entry: Dict[str, Any], prepared: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Run one frame entry through decode -> detect -> stumps -> track.
+
+        Args:
+            entry: Normalised frame entry (see core.frame_store.iter_frame_entries)
+            prepared: prepare() result for this entry, if it was computed ahead
+        Returns:
+            The output record appended for this frame, or None if it was skipped
+        """
+        return self.track(entry, self.detect(entry, prepared))
+
+    def detect(self, entry: Dict[str, Any], prepared: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        First half of process(): decode, deduplicate and detect objects.
+
+        Returns what track() needs instead of the frame, so detection can run
+        in another process (see detection_shards.py): None for a frame without
+        data, {'duplicate_of': frameId} for a duplicate, otherwise the
+        detections, the frame shape and the colour fallback for the ball.
+        """
+        frame_id = entry.get('frameId')
+        self.frame_id = frame_id
+        self.call_check = f"processing_frame_{frame_id}"
+
+        # Decode frame
+        if prepared is None:
+            raw = self._decode(entry)
+        elif 'decode_error' in prepared:
+            raise prepared['decode_error']
+        else:
+            raw = prepared['raw']
+        if raw is None:
+            print(f"Frame data missing for frame ID {frame_id}. Skipping.")
+            return None
+        self.call_check = f"frame_{frame_id}_decoded"
+
+        # Collapse stalled / repeated frames onto the last unique one
+        if self.deduplicator is not None:
+            source_id = self.deduplicator.check(frame_id, raw, prepared.get('fingerprint') if prepared else None)
+            if source_id is not None:
+                self.call_check = f"frame_{frame_id}_duplicate"
+                return {'duplicate_of': source_id}
+
+        balls = None
+        if prepared is not None and 'error' in prepared:
+            raise prepared['error']
+        if prepared is not None and 'frame' in prepared:
+            frame = prepared['frame']
+            balls = prepared['balls']
+            self.preprocess_time += prepared['preprocess_time']
+        else:
+            # Not prepared ahead, or left as a likely duplicate that proved unique
+            start = time.perf_counter()
+            frame = self.processor.preprocess(raw)
+            self.preprocess_time += time.perf_counter() - start
+        self.call_check = f"frame_{frame_id}_preprocessed"
+
+        capture_time = self._capture_time(entry)
+
+        # Detect objects (pose and stumps keep state between frames, so they run here)
+        detections = self.detector.detect(frame, capture_time, balls=balls)
+        self.call_check = f"objects_detected_frame_{frame_id}"
+
+        # The tracker's colour fallback for frames without a ball detection
+        colour = None
+        if detections and not detections.get('ball'):
+            colour = self.ball_tracker.detect_ball_color(frame)
+        return {'detections': detections, 'frame_shape': frame.shape, 'colour': colour}
+
+    def track(self, entry: Dict[str, Any], observation: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Second half of process(): stumps, trackers and the output record, from
+        detect()'s result for the entry. Entries must arrive in capture order.
+        """
+        frame_id = entry.get('frameId')
+        timestamp = entry.get('timestamp', None)
+        self.frame_id = frame_id
+        if observation is None:
+            return None
+        if 'duplicate_of' in observation:
+            return self._duplicate_output(entry, observation['duplicate_of'])
+
+        # Only unique frames are tracked; a skipped one must not be reused
+        self._last_unique_output = None
+        detections = observation['detections']
+        frame_shape = observation['frame_shape']
+        capture_time = self._capture_time(entry)
+
+        if not detections:
+            print(f"No detections found for frame ID {frame_id}. Skipping.")
+            return None
+
+        # Detect stumps and merge into detections (the stump tracker only reads the detections)
+        stumps_data = self.stump_detector.detect(None, detections, frame_id)
+        self.call_check = f"stumps_detected_frame_{frame_id}"
+
+        if stumps_data:
+            detections['stumps'] = [{
+                'bbox': [
+                    stumps_data['bbox']['x'],
+                    stumps_data['bbox']['y'],
+                    stumps_data['bbox']['w'],
+                    stumps_data['bbox']['h'],
+                ],
+                'confidence': stumps_data['detection_confidence']
+            }]
+        else:
+            detections['stumps'] = []
+        self.call_check = f"stumps_processed_frame_{frame_id}"
+
+        # Track ball
+        trajectory_data = self.ball_tracker.track_detections(detections, self.historical_positions, frame_shape,
+                                                             capture_time, observation['colour'])
+        self.call_check = f"ball_tracked_frame_{frame_id}"
+
+        if trajectory_data:
+            self.historical_positions.append(trajectory_data['current_position'])
+        self.call_check = f"trajectory_processed_frame_{frame_id}"
+
+        # Track batsman
+        self.batsman_tracker.update(detections.get('batsman', []), frame_shape, frame_id)
+        self.call_check = f"batsman_tracked_frame_{frame_id}"
+
+        # Ensure all keys exist
+        for key in ['ball', 'batsman', 'bat', 'pads']:
+            detections.setdefault(key, [])
+        self.call_check = f"detections_normalized_frame_{frame_id}"
+
+        # Build output record
+        output = {
+            'frame_id': frame_id,
+            'timestamp': timestamp,
+            'detections': {
+                'ball': detections['ball'],
+                'stumps': detections['stumps'],
+                'batsman': detections['batsman'],
+                'bat': detections['bat'],
+                'pads': detections['pads'],
+            },
+            'ball_trajectory': trajectory_data or {},
+            'batsman_position': self.batsman_tracker.get_position() or {}
+        }
+        self.call_check = f"output_built_frame_{frame_id}"
+
+        # Optional: preserve camera metadata
+        if entry.get('cameraPosition') is not None:
+            output['camera_position'] = entry['cameraPosition']
+        if entry.get('cameraRotation') is not None:
+            output['camera_rotation'] = entry['cameraRotation']
+
+        self.outputs.append(output)
+        self._last_unique_output = output
+        self.call_check = f"frame_{frame_id}_processed"
+        return output
+
+    def _capture_time(self, entry: Dict[str, Any]) -> Optional[float]:
+        """Capture time of a frame in seconds, derived from its frameId at the nominal rate if untimed."""
+        timestamp = entry.get('timestamp')
+        if timestamp is None and isinstance(entry.get('frameId'), int):
+            timestamp = entry['frameId'] / self.ball_tracker.frame_rate
+        return timestamp
+
+    def _duplicate_output(self, entry: Dict[str, Any], source_id: Any) -> Optional[Dict[str, Any]]:
+        """Emit an output record for a duplicate frame by copying its source frame's record."""
+        source = self._last_unique_output
+        if source is None:
+            # Source frame produced no record, so neither does its duplicate
+            return None
+
+        output = copy.deepcopy(source)
+        output['frame_id'] = entry.get('frameId')
+        output['timestamp'] = entry.get('timestamp', None)
+        output['duplicate_of'] = source_id
+        output.pop('camera_position', None)
+        output.pop('camera_rotation', None)
+        if entry.get('cameraPosition') is not None:
+            output['camera_position'] = entry['cameraPosition']
+        if entry.get('cameraRotation') is not None:
+            output['camera_rotation'] = entry['cameraRotation']
+
+        self.outputs.append(output)
+        return output
+
+    @property
+    def duplicate_frames(self) -> Dict[Any, Any]:
+        """Mapping of duplicate frameId -> frameId of the unique frame it copies."""
+        return self.deduplicator.duplicates if self.deduplicator is not None else {}
+
+    def save(self, output_json_path: str) -> List[Dict[str, Any]]:
+        """Write all output records collected so far and return them."""
+        with open(output_json_path, 'w') as ofp:
+            json.dump(self.outputs, ofp, indent=2)
+        self.call_check = "output_json_saved"
+        return self.outputs
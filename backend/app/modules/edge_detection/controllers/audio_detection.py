@@ -1,7 +1,9 @@
+import os
+import tempfile
 import numpy as np
 import scipy.io.wavfile as wav
 
-from modules.edge_detection.controllers.audio_detectionwav import decodebase64_pcm_to_wav,denoise_audio
+from modules.edge_detection.controllers.audio_detectionwav import decodebase64_pcm_to_wav,pcm_to_wav,denoise_audio,pcm_to_samples,denoise_samples
 
 def load_audio(filename):
     sample_rate, data = wav.read(filename)
@@ -40,15 +42,21 @@ def make_decision(spikes):
     else:
         return "Not Out"
 
-def drs_system_pipeline(audio_data_base64) -> str:
+def drs_system_pipeline(audio_data) -> str:
+    """Runs edge detection on one audio chunk: raw PCM bytes or a base64 string."""
 
-    audio_base64 = audio_data_base64
     # Step 1: Decode and convert to WAV
-    raw_wav_path = "assets/raw_audio.wav"
-    cleaned_wav_path = "assets/denoised_audio.wav"
+    # Scratch files go to a private temporary directory, removed afterwards,
+    # so concurrent reviews neither overwrite nor accumulate them
+    scratch = tempfile.TemporaryDirectory(prefix="drs_audio_")
+    raw_wav_path = os.path.join(scratch.name, "raw_audio.wav")
+    cleaned_wav_path = os.path.join(scratch.name, "denoised_audio.wav")
     try:
         module = 0
-        decodebase64_pcm_to_wav(audio_base64, raw_wav_path)
+        if isinstance(audio_data, (bytes, bytearray)):
+            pcm_to_wav(audio_data, raw_wav_path)
+        else:
+            decodebase64_pcm_to_wav(audio_data, raw_wav_path)
 
         module = 1
         # Step 2: Denoise audio
@@ -75,5 +83,24 @@ def drs_system_pipeline(audio_data_base64) -> str:
         module = 6
     except Exception as e:
         print(f"[EROR] {e} : Call Check : {module}")
+    finally:
+        scratch.cleanup()
 
     return decision
+
+
+def audio_track_pipeline(pcm_bytes: bytes, sample_rate: int = 16000, channels: int = 1,
+                         sample_width: int = 2, start_timestamp: float = 0.0,
+                         frame_duration_ms: int = 10) -> dict:
+    """Runs edge detection over one continuous PCM track in a single in-memory pass.
+
+    Returns the decision plus the capture time (seconds) of every spike.
+    """
+    samples = pcm_to_samples(pcm_bytes, sample_width, channels)
+    samples = denoise_samples(samples, sample_rate)
+
+    frames = frame_audio(samples, sample_rate, frame_duration_ms=frame_duration_ms)
+    spikes = detect_spikes(frames, threshold_factor=2.5)
+
+    spike_times = [start_timestamp + int(s) * frame_duration_ms / 1000.0 for s in spikes]
+    return {"decision": make_decision(spikes), "spike_times": spike_times}
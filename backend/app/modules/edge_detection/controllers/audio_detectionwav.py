@@ -11,14 +11,20 @@ def decodebase64_pcm_to_wav(audio_base64: str, output_path: str,
                             sample_rate: int = 16000,
                             sample_width: int = 2,
                             channels: int = 1) -> str:
-    """Decodes base64-encoded raw PCM, saves as WAV, and denoises."""
+    """Decodes base64-encoded raw PCM and saves it as WAV."""
 
-    try:
-        call_check = 0
-        # Step 1: Decode Base64 to raw PCM bytes
-        pcm_bytes = base64.b64decode(audio_base64)
+    # Step 1: Decode Base64 to raw PCM bytes
+    pcm_bytes = base64.b64decode(audio_base64)
+    return pcm_to_wav(pcm_bytes, output_path, sample_rate, sample_width, channels)
+
+def pcm_to_wav(pcm_bytes: bytes, output_path: str,
+               sample_rate: int = 16000,
+               sample_width: int = 2,
+               channels: int = 1) -> str:
+    """Saves raw PCM bytes as WAV."""
 
-        call_check = 1  
+    try:
+        call_check = 1
 
         # Step 2: Convert PCM bytes to numpy array
         dtype = np.int16 if sample_width == 2 else np.int8  # 16-bit or 8-bit PCM
@@ -38,12 +44,30 @@ def decodebase64_pcm_to_wav(audio_base64: str, output_path: str,
         call_check = 4
 
     except Exception as e:
-        print(f"Error in decodebase64_pcm_to_wav: {e}, Call Check: {call_check}")
+        print(f"Error in pcm_to_wav: {e}, Call Check: {call_check}")
         raise
 
+    return output_path
+
 def denoise_audio(input_path: str, output_path: str) -> None:
     """Reads WAV file, denoises it, and saves to another WAV file."""
     
     y, sr = sf.read(input_path)
     y_denoised = nr.reduce_noise(y=y, sr=sr)
-    sf.write(output_path, y_denoised, sr)
\ No newline at end of file
+    sf.write(output_path, y_denoised, sr)
+
+
+def pcm_to_samples(pcm_bytes: bytes, sample_width: int = 2, channels: int = 1) -> np.ndarray:
+    """Converts raw PCM bytes to a mono float array in [-1, 1] (first channel)."""
+    dtype = np.int16 if sample_width == 2 else np.int8  # 16-bit or 8-bit PCM
+    frame_bytes = sample_width * channels
+    usable = len(pcm_bytes) // frame_bytes * frame_bytes
+    audio_np = np.frombuffer(pcm_bytes[:usable], dtype=dtype).astype(np.float32)
+    if channels > 1:
+        audio_np = audio_np.reshape((-1, channels))[:, 0]
+    return audio_np / float(np.iinfo(dtype).max + 1)
+
+
+def denoise_samples(y: np.ndarray, sr: int) -> np.ndarray:
+    """Denoises samples in memory (same as denoise_audio without the WAV round trip)."""
+    return nr.reduce_noise(y=y, sr=sr)
@@ -1,7 +1,8 @@
 import math
-import json
-from modules.edge_detection.controllers.audio_detection import drs_system_pipeline
-from typing import List, Dict
+from modules.edge_detection.controllers.audio_detection import drs_system_pipeline, audio_track_pipeline
+from core.frame_store import iter_audio_chunks, load_audio_track, frame_time_span
+from core.json_stream import JsonStreamReader
+from typing import List, Dict, Optional
 
 def calculate_distance(p1, p2):
     return math.sqrt(
@@ -11,12 +12,9 @@ def calculate_distance(p1, p2):
     )
 
 def get_audio_base64_list(input_json_path, skip_empty=True):
-    with open(input_json_path, 'r') as f:
-        data = json.load(f)
-
     audio_list = []
 
-    for frame in data.get("results", []):
+    for frame in JsonStreamReader(input_json_path).iter_array("results"):
         audio_b64 = frame.get("audioData", "")
         if skip_empty and not audio_b64:
             continue
@@ -24,7 +22,11 @@ def get_audio_base64_list(input_json_path, skip_empty=True):
 
     return audio_list
 
-def edge_detection(frames: List[Dict], file_path:str) -> Dict:
+def edge_detection(frames: List[Dict], file_path:str, frame_range=None, audio: Optional[Dict] = None) -> Dict:
+    """
+    Vision edge check over the tracked frames, merged with the audio result.
+    Pass audio (from audio_edge_detection) when it was computed concurrently.
+    """
     results = {}
     c=0
 
@@ -88,17 +90,75 @@ def edge_detection(frames: List[Dict], file_path:str) -> Dict:
 
 
 
-    audio_chunks = get_audio_base64_list(file_path)
+    if audio is None:
+        audio = audio_edge_detection(file_path, frame_range=frame_range)
+
+    results["audio_decision"] = audio["audio_decision"]
+    if "audio_spike_times" in audio:
+        results["audio_spike_times"] = audio["audio_spike_times"]
+        results["audio_spike_frames"] = match_spikes_to_frames(audio["audio_spike_times"], frames)
+
+    return results
+
+
+def audio_edge_detection(file_path: str, frame_range=None) -> Dict:
+    """Audio half of edge detection. Needs nothing from vision, so it can run alongside tracking."""
+    # Continuous track: one decode / denoise / spike pass for the whole delivery
+    track = load_audio_track(file_path)
+    if track:
+        if frame_range is not None:
+            span = frame_time_span(file_path, frame_range)
+            if span:
+                trimmed = trim_track_to_span(track, *span)
+                if trimmed["pcm"]:
+                    track = trimmed
+                else:
+                    # Clock offset between camera and microphone: keep the whole track
+                    print(f"[WARN] Audio track does not overlap frames {frame_range[0]}-{frame_range[1]}; "
+                          f"analysing the untrimmed track")
+        audio = audio_track_pipeline(
+            track["pcm"], track["sampleRate"], track["channels"],
+            track["sampleWidth"], track["startTimestamp"]
+        )
+        return {"audio_decision": audio["decision"], "audio_spike_times": audio["spike_times"]}
+
+    decision = "Not Out"  # no audio chunks: no edge heard
+    audio_chunks = iter_audio_chunks(file_path, frame_range=frame_range)
     for i in audio_chunks:
         decision = drs_system_pipeline(i)
         if decision=='Out': 
             break
-    results["audio_decision"]=decision
-
-    return results
+    return {"audio_decision": decision}
     
 
 
+def trim_track_to_span(track: Dict, start: float, end: float, margin: float = 0.5) -> Dict:
+    """Cut the audio track down to the capture time span [start, end] (plus margin)."""
+    sample_rate = track["sampleRate"]
+    frame_bytes = track["channels"] * track["sampleWidth"]
+    first = max(0, int((start - margin - track["startTimestamp"]) * sample_rate))
+    last = max(first, int((end + margin - track["startTimestamp"]) * sample_rate))
+
+    return {
+        **track,
+        "pcm": track["pcm"][first * frame_bytes:last * frame_bytes],
+        "startTimestamp": track["startTimestamp"] + first / sample_rate,
+    }
+
+def match_spikes_to_frames(spike_times: List[float], frames: List[Dict]) -> List:
+    """Map each audio spike to the frame captured closest to it (needs frame timestamps)."""
+    timed = [(f["timestamp"], f.get("frame_id")) for f in frames if f.get("timestamp") is not None]
+    if not timed:
+        return []
+
+    matched = []
+    for t in spike_times:
+        _, frame_id = min(timed, key=lambda item: abs(item[0] - t))
+        if frame_id not in matched:
+            matched.append(frame_id)
+    return matched
+
+
 def sample_bat_edge_points(bbox: list, step=1):
     points = []
     x, y, width, height = bbox  # Unpack the list into variables
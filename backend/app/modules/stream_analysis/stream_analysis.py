@@ -3,39 +3,61 @@ import numpy as np
 from pathlib import Path
 import base64
 import io
-import json
 import tempfile
 import os
+from core.frame_store import iter_frame_entries
 
 def project_3d_to_2d(x, y, z, frame_width=1280, frame_height=720):
     y_2d = int((y / 20) * frame_height)
     x_2d = int(frame_width / 2 + x * 50)
     return x_2d, y_2d
     
-def stream_analysis(frames, ball_positions, decision_data):
+def output_frame_rate(ball_positions, default=30.0):
+    """Playback rate matching the capture clock, from the records' timestamps."""
+    timed = [(p["frame_id"], p["timestamp"]) for p in ball_positions
+             if isinstance(p, dict) and isinstance(p.get("frame_id"), int)
+             and isinstance(p.get("timestamp"), (int, float))]
+    # Per-frame interval, robust to frames that produced no record
+    intervals = [(t2 - t1) / (f2 - f1) for (f1, t1), (f2, t2) in zip(timed, timed[1:])
+                 if f2 > f1 and t2 > t1]
+    if not intervals:
+        return default
+    return 1.0 / float(np.median(intervals))
+
+def decode_frame(frame):
+    """Decode one normalised frame entry; None if it carries no image."""
+    if frame.get("image") is not None:
+        return frame["image"]
+
+    frame_bytes = frame["frameBytes"]
+    if frame_bytes is None:
+        return None
+
+    nparr = np.frombuffer(frame_bytes, np.uint8)
+    decoded = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if decoded is None:
+        raise ValueError("Failed to decode frame data")
+    return decoded
+
+def stream_analysis(frames, ball_positions, decision_data, render_size=(1280, 720), check=None):
+    """
+    Render the trajectory overlay. `frames` may be any iterable of frame
+    entries; each frame is decoded, drawn and written before the next one is
+    read, so only one frame is held in memory. decision_data may be a
+    zero-argument callable returning the decision. render_size is the output
+    resolution; the overlay is laid out for 1280x720 and scaled to it.
+    check is called before every frame and stops rendering by raising (see
+    core/cancellation.py).
+    """
     
     print(f"[INFO] Type of ball posiitons:", type(ball_positions))
-    
-    frames = frames["results"]
-    processed_frames = []
-    for frame in frames:
-        frame_data = frame["frameData"]
-        if frame_data is None:
-            continue
-        
-        frame_bytes = base64.b64decode(frame_data)
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        decoded = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if decoded is None:
-            raise ValueError("Failed to decode frame data")
-
-        processed_frames.append(decoded)
 
     output_dir = Path(__file__).parent / "output/augmented_frames"
     output_dir.mkdir(exist_ok=True, parents=True)
 
     frame_count = 0
-    total_frames = len(processed_frames)
+    # One overlay frame is rendered per tracked position
+    total_frames = len(ball_positions)
     accumulated_positions = []
 
     y_values = []
@@ -62,8 +84,32 @@ def stream_analysis(frames, ball_positions, decision_data):
     if y_max == y_min:
         y_max = y_min + 1
 
+    temp_file = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    temp_file.close()
+    temp_video_path = temp_file.name
+    fourcc = cv2.VideoWriter_fourcc(*"XVID")
+    fps = output_frame_rate(ball_positions)
+    print(f"[INFO] Writing augmented stream at {fps:.1f} fps")
+    width, height = render_size
+    out = cv2.VideoWriter(temp_video_path, fourcc, fps, (width, height))
+
+    # Overlay coordinates are computed for 1280x720
+    scale_x, scale_y = width / 1280, height / 720
+
+    def scaled(x, y):
+        return int(x * scale_x), int(y * scale_y)
+
+    decoded_frames = (decoded for decoded in map(decode_frame, frames) if decoded is not None)
+
     last_position = {"x": 0, "y": 0, "z": 0}
-    for frame_idx, (frame, position_data) in enumerate(zip(processed_frames, ball_positions)):
+    for frame, position_data in zip(decoded_frames, ball_positions):
+        if check is not None:
+            try:
+                check()
+            except Exception:
+                out.release()
+                os.unlink(temp_video_path)
+                raise
         try:
             if "ball_trajectory" in position_data and position_data["ball_trajectory"] and "current_position" in position_data["ball_trajectory"]:
                 current_pos = position_data["ball_trajectory"]["current_position"]
@@ -80,26 +126,26 @@ def stream_analysis(frames, ball_positions, decision_data):
         accumulated_positions.append([x, y_mapped, z])
         positions = accumulated_positions
 
-        frame = cv2.resize(frame, (1280, 720))
+        frame = cv2.resize(frame, (width, height))
 
         projected_positions = []
         for pos in positions:
-            x_2d, y_2d = project_3d_to_2d(pos[0], pos[1], pos[2])
+            x_2d, y_2d = scaled(*project_3d_to_2d(pos[0], pos[1], pos[2]))
             projected_positions.append([x_2d, y_2d])
 
         bounce_idx = np.argmin([pos[2] for pos in positions])
-        bounce_x, bounce_y = project_3d_to_2d(*positions[bounce_idx])
+        bounce_x, bounce_y = scaled(*project_3d_to_2d(*positions[bounce_idx]))
         bounce_point = {"x": bounce_x, "y": bounce_y}
 
         post_bounce_positions = [pos for pos in positions[bounce_idx:] if pos[2] > 0]
         if post_bounce_positions:
             peak_idx = np.argmax([pos[2] for pos in post_bounce_positions])
-            peak_x, peak_y = project_3d_to_2d(*post_bounce_positions[peak_idx])
+            peak_x, peak_y = scaled(*project_3d_to_2d(*post_bounce_positions[peak_idx]))
             peak_point = {"x": peak_x, "y": peak_y}
         else:
             peak_point = None
 
-        impact_x, impact_y = project_3d_to_2d(*positions[-1])
+        impact_x, impact_y = scaled(*project_3d_to_2d(*positions[-1]))
         impact_point = {"x": impact_x, "y": impact_y}
 
         if len(projected_positions) > 1:
@@ -115,65 +161,61 @@ def stream_analysis(frames, ball_positions, decision_data):
         cv2.circle(frame, (impact_point["x"], impact_point["y"]), 10, (0, 0, 255), 2)
 
         if frame_count > 0.8 * total_frames:
-            cv2.rectangle(frame, (1000, 20), (1200, 100), (0, 0, 0), -1)
+            if callable(decision_data):
+                # Decision may still be in progress; wait for it only once the banner is drawn
+                decision_data = decision_data()
+            cv2.rectangle(frame, scaled(1000, 20), scaled(1200, 100), (0, 0, 0), -1)
             if isinstance(decision_data, dict) and "Out" in decision_data and "Reason" in decision_data:
-                out = decision_data["Out"]
+                is_out = decision_data["Out"]
                 reason = decision_data["Reason"]
             else:
-                out = decision_data == "dummy_decision"
-                reason = "Out" if out else "Not Out"
+                is_out = decision_data == "dummy_decision"
+                reason = "Out" if is_out else "Not Out"
 
-            color = (0, 0, 255) if out else (0, 255, 0)
-            cv2.putText(frame, "OUT" if out else "NOT OUT", (1010, 50),
-                        cv2.FONT_HERSHEY_DUPLEX, 1.0, color, 2)
-            cv2.putText(frame, reason, (1010, 80),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+            color = (0, 0, 255) if is_out else (0, 255, 0)
+            cv2.putText(frame, "OUT" if is_out else "NOT OUT", scaled(1010, 50),
+                        cv2.FONT_HERSHEY_DUPLEX, 1.0 * scale_y, color, 2)
+            cv2.putText(frame, reason, scaled(1010, 80),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5 * scale_y, (255, 255, 255), 1)
 
         output_path = output_dir / f"frame_{frame_count:04d}.png"
         if not cv2.imwrite(str(output_path), frame):
             print(f"Failed to write frame to {output_path}")
-        processed_frames[frame_idx] = frame
+        out.write(frame)
         frame_count += 1
 
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_file:
-        temp_video_path = temp_file.name
-        fourcc = cv2.VideoWriter_fourcc(*"XVID")
-        out = cv2.VideoWriter(temp_video_path, fourcc, 30.0, (1280, 720))
+    out.release()
 
-        # Log the number of frames being written
-        print(f"[DEBUG] Total frames to write: {len(processed_frames)}")
+    if frame_count == 0:
+        os.unlink(temp_video_path)
+        raise ValueError("No frames found in the input data")
 
-        for idx, frame in enumerate(processed_frames):
-            # Log the dimensions of each frame
-            print(f"[DEBUG] Writing frame {idx + 1}/{len(processed_frames)} with dimensions: {frame.shape}")
-            out.write(frame)
-        out.release()
+    # Log the number of frames written
+    print(f"[DEBUG] Total frames written: {frame_count}")
 
-        # Log the size of the video file before encoding
-        print(f"[DEBUG] Temporary video file size: {os.path.getsize(temp_video_path)} bytes")
+    # Log the size of the video file before encoding
+    print(f"[DEBUG] Temporary video file size: {os.path.getsize(temp_video_path)} bytes")
 
-        with open(temp_video_path, "rb") as vf:
-            encoded_video = base64.b64encode(vf.read()).decode("utf-8")
+    with open(temp_video_path, "rb") as vf:
+        encoded_video = base64.b64encode(vf.read()).decode("utf-8")
 
-        # Log the length of the base64 string
-        print(f"[DEBUG] Encoded video base64 length: {len(encoded_video)} characters")
+    # Log the length of the base64 string
+    print(f"[DEBUG] Encoded video base64 length: {len(encoded_video)} characters")
 
     os.unlink(temp_video_path)
 
     return encoded_video
 
-def augmented_stream(frames_path, ball_positions, decision_data):
+def augmented_stream(frames_path, ball_positions, decision_data, frame_range=None, render_size=(1280, 720),
+                     check=None):
     try:
-        with open(frames_path, "r") as f:
-            frames = json.load(f)
-
-        print(f"[INFO] Loaded {len(frames)} frames from {frames_path}")
+        # Frames are streamed from disk, never all loaded at once
+        frames = iter_frame_entries(frames_path, load_audio=False, frame_range=frame_range)
 
-        if not frames:
-            raise ValueError("No frames found in the input data")
+        print(f"[INFO] Streaming frames from {frames_path}")
 
         # Call the stream_analysis function
-        return stream_analysis(frames, ball_positions, decision_data)
+        return stream_analysis(frames, ball_positions, decision_data, render_size=render_size, check=check)
 
     except Exception as e:
         print(f"[ERROR] stream_analysis failed: {e}")
@@ -0,0 +1,37 @@
+import requests
+import json
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+BATCH_SIZE = 6  # deliveries in the over
+
+with open("../reviews/test/input.json", "r") as f:
+    delivery = json.load(f)
+
+# Step 1: Submit the whole over in one call
+print(f"[POST] Submitting batch of {BATCH_SIZE} deliveries...")
+response = requests.post(f"{BASE_URL}/batches", json={
+    "deliveries": [delivery] * BATCH_SIZE,
+    "labels": [f"over 1, ball {i + 1}" for i in range(BATCH_SIZE)],
+    "priority": "batch",
+})
+if response.status_code != 200:
+    print("Failed to submit batch:", response.status_code, response.text)
+    exit()
+
+batch_id = response.json()["batch_id"]
+print("Batch submitted! ID:", batch_id)
+
+# Step 2: Poll aggregate progress
+for attempt in range(60):
+    batch = requests.get(f"{BASE_URL}/batches/{batch_id}").json()
+    print(f"[GET] {batch['finished']}/{batch['total']} finished ({batch['percent']}%): {batch['progress']}")
+    if batch["finished"] == batch["total"]:
+        for item in batch["deliveries"]:
+            print(f"  {item['label']}: {item['status']} {item.get('decision', item.get('error', ''))}")
+        print("✅ Batch complete!")
+        break
+    time.sleep(5)
+else:
+    print("❌ Timed out waiting for batch.")
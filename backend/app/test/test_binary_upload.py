@@ -0,0 +1,57 @@
+import requests
+import base64
+import json
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+
+# Reuse a recorded JSON review and send it as raw binary parts instead
+with open("../reviews/test/input.json", "r") as f:
+    payload = json.load(f)
+
+frames = payload["results"]
+
+files = []
+for frame in frames:
+    files.append(("frames", (f"{frame['frameId']}.jpg", base64.b64decode(frame["frameData"]), "image/jpeg")))
+for frame in frames:
+    files.append(("audio", (f"{frame['frameId']}.pcm", base64.b64decode(frame["audioData"]), "application/octet-stream")))
+
+metadata = {
+    "frames": [
+        {
+            "frameId": frame["frameId"],
+            "cameraPosition": frame["cameraPosition"],
+            "cameraRotation": frame["cameraRotation"],
+        }
+        for frame in frames
+    ]
+}
+
+# Step 1: Submit review
+print("[POST] Uploading review as multipart...")
+response = requests.post(
+    f"{BASE_URL}/submit-review/upload",
+    files=files,
+    data={"metadata": json.dumps(metadata)},
+)
+if response.status_code != 200:
+    print("Failed to submit review:", response.status_code, response.text)
+    exit()
+
+review_id = response.json()["review_id"]
+print("Review submitted! ID:", review_id, "frames:", response.json()["frames"])
+
+# Step 2: Poll for result
+for attempt in range(10):
+    print(f"[GET] Checking result... attempt {attempt + 1}")
+    result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+    if result_data["status"] == "complete":
+        print("✅ Review complete!")
+        print("Decision:", result_data["decision"])
+        break
+    print("Still processing...")
+    time.sleep(5)
+else:
+    print("❌ Timed out waiting for result.")
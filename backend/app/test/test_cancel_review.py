@@ -0,0 +1,42 @@
+import requests
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+# Step 1: Submit the same appeal twice
+review_ids = []
+for i in range(2):
+    print(f"[POST] Submitting review {i + 1}...")
+    response = requests.post(
+        f"{BASE_URL}/submit-review",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    if response.status_code != 200:
+        print("Failed to submit review:", response.status_code, response.text)
+        exit()
+    review_ids.append(response.json()["review_id"])
+print("Reviews submitted:", review_ids)
+
+# Step 2: Cancel the duplicate
+duplicate = review_ids[1]
+res = requests.delete(f"{BASE_URL}/review/{duplicate}")
+print("[DELETE] Cancel duplicate:", res.status_code, res.json())
+
+# Step 3: Poll until the duplicate reports cancelled
+for attempt in range(20):
+    result_data = requests.get(f"{BASE_URL}/get-review/{duplicate}").json()
+    print(f"[GET] attempt {attempt + 1}: {result_data['status']}")
+    if result_data["status"] == "cancelled":
+        print("✅ Duplicate review cancelled")
+        break
+    if result_data["status"] == "complete":
+        print("❌ Duplicate review completed before it was cancelled")
+        break
+    time.sleep(2)
+else:
+    print("❌ Timed out waiting for cancellation.")
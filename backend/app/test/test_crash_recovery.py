@@ -0,0 +1,36 @@
+import requests
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+# Step 1: Submit a review
+response = requests.post(
+    f"{BASE_URL}/submit-review",
+    data=payload,
+    headers={"Content-Type": "application/json"},
+)
+if response.status_code != 200:
+    print("Failed to submit review:", response.status_code, response.text)
+    exit()
+review_id = response.json()["review_id"]
+print("Submitted review:", review_id)
+
+# Step 2: Crash the server mid-review (kill -9) and start it again; the review
+# is queued again on startup and resumes from its completed stages
+input("Once the review is running, kill the server, restart it and press Enter...")
+
+# Step 3: Every poll gets a definite state, never an open-ended "processing"
+while True:
+    result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+    print("Status:", result_data["status"], result_data.get("attempts", ""))
+    if result_data["status"] == "complete":
+        print("✅ Decision:", result_data["decision"])
+        break
+    if result_data["status"] in ("failed", "timed_out", "cancelled"):
+        print("Review did not complete:", result_data)
+        break
+    time.sleep(5)
@@ -0,0 +1,48 @@
+import asyncio
+import json
+import time
+
+import requests
+import websockets
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+WS_URL = "ws://localhost:8000/ws/review"
+
+# Replay a recorded JSON review frame by frame, as the app would while capturing
+with open("../reviews/test/input.json", "r") as f:
+    frames = json.load(f)["results"]
+
+
+async def stream_delivery():
+    async with websockets.connect(WS_URL, max_size=None) as ws:
+        session = json.loads(await ws.recv())
+        print("Live session opened! ID:", session["review_id"])
+
+        for frame in frames:
+            await ws.send(json.dumps(frame))
+            ack = json.loads(await ws.recv())
+            if ack["event"] != "ack":
+                print("Frame rejected:", ack)
+            await asyncio.sleep(1 / 30)  # capture rate
+
+        await ws.send(json.dumps({"event": "end"}))
+        done = json.loads(await ws.recv())
+        print("Delivery closed:", done)
+        return done["review_id"]
+
+
+review_id = asyncio.run(stream_delivery())
+
+# Poll for result
+for attempt in range(10):
+    print(f"[GET] Checking result... attempt {attempt + 1}")
+    result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+    if result_data["status"] == "complete":
+        print("✅ Review complete!")
+        print("Decision:", result_data["decision"])
+        break
+    print("Still processing...")
+    time.sleep(5)
+else:
+    print("❌ Timed out waiting for result.")
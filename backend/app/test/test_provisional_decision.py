@@ -0,0 +1,37 @@
+import requests
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+# Step 1: Submit a review
+start = time.time()
+response = requests.post(
+    f"{BASE_URL}/submit-review",
+    data=payload,
+    headers={"Content-Type": "application/json"},
+)
+if response.status_code != 200:
+    print("Failed to submit review:", response.status_code, response.text)
+    exit()
+review_id = response.json()["review_id"]
+print("Submitted review:", review_id)
+
+# Step 2: Poll quickly; the provisional call appears while tracking is still running
+shown = False
+while True:
+    result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+    if result_data["status"] == "complete":
+        print(f"✅ Decision after {time.time() - start:.1f}s:", result_data["decision"])
+        print("Provisional call:", result_data["provisional"])
+        break
+    if result_data["status"] in ("failed", "timed_out", "cancelled"):
+        print("Review did not complete:", result_data)
+        break
+    if result_data.get("provisional") and not shown:
+        print(f"Provisional decision after {time.time() - start:.1f}s:", result_data["provisional"]["decision"])
+        shown = True
+    time.sleep(0.5)
@@ -0,0 +1,45 @@
+import requests
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+
+def submit():
+    response = requests.post(
+        f"{BASE_URL}/submit-review",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    if response.status_code != 200:
+        print("Failed to submit review:", response.status_code, response.text)
+        exit()
+    return response.json()
+
+
+# Step 1: Submit a review and wait for it to complete
+first = submit()
+print("Submitted review:", first)
+while True:
+    result_data = requests.get(f"{BASE_URL}/get-review/{first['review_id']}").json()
+    if result_data["status"] == "complete":
+        print("✅ Decision:", result_data["decision"])
+        break
+    if result_data["status"] in ("failed", "timed_out", "cancelled"):
+        print("Review did not complete:", result_data)
+        exit()
+    time.sleep(5)
+
+# Step 2: Resubmit the same delivery; the cached result is returned at once
+start = time.time()
+second = submit()
+print("Resubmitted review:", second)
+result_data = requests.get(f"{BASE_URL}/get-review/{second['review_id']}").json()
+print(f"Status after {time.time() - start:.2f}s:", result_data["status"],
+      "cached from", result_data.get("cached_from"))
+if second["cache_hit"] and result_data["decision"] == requests.get(
+        f"{BASE_URL}/get-review/{first['review_id']}").json()["decision"]:
+    print("✅ Same decision served from the cache")
@@ -0,0 +1,53 @@
+import requests
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+CHUNK_SIZE = 1024 * 1024
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+# Step 1: Create the upload
+print("[POST] Creating upload...")
+created = requests.post(f"{BASE_URL}/uploads", json={
+    "length": len(payload),
+    "chunkSize": CHUNK_SIZE,
+    "format": "json",
+}).json()
+upload_id = created["upload_id"]
+print("Upload created! ID:", upload_id, "chunks:", created["chunkCount"])
+
+# Step 2: Send every other chunk first to simulate a dropped connection
+for index in range(0, created["chunkCount"], 2):
+    chunk = payload[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+    requests.put(f"{BASE_URL}/uploads/{upload_id}/chunks/{index}", data=chunk)
+
+# Step 3: Resume - ask the server what is missing and send only that
+status = requests.get(f"{BASE_URL}/uploads/{upload_id}").json()
+print("Committed offset:", status["offset"], "missing chunks:", status["missing"])
+for index in status["missing"]:
+    chunk = payload[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+    res = requests.put(f"{BASE_URL}/uploads/{upload_id}/chunks/{index}", data=chunk)
+    if res.status_code != 200:
+        print("Chunk failed:", index, res.text)
+
+# Step 4: Finalize into a review
+res = requests.post(f"{BASE_URL}/uploads/{upload_id}/finalize")
+if res.status_code != 200:
+    print("Failed to finalize upload:", res.status_code, res.text)
+    exit()
+review_id = res.json()["review_id"]
+
+# Step 5: Poll for result
+for attempt in range(10):
+    print(f"[GET] Checking result... attempt {attempt + 1}")
+    result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+    if result_data["status"] == "complete":
+        print("✅ Review complete!")
+        print("Decision:", result_data["decision"])
+        break
+    print("Still processing...")
+    time.sleep(5)
+else:
+    print("❌ Timed out waiting for result.")
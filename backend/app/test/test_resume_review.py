@@ -0,0 +1,43 @@
+import requests
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+# Step 1: Submit review
+print("[POST] Submitting review...")
+response = requests.post(
+    f"{BASE_URL}/submit-review",
+    data=payload,
+    headers={"Content-Type": "application/json"},
+)
+if response.status_code != 200:
+    print("Failed to submit review:", response.status_code, response.text)
+    exit()
+
+review_id = response.json()["review_id"]
+print("Review submitted! ID:", review_id)
+
+# Step 2: Poll; if the review failed after its automatic retries, resume it
+for attempt in range(20):
+    print(f"[GET] Checking result... attempt {attempt + 1}")
+    result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+    if result_data["status"] == "complete":
+        print("✅ Review complete!")
+        print("Decision:", result_data["decision"])
+        break
+    if result_data["status"] == "failed":
+        print("Review failed:", result_data["error"], "after", result_data["attempts"], "attempts")
+        res = requests.post(f"{BASE_URL}/review/{review_id}/resume")
+        if res.status_code != 200:
+            print("Failed to resume review:", res.status_code, res.text)
+            exit()
+        print("Resumed, reusing stages:", res.json()["completed_stages"])
+    else:
+        print("Still processing...")
+    time.sleep(5)
+else:
+    print("❌ Timed out waiting for result.")
@@ -0,0 +1,39 @@
+import requests
+import time
+
+# Base URL of your local FastAPI server
+BASE_URL = "http://localhost:8000"
+BURST = 40  # more than REVIEW_QUEUE_LIMIT to trigger backpressure
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+# Step 1: Submit a burst of reviews
+review_ids = []
+for i in range(BURST):
+    response = requests.post(
+        f"{BASE_URL}/submit-review",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    if response.status_code == 429:
+        print(f"Submission {i + 1} rejected, Retry-After: {response.headers.get('Retry-After')}s")
+        continue
+    if response.status_code != 200:
+        print("Failed to submit review:", response.status_code, response.text)
+        exit()
+    review_ids.append(response.json()["review_id"])
+
+print(f"{len(review_ids)} of {BURST} reviews accepted")
+
+# Step 2: Watch the queue drain
+while review_ids:
+    for review_id in list(review_ids):
+        result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+        if result_data["status"] == "queued":
+            print(review_id, "position:", result_data["position"],
+                  "estimated wait:", result_data["estimated_wait"], "s")
+        elif result_data["status"] == "complete":
+            print("✅", review_id, "Decision:", result_data["decision"])
+            review_ids.remove(review_id)
+    time.sleep(5)
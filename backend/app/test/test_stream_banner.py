@@ -0,0 +1,31 @@
+import base64
+import os
+import sys
+
+import numpy as np
+
+# Renders directly, no server needed; run from backend/app/test
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from modules.stream_analysis.stream_analysis import stream_analysis
+
+FRAMES = 10
+
+# Synthetic frames and a ball moving down the pitch, one position per frame
+frames = [{"image": np.full((720, 1280, 3), 40 * (i % 5), np.uint8)} for i in range(FRAMES)]
+ball_positions = [
+    {
+        "frame_id": i,
+        "timestamp": i / 30,
+        "ball_trajectory": {"current_position": {"x": 0.1 * i, "y": 2.0 * i, "z": abs(5 - i)}},
+    }
+    for i in range(FRAMES)
+]
+
+# The result banner is drawn over the last 20% of the frames
+for decision in ({"Out": True, "Reason": "Ball hitting stumps"}, lambda: "Not Out"):
+    video = stream_analysis(frames, ball_positions, decision, render_size=(640, 360))
+    size = len(base64.b64decode(video))
+    if size == 0:
+        print("Empty video for decision", decision)
+        exit()
+    print(f"✅ Rendered {FRAMES} frames past the banner ({size} bytes)")
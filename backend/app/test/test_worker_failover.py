@@ -0,0 +1,37 @@
+import requests
+import time
+
+# Base URL of an API server started with REVIEW_WORKERS=0, and at least one
+# standalone worker (python worker.py) sharing its REVIEW_DIR. Run with a
+# short lease, e.g. REVIEW_LEASE_SECONDS=10 for both.
+BASE_URL = "http://localhost:8000"
+
+with open("../reviews/test/input.json", "rb") as f:
+    payload = f.read()
+
+# Step 1: Submit a review; the API server only queues it
+response = requests.post(
+    f"{BASE_URL}/submit-review",
+    data=payload,
+    headers={"Content-Type": "application/json"},
+)
+if response.status_code != 200:
+    print("Failed to submit review:", response.status_code, response.text)
+    exit()
+review_id = response.json()["review_id"]
+print("Submitted review:", review_id)
+
+# Step 2: Kill the worker processing it (Ctrl+C is a clean stop, kill -9 a crash)
+# and start another; the review is picked up again once the lease expires
+input("Once the review is running, kill its worker, start a new one and press Enter...")
+
+while True:
+    result_data = requests.get(f"{BASE_URL}/get-review/{review_id}").json()
+    print("Status:", result_data["status"])
+    if result_data["status"] == "complete":
+        print("✅ Decision:", result_data["decision"])
+        break
+    if result_data["status"] in ("failed", "timed_out", "cancelled"):
+        print("Review did not complete:", result_data)
+        break
+    time.sleep(5)
@@ -0,0 +1,41 @@
+"""
+Standalone review worker.
+
+Processes reviews from the shared job queue without serving the API, so
+capacity can be added by starting more of these, on this host or on others
+that share REVIEW_DIR and the queue database (see core/review_queue.py).
+Pair them with API servers started with REVIEW_WORKERS=0.
+
+Run from backend/app:
+    python worker.py
+"""
+import signal
+import threading
+
+from core.config import REVIEW_WORKERS
+from core.review_workers import build_review_queue
+
+
+def main():
+    review_queue, review_pool = build_review_queue(max(1, REVIEW_WORKERS))
+    stopping = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.set())
+
+    if review_pool is not None:
+        review_pool.start()
+    review_queue.start()
+    print(f"[INFO] Review worker {review_queue.name} started with {review_queue.workers} workers")
+
+    # Wait in short steps so signals are handled promptly on every platform
+    while not stopping.wait(1.0):
+        pass
+    print(f"[INFO] Review worker {review_queue.name} stopping")
+    # Reviews still running are claimed by another worker once their leases expire
+    review_queue.stop(timeout=5)
+    if review_pool is not None:
+        review_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()